@@ -420,8 +420,8 @@ async function keywordSearch() {
     showLoading(true);
     clearResults('keyword');
 
-    // Log the question to analytics (fire-and-forget)
-    supabaseClient.from('question_analytics').insert({ search_type: 'keyword', question: query })
+    // Queue the question for analytics (fire-and-forget; compacted in batches server-side)
+    supabaseClient.from('analytics_events').insert({ search_type: 'keyword', question: query })
         .then(() => {}).catch(() => {});
 
     try {
@@ -430,6 +430,7 @@ async function keywordSearch() {
             .from('sentence_embeddings')
             .select('text, talk_id, title, speaker, url')
             .ilike('text', `%${query}%`)
+            .in('lang', searchLangs())
             .limit(20);
 
         if (error) throw new Error(`Search failed: ${error.message}`);
@@ -493,7 +494,7 @@ async function semanticSearch() {
         const embedding = await getEmbedding(query, 'semantic');
 
         // Step 2: Search for similar sentences
-        const results = await searchSentences(embedding);
+        const results = await searchSentences(embedding, query);
 
         if (!results || results.length === 0) {
             showResults('semantic', '<div class="no-results">No similar content found. Try a different query.</div>');
@@ -540,8 +541,8 @@ async function askQuestion() {
         // Step 1: Get embedding
         const embedding = await getEmbedding(question, 'rag');
 
-        // Step 2: Search for similar sentences
-        const results = await searchSentences(embedding);
+        // Step 2: Search for similar sentences (re-ranked against the question)
+        const results = await searchSentences(embedding, question);
 
         // Step 3: Group by talk (with similarity scores and URLs)
         const topTalks = groupByTalk(results);
@@ -606,17 +607,204 @@ async function getEmbedding(text, searchType) {
     return data.embedding;
 }
 
-// Search sentences using vector similarity
-async function searchSentences(embedding) {
+// Two-stage search needs talk_embeddings (scripts/05_update_embeddings.py).
+// Flipped off only when the database says the function doesn't exist, so older
+// databases fall back quietly; any other error or an empty result falls back
+// for that query alone.
+let twoStageSearchAvailable = true;
+
+function isMissingFunctionError(error) {
+    return error && (error.code === 'PGRST202' || error.code === '42883');
+}
+
+// Re-ranking: over-fetch this many candidates by vector similarity, re-score them
+// in the browser (see rerankSentences), keep the best MATCH_COUNT
+const MATCH_COUNT = 20;
+const RERANK_CANDIDATES = 200;
+
+// Languages to search. The corpus is partitioned by language, so passing them
+// to the search functions lets the database skip every other partition.
+function searchLangs() {
+    return (typeof SUPABASE_CONFIG !== 'undefined' && SUPABASE_CONFIG.searchLangs) || ['eng'];
+}
+
+// Search sentences using vector similarity: coarse top talks by talk-level
+// embedding first, then the best sentences within those talks.
+// With the query text, the candidates are re-ranked before returning.
+async function searchSentences(embedding, query) {
     if (!supabaseClient) throw new Error('Supabase not configured');
+    const matchCount = query ? RERANK_CANDIDATES : MATCH_COUNT;
+    let candidates = null;
+
+    if (twoStageSearchAvailable) {
+        const { data, error } = await supabaseClient.rpc('match_sentences_two_stage', {
+            query_embedding: embedding,
+            talk_count: 25,
+            match_count: matchCount,
+            langs: searchLangs()
+        });
+        if (!error && data && data.length) candidates = data;
+        else if (isMissingFunctionError(error)) twoStageSearchAvailable = false;
+    }
+
+    if (!candidates) {
+        const { data, error } = await supabaseClient.rpc('match_sentences', {
+            query_embedding: embedding,
+            match_count: matchCount,
+            langs: searchLangs()
+        });
+
+        if (error) throw new Error(`Database search failed: ${error.message}`);
+        candidates = data;
+    }
+
+    return query ? rerankSentences(query, candidates || [], MATCH_COUNT) : candidates;
+}
+
+// ============================================
+// RE-RANKING (mirror of scripts/rerank.py — keep the two in sync)
+// ============================================
+// boost = 0.15·BM25 (IDF over the candidates, scaled 0-1)
+//       + 0.10·query-term coverage + 0.10·proximity (1 = terms adjacent)
+// score = similarity + min(boost, cosine spread of the top matchCount) for a
+// sentence that quotes the query (every term, adjacent, any order), else
+// similarity — an ungated boost ranked paraphrased questions worse than cosine
+// Candidates are tokenized and scored best-cosine first in batches; once the
+// time budget (which covers the whole call) is spent the rest keep their
+// vector order, so a slow device degrades to plain vector search. Results
+// are cached per (query, candidate set).
+
+const RERANK_BATCH_SIZE = 50;
+const RERANK_BUDGET_MS = 30;
+const RERANK_CACHE_SIZE = 100;
+const RERANK_WEIGHTS = { lexical: 0.15, coverage: 0.10, proximity: 0.10 };
+const BM25_K1 = 1.2;
+const BM25_B = 0.75;
+const STOPWORDS = new Set(`a an and are as at be but by can did do does for from had has have how i if in into is it its
+me my of on or our so than that the their them then there these they this to us was we were
+what when where which who why will with would you your`.split(/\s+/));
+const rerankCache = new Map();
+
+function stemWord(word) {
+    if (word.endsWith("'s")) word = word.slice(0, -2);
+    for (const suffix of ['ing', 'ed', 'es', 's', 'ly']) {
+        if (word.length > suffix.length + 3 && word.endsWith(suffix)) return word.slice(0, -suffix.length);
+    }
+    return word;
+}
 
-    const { data, error } = await supabaseClient.rpc('match_sentences', {
-        query_embedding: embedding,
-        match_count: 20
+// Stemmed content words with their positions in the sentence
+function tokenizeForRerank(text) {
+    const words = text.toLowerCase().match(/[a-z0-9]+(?:'[a-z]+)?/g) || [];
+    const tokens = [];
+    words.forEach((word, i) => {
+        if (!STOPWORDS.has(word)) tokens.push([i, stemWord(word)]);
     });
+    return tokens;
+}
+
+// Shortest span of token positions that includes every matched term
+function minWindow(positions) {
+    const events = [];
+    for (const [term, list] of positions) for (const pos of list) events.push([pos, term]);
+    events.sort((a, b) => a[0] - b[0]);
+    const seen = new Map();
+    let best = Infinity;
+    let left = 0;
+    for (const [pos, term] of events) {
+        seen.set(term, (seen.get(term) || 0) + 1);
+        while (seen.size === positions.size) {
+            best = Math.min(best, pos - events[left][0] + 1);
+            const leftTerm = events[left][1];
+            if (seen.get(leftTerm) === 1) seen.delete(leftTerm);
+            else seen.set(leftTerm, seen.get(leftTerm) - 1);
+            left++;
+        }
+    }
+    return best;
+}
 
-    if (error) throw new Error(`Database search failed: ${error.message}`);
-    return data;
+function rerankSentences(query, candidates, matchCount) {
+    const deadline = performance.now() + RERANK_BUDGET_MS;
+    const key = query.toLowerCase().split(/\s+/).filter(Boolean).join(' ') + '\u0000' +
+        candidates.map(c => c.id || c.text).join('\u0000') + '\u0000' + matchCount;
+    if (rerankCache.has(key)) {
+        const cached = rerankCache.get(key);
+        rerankCache.delete(key);
+        rerankCache.set(key, cached);  // most recently used goes last
+        return cached.slice(0, matchCount);
+    }
+
+    const ranked = scoreCandidates(query, candidates, matchCount, deadline);
+    rerankCache.set(key, ranked);
+    if (rerankCache.size > RERANK_CACHE_SIZE) rerankCache.delete(rerankCache.keys().next().value);
+    return ranked.slice(0, matchCount);
+}
+
+function scoreCandidates(query, candidates, matchCount, deadline) {
+    const terms = [...new Set(tokenizeForRerank(query).map(([, term]) => term))];
+    const ordered = [...candidates].sort((a, b) => b.similarity - a.similarity);
+    if (!terms.length || !ordered.length) return ordered.map(c => ({ ...c, rerank_score: c.similarity }));
+
+    // Tokenize in batches until the budget runs out; the pool defines IDF and length norms
+    const docs = [];
+    let exhausted = false;
+    for (let start = 0; start < ordered.length; start += RERANK_BATCH_SIZE) {
+        if (start && performance.now() > deadline) {
+            exhausted = true;
+            break;
+        }
+        for (const candidate of ordered.slice(start, start + RERANK_BATCH_SIZE)) {
+            const tokens = tokenizeForRerank(candidate.text);
+            const positions = new Map();
+            for (const [pos, term] of tokens) {
+                if (!terms.includes(term)) continue;
+                if (!positions.has(term)) positions.set(term, []);
+                positions.get(term).push(pos);
+            }
+            docs.push({ candidate, length: tokens.length, positions });
+        }
+    }
+
+    const n = docs.length;
+    const avgLength = docs.reduce((sum, d) => sum + d.length, 0) / n || 1;
+    const idf = {};
+    for (const term of terms) {
+        const df = docs.filter(d => d.positions.has(term)).length;
+        idf[term] = Math.log(1 + (n - df + 0.5) / (df + 0.5));
+    }
+
+    // Score in batches too, so the budget bounds the whole call
+    const parts = [];
+    for (let start = 0; start < n; start += RERANK_BATCH_SIZE) {
+        if (start && performance.now() > deadline) {
+            exhausted = true;
+            break;
+        }
+        for (const d of docs.slice(start, start + RERANK_BATCH_SIZE)) {
+            const norm = BM25_K1 * (1 - BM25_B + BM25_B * d.length / avgLength);
+            let lexical = 0;
+            for (const [term, list] of d.positions) lexical += idf[term] * list.length * (BM25_K1 + 1) / (list.length + norm);
+            const matched = d.positions.size;
+            const proximity = matched > 1 ? matched / minWindow(d.positions) : 0;
+            parts.push({ candidate: d.candidate, lexical, matched, proximity });
+        }
+    }
+    if (exhausted) console.warn(`Re-ranking budget spent after ${parts.length} of ${ordered.length} candidates`);
+    const topBm25 = Math.max(...parts.map(p => p.lexical)) || 1;
+    const head = ordered.slice(0, Math.max(matchCount, 1));
+    const spread = head[0].similarity - head[head.length - 1].similarity;
+
+    const scored = parts.map(p => {
+        const quotes = p.matched === terms.length && (p.matched === 1 || p.proximity === 1);
+        const boost = quotes ? Math.min(RERANK_WEIGHTS.lexical * p.lexical / topBm25
+            + RERANK_WEIGHTS.coverage * p.matched / terms.length
+            + RERANK_WEIGHTS.proximity * p.proximity, spread) : 0;
+        return { ...p.candidate, rerank_score: p.candidate.similarity + boost };
+    }).sort((a, b) => b.rerank_score - a.rerank_score);
+
+    // Anything the budget didn't reach keeps its vector order after the re-scored head
+    return scored.concat(ordered.slice(parts.length).map(c => ({ ...c, rerank_score: c.similarity })));
 }
 
 // Group search results by talk, computing average similarity per talk
@@ -631,15 +819,18 @@ function groupByTalk(sentences) {
                 speaker: sent.speaker,
                 url: sent.url,
                 sentences: [],
-                totalSimilarity: 0
+                totalSimilarity: 0,
+                totalScore: 0
             };
         }
         talkMap[sent.talk_id].sentences.push(sent.text);
         talkMap[sent.talk_id].totalSimilarity += sent.similarity;
+        // Rank by the re-ranked score when there is one; badges still show similarity
+        talkMap[sent.talk_id].totalScore += sent.rerank_score ?? sent.similarity;
     }
 
     return Object.values(talkMap)
-        .sort((a, b) => b.totalSimilarity / b.sentences.length - a.totalSimilarity / a.sentences.length)
+        .sort((a, b) => b.totalScore / b.sentences.length - a.totalScore / a.sentences.length)
         .slice(0, 3)
         .map(talk => ({
             talk_id: talk.talk_id,
@@ -666,6 +857,7 @@ async function fetchFullTalkText(talks) {
         .from('sentence_embeddings')
         .select('talk_id, sentence_num, text')
         .in('talk_id', talkIds)
+        .in('lang', searchLangs())
         .order('talk_id')
         .order('sentence_num');
 
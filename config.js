@@ -12,7 +12,9 @@
 // Default placeholder config — overwritten when config.public.json loads
 const SUPABASE_CONFIG = {
     url: 'YOUR_SUPABASE_URL_HERE',
-    anonKey: 'YOUR_SUPABASE_ANON_KEY_HERE'
+    anonKey: 'YOUR_SUPABASE_ANON_KEY_HERE',
+    // Corpus languages to search (see scripts/partitions.py); optional SEARCH_LANGS in config.public.json
+    searchLangs: ['eng']
 };
 
 // Load config.public.json and update SUPABASE_CONFIG
@@ -24,6 +26,7 @@ fetch('config.public.json')
     .then(config => {
         if (config.SUPABASE_URL) SUPABASE_CONFIG.url = config.SUPABASE_URL;
         if (config.SUPABASE_ANON_KEY) SUPABASE_CONFIG.anonKey = config.SUPABASE_ANON_KEY;
+        if (Array.isArray(config.SEARCH_LANGS) && config.SEARCH_LANGS.length) SUPABASE_CONFIG.searchLangs = config.SEARCH_LANGS;
         // Re-initialize now that config is loaded
         window.dispatchEvent(new Event('config-loaded'));
     })
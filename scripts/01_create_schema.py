@@ -1,9 +1,16 @@
 """
 Step 1: Create Database Schema
 ================================
-Creates the sentence_embeddings table, pgvector extension,
-Row Level Security policies, and the match_sentences() function
-in your Supabase database.
+Creates the sentence_embeddings and talk_embeddings tables, pgvector
+extension, Row Level Security policies, and the match_sentences() and
+match_sentences_two_stage() functions in your Supabase database.
+
+Both tables are partitioned by language (sentences also by decade) so
+the corpus can hold many languages and years while each query only
+probes the partitions it asks for. Partitions, each with its own HNSW
+vector index, are created on demand by ensure_corpus_partitions() when
+Step 3 imports a new language or decade. Tables from an earlier,
+unpartitioned install are migrated in place.
 
 Usage:
     python scripts/01_create_schema.py
@@ -12,58 +19,196 @@ Prerequisites:
     - config.public.json with Supabase URL and anon key
     - config.secret.json with Supabase service key, access token, and project ref
     - Supabase project created
+    (or CONFERENCE_RAG_BACKEND=local to create the offline SQLite tables instead)
 """
 
-import json
 import sys
 import time
 
-# Load configuration from both config files
-with open('config.public.json', 'r') as f:
-    public_config = json.load(f)
-with open('config.secret.json', 'r') as f:
-    secrets = json.load(f)
-
-SUPABASE_URL = public_config['SUPABASE_URL']
-SUPABASE_SERVICE_KEY = secrets['SUPABASE_SERVICE_KEY']
-SUPABASE_ACCESS_TOKEN = secrets['SUPABASE_ACCESS_TOKEN']
-SUPABASE_PROJECT_REF = secrets['SUPABASE_PROJECT_REF']
+from backends import get_backend
 
 
-def create_schema():
-    import requests
-    from supabase import create_client
-
-    print("=" * 60)
-    print("Creating Database Schema")
-    print("=" * 60)
-
-    schema_sql = """
+SCHEMA_SQL = """
 -- Enable pgvector extension
 CREATE EXTENSION IF NOT EXISTS vector;
 
--- Create sentence_embeddings table
+-- Partitions live in their own schema: PostgREST only exposes public, so
+-- clients always go through the parent tables and their RLS policies
+CREATE SCHEMA IF NOT EXISTS corpus_partitions;
+REVOKE ALL ON SCHEMA corpus_partitions FROM anon, authenticated;
+
+-- An earlier install created plain tables; move them aside so they can be
+-- copied into the partitioned layout below
+DO $$
+BEGIN
+  IF EXISTS (SELECT 1 FROM pg_class
+             WHERE oid = to_regclass('public.sentence_embeddings') AND relkind = 'r') THEN
+    ALTER TABLE sentence_embeddings RENAME TO sentence_embeddings_unpartitioned;
+    ALTER TABLE sentence_embeddings_unpartitioned
+      RENAME CONSTRAINT sentence_embeddings_pkey TO sentence_embeddings_unpartitioned_pkey;
+    ALTER INDEX IF EXISTS sentence_embeddings_talk_id_idx
+      RENAME TO sentence_embeddings_unpartitioned_talk_id_idx;
+  END IF;
+  IF EXISTS (SELECT 1 FROM pg_class
+             WHERE oid = to_regclass('public.talk_embeddings') AND relkind = 'r') THEN
+    ALTER TABLE talk_embeddings RENAME TO talk_embeddings_unpartitioned;
+    ALTER TABLE talk_embeddings_unpartitioned
+      RENAME CONSTRAINT talk_embeddings_pkey TO talk_embeddings_unpartitioned_pkey;
+  END IF;
+END $$;
+
+-- Create sentence_embeddings table: LIST by language, then RANGE by decade
+-- (the partition keys have to be part of the primary key)
 CREATE TABLE IF NOT EXISTS sentence_embeddings (
-    id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+    id UUID NOT NULL DEFAULT gen_random_uuid(),
     talk_id UUID NOT NULL,
     title TEXT NOT NULL,
     speaker TEXT,
     calling TEXT,
-    year INTEGER,
+    year INTEGER NOT NULL DEFAULT 0,
     season TEXT,
+    lang TEXT NOT NULL DEFAULT 'eng',
     url TEXT,
     sentence_num INTEGER,
     text TEXT NOT NULL,
     embedding vector(1536),
-    created_at TIMESTAMPTZ DEFAULT NOW()
-);
+    created_at TIMESTAMPTZ DEFAULT NOW(),
+    PRIMARY KEY (id, lang, year)
+) PARTITION BY LIST (lang);
 
--- Create index for talk_id grouping
+-- Create index for talk_id grouping (created on every partition)
 CREATE INDEX IF NOT EXISTS sentence_embeddings_talk_id_idx 
 ON sentence_embeddings(talk_id);
 
+-- Talk-level embeddings: the normalized mean of each talk's sentence vectors
+-- (computed in scripts/04_embed_data.py). Used for coarse-to-fine search.
+-- Far fewer rows than sentences, so partitioned by language only.
+CREATE TABLE IF NOT EXISTS talk_embeddings (
+    talk_id UUID NOT NULL,
+    title TEXT NOT NULL,
+    speaker TEXT,
+    year INTEGER,
+    season TEXT,
+    lang TEXT NOT NULL DEFAULT 'eng',
+    url TEXT,
+    sentence_count INTEGER,
+    embedding vector(1536),
+    created_at TIMESTAMPTZ DEFAULT NOW(),
+    PRIMARY KEY (talk_id, lang)
+) PARTITION BY LIST (lang);
+
+-- Create the partitions for a language and range of years, each with its
+-- own HNSW index. Called by scripts/run_partitions.py and by Steps 3 and 5
+-- before loading. A new decade must be created before rows for it are
+-- loaded: rows in a language's DEFAULT partition (year 0 = unknown) block a
+-- matching range. Concurrent jobs for the same language serialize on an
+-- advisory lock, so the check-then-create below can't race.
+CREATE OR REPLACE FUNCTION ensure_corpus_partitions(
+  p_lang text,
+  p_start_year int,
+  p_end_year int
+)
+RETURNS void
+LANGUAGE plpgsql
+SECURITY DEFINER
+SET search_path = public
+AS $$
+DECLARE
+  lang_table text := 'sentence_embeddings_' || p_lang;
+  talk_table text := 'talk_embeddings_' || p_lang;
+  decade int;
+  leaf text;
+BEGIN
+  IF p_lang !~ '^[a-z]{2,8}$' THEN
+    RAISE EXCEPTION 'invalid language code: %', p_lang;
+  END IF;
+
+  -- Held until the calling transaction ends
+  PERFORM pg_advisory_xact_lock(hashtext('corpus_partitions:' || p_lang));
+
+  EXECUTE format(
+    'CREATE TABLE IF NOT EXISTS corpus_partitions.%I PARTITION OF public.sentence_embeddings '
+    'FOR VALUES IN (%L) PARTITION BY RANGE (year)', lang_table, p_lang);
+  EXECUTE format(
+    'CREATE TABLE IF NOT EXISTS corpus_partitions.%I PARTITION OF corpus_partitions.%I DEFAULT',
+    lang_table || '_other', lang_table);
+  -- Indexed like the decades, so a search over every year is one ordered
+  -- index scan per leaf rather than a sort of the unknown-year rows
+  EXECUTE format(
+    'CREATE INDEX IF NOT EXISTS %I ON corpus_partitions.%I USING hnsw (embedding vector_cosine_ops)',
+    lang_table || '_other_embedding_idx', lang_table || '_other');
+
+  -- Year 0 (unknown) stays in the DEFAULT partition; (0, 0) creates no decades
+  IF p_start_year > 0 THEN
+    FOR decade IN SELECT generate_series(p_start_year - p_start_year % 10, p_end_year, 10) LOOP
+      leaf := format('%s_%ss', lang_table, decade);
+      IF to_regclass(format('corpus_partitions.%I', leaf)) IS NULL THEN
+        EXECUTE format(
+          'CREATE TABLE corpus_partitions.%I PARTITION OF corpus_partitions.%I FOR VALUES FROM (%s) TO (%s)',
+          leaf, lang_table, decade, decade + 10);
+        EXECUTE format(
+          'CREATE INDEX ON corpus_partitions.%I USING hnsw (embedding vector_cosine_ops)', leaf);
+      END IF;
+    END LOOP;
+  END IF;
+
+  IF to_regclass(format('corpus_partitions.%I', talk_table)) IS NULL THEN
+    EXECUTE format(
+      'CREATE TABLE corpus_partitions.%I PARTITION OF public.talk_embeddings FOR VALUES IN (%L)',
+      talk_table, p_lang);
+    EXECUTE format(
+      'CREATE INDEX ON corpus_partitions.%I USING hnsw (embedding vector_cosine_ops)', talk_table);
+  END IF;
+END;
+$$;
+
+REVOKE EXECUTE ON FUNCTION ensure_corpus_partitions(text, int, int) FROM public, anon, authenticated;
+GRANT EXECUTE ON FUNCTION ensure_corpus_partitions(text, int, int) TO service_role;
+
+-- Copy rows from the pre-partitioning tables (all English), then drop them
+DO $$
+DECLARE
+  years record;
+BEGIN
+  IF to_regclass('public.sentence_embeddings_unpartitioned') IS NOT NULL THEN
+    SELECT min(year) AS first, max(year) AS last INTO years
+    FROM sentence_embeddings_unpartitioned WHERE year > 0;
+    PERFORM ensure_corpus_partitions('eng', COALESCE(years.first, 2020), COALESCE(years.last, 2020));
+    INSERT INTO sentence_embeddings
+      (id, talk_id, title, speaker, calling, year, season, lang, url, sentence_num, text, embedding, created_at)
+    SELECT id, talk_id, title, speaker, calling, COALESCE(year, 0), season, 'eng', url, sentence_num,
+           text, embedding, created_at
+    FROM sentence_embeddings_unpartitioned;
+    DROP TABLE sentence_embeddings_unpartitioned;
+  END IF;
+  IF to_regclass('public.talk_embeddings_unpartitioned') IS NOT NULL THEN
+    PERFORM ensure_corpus_partitions('eng', 2020, 2020);
+    INSERT INTO talk_embeddings
+      (talk_id, title, speaker, year, season, lang, url, sentence_count, embedding, created_at)
+    SELECT talk_id, title, speaker, year, season, 'eng', url, sentence_count, embedding, created_at
+    FROM talk_embeddings_unpartitioned;
+    DROP TABLE talk_embeddings_unpartitioned;
+  END IF;
+END $$;
+
+-- Bring languages partitioned by an earlier version of this script up to
+-- date (e.g. the unknown-year partition's vector index)
+DO $$
+DECLARE
+  part record;
+BEGIN
+  FOR part IN
+    SELECT substring(c.relname FROM '^sentence_embeddings_(.*)$') AS lang
+    FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid
+    WHERE i.inhparent = 'public.sentence_embeddings'::regclass
+  LOOP
+    PERFORM ensure_corpus_partitions(part.lang, 0, 0);
+  END LOOP;
+END $$;
+
 -- Enable Row Level Security
 ALTER TABLE sentence_embeddings ENABLE ROW LEVEL SECURITY;
+ALTER TABLE talk_embeddings ENABLE ROW LEVEL SECURITY;
 
 -- RLS policy: authenticated users can read
 DROP POLICY IF EXISTS "Allow authenticated users to read" ON sentence_embeddings;
@@ -72,6 +217,12 @@ ON sentence_embeddings FOR SELECT
 TO authenticated
 USING (true);
 
+DROP POLICY IF EXISTS "Allow authenticated users to read" ON talk_embeddings;
+CREATE POLICY "Allow authenticated users to read"
+ON talk_embeddings FOR SELECT
+TO authenticated
+USING (true);
+
 -- ============================================
 -- Page Views table (PUBLIC access for RLS demo)
 -- ============================================
@@ -101,10 +252,22 @@ ON page_views FOR SELECT
 TO anon, authenticated
 USING (true);
 
--- Create function for similarity search
+-- Search functions take the languages and years to search; the WHERE
+-- clauses on the partition keys let Postgres skip every other partition.
+-- The old signatures are dropped so PostgREST never sees two overloads.
+DROP FUNCTION IF EXISTS match_sentences(vector, int);
+DROP FUNCTION IF EXISTS match_sentences_two_stage(vector, int, int);
+
+-- Create function for similarity search. Every decade partition has its
+-- own HNSW index, and an HNSW scan returns at most hnsw.ef_search rows (40
+-- by default) per index — so the search widens it to match_count first.
+-- (pgvector caps ef_search at 1000; larger match_counts come back short.)
 CREATE OR REPLACE FUNCTION match_sentences(
   query_embedding vector(1536),
-  match_count int DEFAULT 20
+  match_count int DEFAULT 20,
+  langs text[] DEFAULT ARRAY['eng'],
+  year_from int DEFAULT 0,
+  year_to int DEFAULT 9999
 )
 RETURNS TABLE (
   id uuid,
@@ -114,8 +277,13 @@ RETURNS TABLE (
   text text,
   similarity float
 )
-LANGUAGE sql STABLE
+LANGUAGE plpgsql
 AS $$
+#variable_conflict use_column
+BEGIN
+  -- Local to the calling transaction (one PostgREST request)
+  PERFORM set_config('hnsw.ef_search', least(greatest(match_count, 40), 1000)::text, true);
+  RETURN QUERY
   SELECT
     sentence_embeddings.id,
     sentence_embeddings.talk_id,
@@ -124,31 +292,103 @@ AS $$
     sentence_embeddings.text,
     1 - (sentence_embeddings.embedding <=> query_embedding) as similarity
   FROM sentence_embeddings
+  WHERE sentence_embeddings.lang = ANY(langs)
+    AND sentence_embeddings.year BETWEEN year_from AND year_to
   ORDER BY sentence_embeddings.embedding <=> query_embedding
   LIMIT match_count;
+END;
+$$;
+
+-- Two-stage search: rank talk centroids first, then score only the
+-- sentences of the top talk_count talks instead of every sentence vector.
+-- Both CTEs are MATERIALIZED so the planner can't turn the second stage
+-- back into an HNSW scan of every sentence filtered by talk_id afterwards
+-- (which returns ef_search rows, most of them from other talks): the top
+-- talks' sentences are fetched through the talk_id index and scored exactly.
+CREATE OR REPLACE FUNCTION match_sentences_two_stage(
+  query_embedding vector(1536),
+  talk_count int DEFAULT 25,
+  match_count int DEFAULT 20,
+  langs text[] DEFAULT ARRAY['eng'],
+  year_from int DEFAULT 0,
+  year_to int DEFAULT 9999
+)
+RETURNS TABLE (
+  id uuid,
+  talk_id uuid,
+  title text,
+  speaker text,
+  url text,
+  text text,
+  similarity float,
+  talk_similarity float
+)
+LANGUAGE plpgsql
+AS $$
+#variable_conflict use_column
+BEGIN
+  PERFORM set_config('hnsw.ef_search', least(greatest(talk_count, 40), 1000)::text, true);
+  RETURN QUERY
+  WITH top_talks AS MATERIALIZED (
+    SELECT
+      talk_embeddings.talk_id,
+      1 - (talk_embeddings.embedding <=> query_embedding) as talk_similarity
+    FROM talk_embeddings
+    WHERE talk_embeddings.lang = ANY(langs)
+      AND COALESCE(talk_embeddings.year, 0) BETWEEN year_from AND year_to
+    ORDER BY talk_embeddings.embedding <=> query_embedding
+    LIMIT talk_count
+  ),
+  candidates AS MATERIALIZED (
+    SELECT
+      sentence_embeddings.id,
+      sentence_embeddings.talk_id,
+      sentence_embeddings.title,
+      sentence_embeddings.speaker,
+      sentence_embeddings.url,
+      sentence_embeddings.text,
+      sentence_embeddings.embedding <=> query_embedding as distance,
+      top_talks.talk_similarity
+    FROM top_talks
+    JOIN sentence_embeddings ON sentence_embeddings.talk_id = top_talks.talk_id
+    WHERE sentence_embeddings.lang = ANY(langs)
+      AND sentence_embeddings.year BETWEEN year_from AND year_to
+  )
+  SELECT
+    candidates.id,
+    candidates.talk_id,
+    candidates.title,
+    candidates.speaker,
+    candidates.url,
+    candidates.text,
+    1 - candidates.distance as similarity,
+    candidates.talk_similarity
+  FROM candidates
+  ORDER BY candidates.distance
+  LIMIT match_count;
+END;
 $$;
 """
 
-    url = f"https://api.supabase.com/v1/projects/{SUPABASE_PROJECT_REF}/database/query"
-    headers = {
-        "Authorization": f"Bearer {SUPABASE_ACCESS_TOKEN}",
-        "Content-Type": "application/json"
-    }
 
-    resp = requests.post(url, headers=headers, json={"query": schema_sql})
-    if resp.status_code in (200, 201):
+def create_schema():
+    print("=" * 60)
+    print("Creating Database Schema")
+    print("=" * 60)
+
+    backend = get_backend()
+    try:
+        backend.apply_schema(SCHEMA_SQL)
         print("✅ Database schema created successfully!")
-    else:
-        print(f"❌ Schema creation failed: {resp.status_code}")
-        print(resp.text[:500])
+    except Exception as e:
+        print(f"❌ Schema creation failed: {e}")
         return False
 
-    # Verify table exists via PostgREST
-    client = create_client(SUPABASE_URL, SUPABASE_SERVICE_KEY)
+    # Verify table exists (PostgREST may need a moment to see new tables)
     for attempt in range(5):
         try:
-            result = client.table('sentence_embeddings').select('id', count='exact').limit(1).execute()
-            print(f"✅ Table verified. Current rows: {result.count or 0}")
+            rows = backend.count('sentence_embeddings')
+            print(f"✅ Table verified. Current rows: {rows}")
             return True
         except Exception:
             if attempt < 4:
@@ -4,11 +4,16 @@ Step 2: Scrape Conference Talks
 Scrapes 5 years of General Conference talks from the Church website
 and saves them to data/talks.json.
 
+Other languages and years are scraped one partition at a time (see
+scripts/partitions.py and scripts/run_partitions.py).
+
 Usage:
     python scripts/02_scrape_data.py
+    CONFERENCE_RAG_PARTITION=spa:1995 python scripts/02_scrape_data.py
 
 Output:
     data/talks.json  — JSON array of talk objects
+    (scripts/output/partitions/<lang>-<years>/talks.json for a partition)
 
 Prerequisites:
     - Internet connection
@@ -24,12 +29,14 @@ import requests
 from bs4 import BeautifulSoup
 from tqdm import tqdm
 
+import instrumentation as inst
+from partitions import DEFAULT_END_YEAR, DEFAULT_LANG, DEFAULT_START_YEAR, current_partition, output_path
+
 
-YEARS_TO_SCRAPE = 5
-START_YEAR = 2025 - YEARS_TO_SCRAPE
-END_YEAR = 2025
-OUTPUT_DIR = os.path.join('scripts', 'output')
-OUTPUT_FILE = os.path.join(OUTPUT_DIR, 'talks.json')
+START_YEAR = DEFAULT_START_YEAR
+END_YEAR = DEFAULT_END_YEAR
+OUTPUT_DIR = output_path()
+OUTPUT_FILE = output_path('talks.json')
 
 
 def setup_session():
@@ -41,23 +48,26 @@ def setup_session():
     return session
 
 
-def get_conference_urls(start_year, end_year):
+def get_conference_urls(start_year, end_year, lang=DEFAULT_LANG):
     """Generate URLs for each conference (April + October per year)."""
-    base_url = 'https://www.churchofjesuschrist.org/study/general-conference/{year}/{month}?lang=eng'
+    base_url = 'https://www.churchofjesuschrist.org/study/general-conference/{year}/{month}?lang={lang}'
     return [
-        (base_url.format(year=year, month=month), str(year), month)
+        (base_url.format(year=year, month=month, lang=lang), str(year), month)
         for year in range(start_year, end_year + 1)
         for month in ['04', '10']
     ]
 
 
-def get_talk_urls(conference_url, year, month, session):
+@inst.profiled
+def get_talk_urls(conference_url, year, month, session, lang=DEFAULT_LANG):
     """Extract individual talk URLs from a conference index page."""
     try:
         response = session.get(conference_url, timeout=10)
         response.raise_for_status()
-    except Exception:
+    except Exception as e:
+        inst.event('index_fetch_failed', url=conference_url, error=str(e))
         return []
+    inst.count('bytes', len(response.content))
 
     response.encoding = 'utf-8'
     soup = BeautifulSoup(response.text, 'html.parser')
@@ -72,7 +82,7 @@ def get_talk_urls(conference_url, year, month, session):
     month_path = f'/study/general-conference/{year}/{month}/'
     for link in soup.find_all('a', href=True):
         href = link.get('href')
-        if not href or month_path not in href or 'lang=eng' not in href:
+        if not href or month_path not in href or f'lang={lang}' not in href:
             continue
 
         canonical = 'https://www.churchofjesuschrist.org' + href
@@ -83,7 +93,7 @@ def get_talk_urls(conference_url, year, month, session):
         if any(slug in canonical.lower() for slug in session_slugs):
             continue
         # Skip the conference index page itself
-        if href.rstrip('?lang=eng').endswith(f'/{month}'):
+        if href.split('?')[0].rstrip('/').endswith(f'/{month}'):
             continue
 
         talk_urls.append(canonical)
@@ -91,13 +101,17 @@ def get_talk_urls(conference_url, year, month, session):
     return talk_urls
 
 
-def scrape_talk(talk_url, session):
+@inst.profiled
+def scrape_talk(talk_url, session, lang=DEFAULT_LANG):
     """Scrape a single talk page and return structured data."""
     try:
-        response = session.get(talk_url, timeout=10)
+        with inst.span('fetch_talk'):
+            response = session.get(talk_url, timeout=10)
         response.raise_for_status()
-    except Exception:
+    except Exception as e:
+        inst.event('talk_fetch_failed', url=talk_url, error=str(e))
         return None
+    inst.count('bytes', len(response.content))
 
     response.encoding = 'utf-8'
     soup = BeautifulSoup(response.text, 'html.parser')
@@ -112,6 +126,7 @@ def scrape_talk(talk_url, session):
 
     content_div = soup.find("div", {"class": "body-block"})
     if not content_div:
+        inst.count('talks_without_body')
         return None
 
     content = " ".join(p.text.strip() for p in content_div.find_all("p"))
@@ -126,24 +141,29 @@ def scrape_talk(talk_url, session):
         "calling": calling,
         "year": year,
         "season": season,
+        "lang": lang,
         "url": talk_url,
         "text": content
     }
 
 
 def main():
+    partition = current_partition()
+    lang = partition.lang if partition else DEFAULT_LANG
+    start_year, end_year = (partition.start_year, partition.end_year) if partition else (START_YEAR, END_YEAR)
+
     print("=" * 60)
-    print(f"Scraping Conference Talks ({START_YEAR}–{END_YEAR})")
+    print(f"Scraping Conference Talks ({start_year}–{end_year}, lang={lang})")
     print("=" * 60)
 
     session = setup_session()
-    conference_urls = get_conference_urls(START_YEAR, END_YEAR)
+    conference_urls = get_conference_urls(start_year, end_year, lang)
 
     # Phase 1: Find all talk URLs
     print("\nFinding talk URLs...")
     all_talk_urls = []
     for conf_url, year, month in tqdm(conference_urls, desc="Conferences"):
-        urls = get_talk_urls(conf_url, year, month, session)
+        urls = get_talk_urls(conf_url, year, month, session, lang)
         all_talk_urls.extend(urls)
     print(f"Found {len(all_talk_urls)} talks\n")
 
@@ -151,11 +171,13 @@ def main():
     print("Scraping talk content...")
     talks_data = []
     with ThreadPoolExecutor(max_workers=10) as executor:
-        futures = {executor.submit(scrape_talk, url, session): url for url in all_talk_urls}
+        futures = {executor.submit(scrape_talk, url, session, lang): url for url in all_talk_urls}
         for future in tqdm(as_completed(futures), total=len(all_talk_urls), desc="Scraping"):
             talk = future.result()
             if talk:
                 talks_data.append(talk)
+    inst.count('talk_urls', len(all_talk_urls))
+    inst.count('talks', len(talks_data))
 
     if not talks_data:
         print("\n❌ No talks scraped! Check your internet connection or website structure.")
@@ -169,8 +191,9 @@ def main():
     print(f"\n✅ Scraped {len(talks_data)} talks!")
     print(f"   Years: {min(t['year'] for t in talks_data)} – {max(t['year'] for t in talks_data)}")
     print(f"   Output: {OUTPUT_FILE}")
-    print(f"\nNext: python scripts/03_import_data.py")
+    print(f"\nNext: python scripts/02b_dedup_talks.py")
 
 
 if __name__ == '__main__':
-    main()
+    with inst.stage('scrape'):
+        main()
@@ -0,0 +1,135 @@
+"""
+Step 2b: Deduplicate Talks
+===========================
+Finds near-duplicate talks in scripts/output/talks.json (the same talk
+scraped under several URLs, e.g. video pages or session variants) using
+MinHash signatures and an LSH index, keeps one copy of each, and reports
+how much repeated text (boilerplate, quoted scriptures) remains at the
+sentence level.
+
+Exact-duplicate sentences are NOT removed from talks — every talk keeps its
+full text — but Step 4 embeds each distinct sentence only once and reuses
+the vector for every copy. The report shows what that saves.
+
+Usage:
+    python scripts/02b_dedup_talks.py
+
+Input:
+    scripts/output/talks.json  — from Step 2 (scraping)
+
+Output:
+    scripts/output/talks_deduped.json  — talks with near-duplicates removed
+    scripts/output/dedup_report.json   — what was removed and why
+
+Prerequisites:
+    - Talks scraped (Step 2)
+    - No API keys needed for this step
+"""
+
+import importlib
+import json
+import os
+import sys
+
+import instrumentation as inst
+from dedup import char_shingles, find_near_duplicates, normalize, word_shingles
+from partitions import output_path
+
+
+INPUT_FILE = output_path('talks.json')
+OUTPUT_FILE = output_path('talks_deduped.json')
+REPORT_FILE = output_path('dedup_report.json')
+TALK_THRESHOLD = 0.8       # estimated Jaccard over word 5-grams
+SENTENCE_THRESHOLD = 0.8   # estimated Jaccard over character 5-grams
+COST_PER_MILLION_TOKENS = 0.020  # text-embedding-3-small
+
+# Reuse the exact splitter from the import step so counts match what gets embedded
+split_into_sentences = importlib.import_module('03_import_data').split_into_sentences
+
+
+def embedding_cost(chars):
+    """Same rough estimate as Step 4: ~4 characters per token."""
+    return (chars / 4 / 1_000_000) * COST_PER_MILLION_TOKENS
+
+
+def pick_representative(talks, members):
+    """Prefer a regular talk page over video/session variants, then the longest text."""
+    return max(members, key=lambda i: ('video' not in talks[i]['url'].lower(), len(talks[i]['text'])))
+
+
+def main():
+    if not os.path.exists(INPUT_FILE):
+        print(f"❌ {INPUT_FILE} not found. Run scripts/02_scrape_data.py first.")
+        sys.exit(1)
+
+    with open(INPUT_FILE, 'r', encoding='utf-8') as f:
+        talks = json.load(f)
+
+    print("=" * 60)
+    print(f"Deduplicating {len(talks):,} Talks")
+    print("=" * 60)
+
+    # Talk level: near-duplicate talks collapse to one representative
+    with inst.profile('talk_dedup'):
+        clusters = find_near_duplicates([t['text'] for t in talks], word_shingles, TALK_THRESHOLD)
+    dropped = set()
+    duplicate_groups = []
+    for members in clusters:
+        keep = pick_representative(talks, members)
+        dropped.update(i for i in members if i != keep)
+        duplicate_groups.append({
+            'kept': talks[keep]['url'],
+            'dropped': [talks[i]['url'] for i in members if i != keep],
+        })
+    kept_talks = [t for i, t in enumerate(talks) if i not in dropped]
+    print(f"   Near-duplicate talks removed: {len(dropped):,} ({len(clusters):,} groups)")
+
+    # Sentence level: measure repetition across the talks we keep
+    all_sentences = [s for t in talks for s in split_into_sentences(t['text'])]
+    kept_sentences = [s for t in kept_talks for s in split_into_sentences(t['text'])]
+    distinct = {}
+    for sentence in kept_sentences:
+        distinct.setdefault(normalize(sentence), sentence)
+    with inst.profile('sentence_dedup'):
+        sentence_clusters = find_near_duplicates(list(distinct.values()), char_shingles, SENTENCE_THRESHOLD)
+    near_duplicate_sentences = sum(len(c) - 1 for c in sentence_clusters)
+
+    chars_before = sum(len(s) for s in all_sentences)
+    chars_after = sum(len(s) for s in distinct.values())
+    report = {
+        'talks_in': len(talks),
+        'talks_out': len(kept_talks),
+        'duplicate_talk_groups': duplicate_groups,
+        'sentences_in': len(all_sentences),
+        'sentences_out': len(kept_sentences),
+        'distinct_sentences_to_embed': len(distinct),
+        'near_duplicate_sentences': near_duplicate_sentences,
+        'embedding_chars_before': chars_before,
+        'embedding_chars_after': chars_after,
+        'embedding_cost_before': round(embedding_cost(chars_before), 4),
+        'embedding_cost_after': round(embedding_cost(chars_after), 4),
+    }
+
+    for key in ('talks_in', 'talks_out', 'sentences_in', 'sentences_out', 'distinct_sentences_to_embed'):
+        inst.count(key, report[key])
+
+    with open(OUTPUT_FILE, 'w', encoding='utf-8') as f:
+        json.dump(kept_talks, f, indent=2, ensure_ascii=False)
+    with open(REPORT_FILE, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+
+    saved = 1 - chars_after / chars_before if chars_before else 0
+    print(f"   Sentences: {len(all_sentences):,} → {len(kept_sentences):,} "
+          f"({len(distinct):,} distinct to embed)")
+    print(f"   Near-duplicate sentences (kept, reported only): {near_duplicate_sentences:,}")
+    print(f"   💰 Embedding cost: ${report['embedding_cost_before']:.4f} → "
+          f"${report['embedding_cost_after']:.4f} ({saved:.1%} less text)")
+
+    print(f"\n✅ Saved {len(kept_talks):,} talks to {OUTPUT_FILE}")
+    print(f"   Report: {REPORT_FILE}")
+    print(f"\nNext: python scripts/03_import_data.py")
+
+
+if __name__ == '__main__':
+    with inst.stage('dedup'):
+        main()
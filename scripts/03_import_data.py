@@ -1,53 +1,82 @@
 """
 Step 3: Import Talk Data to Supabase
 ======================================
-Reads scripts/output/talks.json, splits each talk into sentences,
+Reads the scraped talks, splits each talk into sentences,
 imports the text records to Supabase (without embeddings), and
 saves the sentence records locally for the embedding step.
 
 After this step, KEYWORD SEARCH will light up green on your site!
 Embeddings are added in the next step to enable semantic search.
 
+The import runs on several connections at once and records every
+completed batch in scripts/output/import_manifest.json. If it is
+interrupted, run it again: it resumes where it stopped, and because rows
+have deterministic ids (derived from the talk URL and sentence number)
+and are upserted, nothing is duplicated. Batch size and concurrency
+adapt to the latency and errors the database shows.
+
+With CONFERENCE_RAG_PARTITION set (see scripts/partitions.py) only that
+language/year partition is replaced; without it, only the input's
+languages (default years plus any in the input — see default_scope()).
+Other partitions are left alone.
+
 Usage:
     python scripts/03_import_data.py
+    python scripts/03_import_data.py --workers 8 --batch-size 200
+    python scripts/03_import_data.py --restart   # ignore the manifest, re-import everything
 
 Input:
-    scripts/output/talks.json  — from Step 2 (scraping)
+    scripts/output/talks_deduped.json  — from Step 2b (dedup), if present and current
+    scripts/output/talks.json          — from Step 2 (scraping) otherwise
 
 Output:
-    scripts/output/sentences.json  — sentence records with talk_id + sentence_num
+    scripts/output/sentences.json     — sentence records with talk_id + sentence_num
+    scripts/output/corpus/sentences/  — the same records as a corpus store
+                                        (random access by talk_id / sentence_num)
+    scripts/output/import_manifest.json — completed batches, for resuming
 
 Prerequisites:
     - config.public.json with Supabase URL and anon key
     - config.secret.json with Supabase service key
+      (neither is needed with CONFERENCE_RAG_BACKEND=local)
     - Database schema created (Step 1)
     - Talks scraped (Step 2)
 """
 
+import argparse
 import json
 import os
 import re
 import sys
-import time
 import uuid
 
-from supabase import create_client
 from tqdm import tqdm
 
+import instrumentation as inst
+from backends import get_backend
+from corpus_store import CorpusStore, SENTENCES_STORE
+from parallel_import import BATCH_SIZE, WORKERS, ImportManifest, fingerprint, parallel_upsert
+from partitions import DEFAULT_LANG, current_partition, default_scope, output_path, year_spans
+
 
-INPUT_FILE = os.path.join('scripts', 'output', 'talks.json')
-OUTPUT_FILE = os.path.join('scripts', 'output', 'sentences.json')
-BATCH_SIZE = 100
+SCRAPED_FILE = output_path('talks.json')
+DEDUPED_FILE = output_path('talks_deduped.json')
+OUTPUT_FILE = output_path('sentences.json')
+MANIFEST_FILE = output_path('import_manifest.json')
 
 
-def load_config():
-    with open('config.public.json', 'r') as f:
-        public_config = json.load(f)
-    with open('config.secret.json', 'r') as f:
-        secrets = json.load(f)
-    return public_config, secrets
+def choose_input_file():
+    """Use the deduplicated talks unless they are missing or older than the scrape."""
+    if os.path.exists(DEDUPED_FILE) and (
+            not os.path.exists(SCRAPED_FILE)
+            or os.path.getmtime(DEDUPED_FILE) >= os.path.getmtime(SCRAPED_FILE)):
+        return DEDUPED_FILE
+    if os.path.exists(SCRAPED_FILE):
+        print(f"⚠️  Using {SCRAPED_FILE} without dedup. Run scripts/02b_dedup_talks.py to remove duplicate talks.")
+    return SCRAPED_FILE
 
 
+@inst.profiled
 def split_into_sentences(text):
     """Split text into sentences using a simple heuristic."""
     sentences = re.split(r'\. (?=[A-Z])', text)
@@ -55,40 +84,76 @@ def split_into_sentences(text):
     return [s for s in sentences if len(s) > 20]
 
 
+def talk_uuid(url):
+    """Same talk → same talk_id on every run, so re-imports overwrite instead of duplicating."""
+    return str(uuid.uuid5(uuid.NAMESPACE_URL, url))
+
+
+def sentence_uuid(talk_id, sentence_num):
+    return str(uuid.uuid5(uuid.UUID(talk_id), str(sentence_num)))
+
+
 def main():
-    if not os.path.exists(INPUT_FILE):
-        print(f"❌ {INPUT_FILE} not found. Run scripts/02_scrape_data.py first.")
+    parser = argparse.ArgumentParser(description='Split talks into sentences and import them.')
+    parser.add_argument('--workers', type=int, default=WORKERS, help='parallel database connections')
+    parser.add_argument('--batch-size', type=int, default=BATCH_SIZE, help='initial rows per batch (auto-tuned)')
+    parser.add_argument('--restart', action='store_true', help='ignore the manifest and re-import everything')
+    args = parser.parse_args()
+
+    partition = current_partition()
+    input_file = choose_input_file()
+    if not os.path.exists(input_file):
+        print(f"❌ {input_file} not found. Run scripts/02_scrape_data.py first.")
         sys.exit(1)
 
     # Load talks
     print("=" * 60)
-    print("Importing Talk Data to Supabase")
+    print("Importing Talk Data to Supabase" + (f" (partition {partition})" if partition else ""))
     print("=" * 60)
 
-    with open(INPUT_FILE, 'r', encoding='utf-8') as f:
+    with open(input_file, 'r', encoding='utf-8') as f:
         talks = json.load(f)
     print(f"   Loaded {len(talks)} talks\n")
 
     # Split into sentence records (no embeddings yet)
     print("Splitting talks into sentences...")
     sentence_records = []
+    seen = set()
+    out_of_partition = 0
     for talk in tqdm(talks, desc="Splitting"):
-        talk_id = str(uuid.uuid4())
+        talk_id = talk_uuid(talk['url'])
+        if talk_id in seen:
+            inst.count('duplicate_urls')
+            continue
+        seen.add(talk_id)
+        year = int(talk['year']) if talk['year'] else 0
+        if partition and year not in partition.years():
+            # The partition's reload only replaces rows in its own years, so a row
+            # outside them (or with an unknown year) would never be cleaned up
+            out_of_partition += 1
+            continue
         sentences = split_into_sentences(talk['text'])
         for i, sentence in enumerate(sentences, 1):
             sentence_records.append({
+                'id': sentence_uuid(talk_id, i),
                 'talk_id': talk_id,
                 'title': talk['title'],
                 'speaker': talk['speaker'],
                 'calling': talk['calling'],
-                'year': int(talk['year']) if talk['year'] else None,
+                'year': year,
                 'season': talk['season'],
+                'lang': talk.get('lang', DEFAULT_LANG),
                 'url': talk['url'],
                 'sentence_num': i,
                 'text': sentence
                 # No 'embedding' field — added in next step
             })
 
+    inst.count('talks', len(talks))
+    if out_of_partition:
+        inst.count('talks_out_of_partition', out_of_partition)
+        print(f"   ⚠️ Skipped {out_of_partition} talk(s) with a year outside partition {partition} (or none)")
+    inst.count('sentences', len(sentence_records))
     print(f"✅ Split {len(talks)} talks into {len(sentence_records):,} sentences")
     print(f"   Average: {len(sentence_records) / len(talks):.1f} sentences per talk\n")
 
@@ -97,56 +162,92 @@ def main():
         json.dump(sentence_records, f, ensure_ascii=False)
     file_size_mb = os.path.getsize(OUTPUT_FILE) / (1024 * 1024)
     print(f"💾 Saved {len(sentence_records):,} sentences to {OUTPUT_FILE} ({file_size_mb:.1f} MB)")
+    with CorpusStore(SENTENCES_STORE) as store:
+        store.clear()
+        store.extend(sentence_records)
+    print(f"💾 Wrote corpus store {SENTENCES_STORE}/")
+
+    # Connect to the database (Supabase, or SQLite with CONFERENCE_RAG_BACKEND=local)
+    backend = get_backend()
+    manifest = ImportManifest(MANIFEST_FILE, fingerprint(sentence_records), len(sentence_records))
+    if args.restart:
+        manifest.reset()
 
-    # Connect to Supabase
-    public_config, secrets = load_config()
-    client = create_client(public_config['SUPABASE_URL'], secrets['SUPABASE_SERVICE_KEY'])
+    # Make sure every language × decade in this import has its table partition
+    for lang, (first, last) in year_spans(sentence_records).items():
+        backend.ensure_partitions(lang, first, last)
+    # The rows this run replaces
+    scope = [partition] if partition else default_scope(sentence_records)
+    scope_label = ', '.join(map(str, scope)) or 'nothing'
 
-    # Check for existing data and truncate if needed
     print("\n" + "=" * 60)
     print("Checking for existing data...")
     print("=" * 60)
 
-    try:
-        result = client.table('sentence_embeddings').select('id', count='exact').limit(1).execute()
-        existing_count = result.count or 0
-        if existing_count > 0:
-            print(f"   Found {existing_count:,} existing rows. Truncating table...")
-            client.table('sentence_embeddings').delete().neq('id', '00000000-0000-0000-0000-000000000000').execute()
-            print("   ✅ Table truncated.")
-        else:
-            print("   Table is empty — ready for import.")
-    except Exception as e:
-        print(f"   ⚠️ Could not check existing data: {e}")
-        print("   Proceeding with import anyway...")
-
-    # Import in batches
+    resume = manifest.resumed
+    if resume:
+        # The manifest only helps if the rows it lists are still there (the table may have been
+        # rebuilt since the interrupted run)
+        try:
+            existing_count = sum(backend.count('sentence_embeddings', partition=p) for p in scope)
+        except Exception as e:
+            print(f"   ⚠️ Could not check existing data: {e}")
+            existing_count = 0
+        if existing_count < manifest.completed():
+            print(f"   Manifest lists {manifest.completed():,} imported rows but the table has "
+                  f"{existing_count:,} — starting over.")
+            manifest.discard()
+            resume = False
+
+    if resume:
+        # Same input as the interrupted run: keep what's there and fill the gaps
+        print(f"   Resuming: {manifest.completed():,} of {manifest.total:,} rows already imported "
+              f"(see {MANIFEST_FILE}).")
+    else:
+        try:
+            existing_count = sum(backend.count('sentence_embeddings', partition=p) for p in scope)
+            if existing_count > 0:
+                print(f"   Found {existing_count:,} existing rows in {scope_label}. Truncating...")
+                for p in scope:
+                    backend.truncate('sentence_embeddings', partition=p)
+                print(f"   ✅ Truncated {scope_label}.")
+            else:
+                print(f"   No rows in {scope_label} — ready for import.")
+        except Exception as e:
+            print(f"   ⚠️ Could not check existing data: {e}")
+            print("   Proceeding with import anyway...")
+        manifest.reset()
+
+    # Import in parallel batches
     print("\n" + "=" * 60)
     print(f"Importing {len(sentence_records):,} records to Supabase")
     print("=" * 60)
     print("   (Text only — embeddings will be added in the next step)\n")
 
-    success = 0
-    errors = 0
-
-    for i in tqdm(range(0, len(sentence_records), BATCH_SIZE), desc="Importing"):
-        batch = sentence_records[i:i + BATCH_SIZE]
-        try:
-            client.table('sentence_embeddings').insert(batch).execute()
-            success += len(batch)
-        except Exception as e:
-            print(f"\nError at batch {i // BATCH_SIZE}: {e}")
-            errors += len(batch)
-        time.sleep(0.1)
+    with inst.span('insert_loop'):
+        result = parallel_upsert(get_backend, 'sentence_embeddings', sentence_records, manifest,
+                                 workers=args.workers, batch_size=args.batch_size,
+                                 on_conflict='id,lang,year')
+    success = manifest.completed()
+    errors = manifest.total - success
 
     print(f"\n✅ Import complete!")
-    print(f"   Success: {success:,}")
+    print(f"   Success: {success:,} ({result['rows']:,} this run, {result['seconds']:.1f}s)")
+    print(f"   Batches averaged {result['mean_batch']} rows on {result['concurrency']} connection(s)"
+          f" — {result['retries']} retried batch(es)")
     if errors:
-        print(f"   Errors:  {errors:,}")
+        print(f"   Errors:  {errors:,} — run this script again to retry just those rows")
+    else:
+        # Nothing left to resume; the next run of this input is a fresh import
+        manifest.discard()
 
     # Final verification
-    result = client.table('sentence_embeddings').select('id', count='exact').limit(1).execute()
-    print(f"\n   Total rows in database: {result.count or 0:,}")
+    total = backend.count('sentence_embeddings')
+    in_scope = sum(backend.count('sentence_embeddings', partition=p) for p in scope)
+    print(f"\n   Total rows in database: {total:,}")
+    print(f"   In {scope_label}: {in_scope:,}")
+    if total > in_scope:
+        print(f"   ({total - in_scope:,} rows of other languages/years left as they were)")
 
     print(f"\n🎉 Keyword Search is now ready!")
     print(f"   Refresh your site — the 🔍 Keyword Search panel should turn GREEN.")
@@ -154,4 +255,5 @@ def main():
 
 
 if __name__ == '__main__':
-    main()
+    with inst.stage('import'):
+        main()
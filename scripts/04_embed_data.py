@@ -7,17 +7,26 @@ for each sentence. Saves the result to scripts/output/sentences_with_embeddings.
 This is the most expensive step (~$0.60 in API costs). The output is
 saved to disk so you won't lose your work if the next step fails.
 
+Repeated sentences (quoted scriptures, boilerplate) are embedded only once:
+every copy of the same text reuses the first copy's vector.
+
+Once every sentence has a vector, a talk-level embedding (the normalized
+mean of the talk's sentence vectors) is computed for two-stage search.
+
 Usage:
     python scripts/04_embed_data.py
 
 Input:
-    scripts/output/sentences.json  — from Step 3 (import)
+    scripts/output/corpus/sentences/  — corpus store from Step 3 (import), or
+    scripts/output/sentences.json     — the same records as JSON
 
 Output:
-    scripts/output/sentences_with_embeddings.json  — sentence records with embedding vectors
+    scripts/output/corpus/sentences_with_embeddings/  — corpus store, appended batch by batch
+    scripts/output/sentences_with_embeddings.json     — the same records as one JSON array
+    scripts/output/talk_embeddings.json               — one centroid vector per talk
 
 Prerequisites:
-    - config.secret.json with OPENAI_API_KEY
+    - config.secret.json with OPENAI_API_KEY (not needed with CONFERENCE_RAG_BACKEND=local)
     - scripts/output/sentences.json from the import step
 """
 
@@ -26,28 +35,103 @@ import os
 import sys
 import time
 
-from openai import OpenAI
 from tqdm import tqdm
 
+import instrumentation as inst
+from backends import get_embedder
+from corpus_store import CorpusStore, EMBEDDINGS_STORE, SENTENCES_STORE
+from dedup import normalize
+from partitions import DEFAULT_LANG, output_path
+from retrieval import talk_centroids
 
-INPUT_FILE = os.path.join('scripts', 'output', 'sentences.json')
-OUTPUT_FILE = os.path.join('scripts', 'output', 'sentences_with_embeddings.json')
+
+INPUT_FILE = output_path('sentences.json')
+OUTPUT_FILE = output_path('sentences_with_embeddings.json')
+TALKS_OUTPUT_FILE = output_path('talk_embeddings.json')
 BATCH_SIZE = 100
 
 
-def load_secrets():
-    with open('config.secret.json', 'r') as f:
+def load_sentences():
+    """Read sentence records from the corpus store if Step 3 wrote one, else from JSON."""
+    if CorpusStore.exists(SENTENCES_STORE):
+        with CorpusStore(SENTENCES_STORE) as store:
+            return store.records()
+    with open(INPUT_FILE, 'r', encoding='utf-8') as f:
         return json.load(f)
 
 
+def write_json_array(path, records):
+    """Stream records into a JSON array without holding the whole list in memory."""
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write('[')
+        for n, record in enumerate(records):
+            if n:
+                f.write(', ')
+            json.dump(record, f, ensure_ascii=False)
+        f.write(']')
+
+
+def write_talk_embeddings(store):
+    """Centroid of each talk's sentence vectors → TALKS_OUTPUT_FILE."""
+    records = store.records(embeddings=False)
+    talk_ids, centroids = talk_centroids([r['talk_id'] for r in records], store.embedding_matrix())
+    first = {}
+    counts = {}
+    for r in records:
+        first.setdefault(r['talk_id'], r)
+        counts[r['talk_id']] = counts.get(r['talk_id'], 0) + 1
+
+    talks = []
+    for talk_id, centroid in zip(talk_ids, centroids):
+        r = first[talk_id]
+        talks.append({
+            'talk_id': talk_id,
+            'title': r['title'],
+            'speaker': r['speaker'],
+            'year': r['year'],
+            'season': r['season'],
+            'lang': r.get('lang', DEFAULT_LANG),
+            'url': r['url'],
+            'sentence_count': counts[talk_id],
+            'embedding': centroid.tolist(),
+        })
+    with open(TALKS_OUTPUT_FILE, 'w', encoding='utf-8') as f:
+        json.dump(talks, f, ensure_ascii=False)
+    return len(talks)
+
+
+def reconcile(store, records):
+    """
+    Make the store hold only current sentences: drop records whose talk is
+    gone, whose text changed under the same (talk_id, sentence_num), or
+    that repeat a key. Returns every stored vector keyed by normalized text
+    (still valid for any sentence with that text) and how many were dropped.
+    """
+    current = {(r['talk_id'], int(r['sentence_num'])): r['text'] for r in records}
+    cache = {}
+    fresh = []
+    seen = set()
+    for r in store:
+        if r.get('embedding'):
+            cache.setdefault(normalize(r['text']), r['embedding'])
+        key = (r['talk_id'], int(r['sentence_num']))
+        if current.get(key) == r['text'] and r.get('embedding') and key not in seen:
+            seen.add(key)
+            fresh.append(r)
+    dropped = len(store) - len(fresh)
+    if dropped:
+        store.clear()
+        store.extend(fresh)
+    return cache, dropped
+
+
 def main():
-    if not os.path.exists(INPUT_FILE):
+    if not os.path.exists(INPUT_FILE) and not CorpusStore.exists(SENTENCES_STORE):
         print(f"❌ {INPUT_FILE} not found. Run scripts/03_import_data.py first.")
         sys.exit(1)
 
     # Load sentences
-    with open(INPUT_FILE, 'r', encoding='utf-8') as f:
-        records = json.load(f)
+    records = load_sentences()
 
     print("=" * 60)
     print(f"Generating Embeddings for {len(records):,} Sentences")
@@ -55,75 +139,104 @@ def main():
     print(f"   Model: text-embedding-3-small (1,536 dimensions)")
     print(f"   Batch size: {BATCH_SIZE}\n")
 
-    # Check if there's a partial result we can resume from
-    already_embedded = 0
-    if os.path.exists(OUTPUT_FILE):
-        with open(OUTPUT_FILE, 'r', encoding='utf-8') as f:
-            existing = json.load(f)
-        already_embedded = len(existing)
-        if already_embedded >= len(records):
-            print(f"✅ All {len(records):,} sentences already have embeddings in {OUTPUT_FILE}")
-            print(f"   Delete {OUTPUT_FILE} to re-generate.")
-            return
-        print(f"   ⏩ Resuming from sentence {already_embedded:,} (found partial output)")
-        records_to_embed = records[already_embedded:]
-    else:
-        existing = []
-        records_to_embed = records
-
-    # Generate embeddings
-    secrets = load_secrets()
-    client = OpenAI(api_key=secrets['OPENAI_API_KEY'])
-
-    embedded_records = list(existing)  # Start from any partial results
-    errors = 0
-
-    for i in tqdm(range(0, len(records_to_embed), BATCH_SIZE), desc="Embedding"):
-        batch = records_to_embed[i:i + BATCH_SIZE]
-        batch_texts = [r['text'] for r in batch]
-
-        try:
-            response = client.embeddings.create(
-                model='text-embedding-3-small',
-                input=batch_texts
-            )
-
-            for record, item in zip(batch, response.data):
-                record_with_embedding = dict(record)
-                record_with_embedding['embedding'] = item.embedding
-                embedded_records.append(record_with_embedding)
-
-        except Exception as e:
-            print(f"\n   ❌ Batch error: {e}")
-            errors += len(batch)
+    # Every finished batch is appended to the corpus store, so a crash loses at
+    # most one batch. The store is first reconciled with the current sentences
+    # (Step 3 may have re-split a different talks.json), then exactly the
+    # sentences it lacks are embedded — by (talk_id, sentence_num) and text,
+    # so a failed batch in the middle is retried rather than shifting
+    # everything after it.
+    out_store = CorpusStore(EMBEDDINGS_STORE)
+    # Vectors already computed, keyed by normalized text (seeded from earlier runs)
+    embedding_cache, dropped = reconcile(out_store, records)
+    if dropped:
+        print(f"   🧹 Dropped {dropped:,} stored embeddings for sentences that are gone or changed")
+        inst.count('stale_dropped', dropped)
+    records_to_embed = [r for r in records if not out_store.has(r['talk_id'], r['sentence_num'])]
+    already_embedded = len(records) - len(records_to_embed)
+    if not records_to_embed:
+        print(f"✅ All {len(records):,} sentences already have embeddings in {EMBEDDINGS_STORE}")
+    elif already_embedded:
+        print(f"   ⏩ Resuming: {already_embedded:,} sentences already embedded, "
+              f"{len(records_to_embed):,} to go (found partial output)")
+
+    # Generate embeddings (OpenAI, or the offline fake embedder with CONFERENCE_RAG_BACKEND=local)
+    embedder = get_embedder() if records_to_embed else None
 
-        # Save progress every 10 batches (in case of crash)
-        if (i // BATCH_SIZE + 1) % 10 == 0:
-            with open(OUTPUT_FILE, 'w', encoding='utf-8') as f:
-                json.dump(embedded_records, f, ensure_ascii=False)
+    errors = 0
+    reused = 0
+
+    with inst.profile('embed_loop'):
+        for i in tqdm(range(0, len(records_to_embed), BATCH_SIZE), desc="Embedding"):
+            batch = records_to_embed[i:i + BATCH_SIZE]
+            # Only send texts we haven't embedded yet, each distinct text once
+            new_texts = list(dict.fromkeys(
+                normalize(r['text']) for r in batch if normalize(r['text']) not in embedding_cache
+            ))
+
+            try:
+                if new_texts:
+                    with inst.span('embed_request'):
+                        vectors = embedder.embed(new_texts)
+                    for text, vector in zip(new_texts, vectors):
+                        embedding_cache[text] = vector
+                    inst.count('api_texts', len(new_texts))
+                    inst.count('tokens_estimated', sum(len(t) for t in new_texts) // 4)
+
+                embedded_batch = []
+                for record in batch:
+                    record_with_embedding = dict(record)
+                    record_with_embedding['embedding'] = embedding_cache[normalize(record['text'])]
+                    embedded_batch.append(record_with_embedding)
+                with inst.span('store_append'):
+                    out_store.extend(embedded_batch)
+                reused += len(batch) - len(new_texts)
+                inst.count('rows', len(batch))
+                inst.count('batches')
+
+            except Exception as e:
+                print(f"\n   ❌ Batch error: {e}")
+                errors += len(batch)
+                inst.count('rows_failed', len(batch))
+                inst.event('batch_failed', batch=i // BATCH_SIZE, rows=len(batch), error=str(e))
+
+            time.sleep(embedder.request_delay)
 
-        time.sleep(0.1)
+    if errors:
+        # Leave the outputs for Step 5 alone until every sentence has a vector
+        out_store.close()
+        print(f"\n❌ {errors:,} sentences failed to embed; {len(out_store):,} of "
+              f"{len(records):,} are saved in {EMBEDDINGS_STORE}/")
+        print(f"   Run this script again to embed just the missing ones.")
+        sys.exit(1)
 
-    # Final save
-    with open(OUTPUT_FILE, 'w', encoding='utf-8') as f:
-        json.dump(embedded_records, f, ensure_ascii=False)
+    # Final save: JSON copy of the store for tools that expect a single file
+    embedded_count = len(out_store)
+    with inst.span('write_json'):
+        write_json_array(OUTPUT_FILE, out_store)
+    with inst.span('talk_centroids'):
+        talk_count = write_talk_embeddings(out_store)
+    out_store.close()
+    inst.count('reused', reused)
+    inst.count('bytes_written', os.path.getsize(OUTPUT_FILE))
 
     file_size_mb = os.path.getsize(OUTPUT_FILE) / (1024 * 1024)
     print(f"\n✅ Embedding complete!")
-    print(f"   Embedded: {len(embedded_records):,} sentences")
-    if errors:
-        print(f"   Errors:   {errors:,}")
+    print(f"   Embedded: {embedded_count:,} sentences")
+    print(f"   Talks:    {talk_count:,} talk-level embeddings → {TALKS_OUTPUT_FILE}")
+    if reused:
+        print(f"   Reused:   {reused:,} duplicate sentences (no API call)")
 
-    # Estimate cost
-    total_chars = sum(len(r['text']) for r in embedded_records)
+    # Estimate cost (distinct texts only — duplicates were never sent)
+    total_chars = sum(len(text) for text in embedding_cache)
     est_tokens = total_chars / 4  # rough estimate
     cost = (est_tokens / 1_000_000) * 0.020
     print(f"   💰 Estimated cost: ${cost:.4f}")
 
-    print(f"\n💾 Saved to {OUTPUT_FILE} ({file_size_mb:.1f} MB)")
+    print(f"\n💾 Saved to {OUTPUT_FILE} ({file_size_mb:.1f} MB) and {EMBEDDINGS_STORE}/")
     print(f"   This file is your safety net — embeddings are preserved on disk.")
     print(f"\nNext: python scripts/05_update_embeddings.py")
 
 
 if __name__ == '__main__':
-    main()
+    with inst.stage('embed'):
+        main()
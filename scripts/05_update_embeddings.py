@@ -1,9 +1,11 @@
 """
 Step 5: Import Embeddings to Database
 =========================================
-Reads scripts/output/sentences_with_embeddings.json and imports
-all records (text + embeddings) to Supabase, replacing any
-existing data.
+Reads the embedded sentence records from Step 4 and imports
+all records (text + embeddings) to Supabase, replacing the existing
+rows of the same partition (CONFERENCE_RAG_PARTITION), or of the
+input's languages when it isn't set (see default_scope() in
+scripts/partitions.py). Other partitions are left alone.
 
 After this step, SEMANTIC SEARCH will light up green on your site!
 
@@ -11,11 +13,16 @@ Usage:
     python scripts/05_update_embeddings.py
 
 Input:
-    scripts/output/sentences_with_embeddings.json  — from Step 4
+    scripts/output/corpus/sentences_with_embeddings/  — corpus store from Step 4, or
+    scripts/output/sentences_with_embeddings.json     — the same records as JSON
+    scripts/output/talk_embeddings.json               — talk centroids from Step 4
+    scripts/output/corpus/sentences/ (or sentences.json) — Step 3's current sentences;
+                                                        records not among them are skipped
 
 Prerequisites:
     - config.public.json with Supabase URL and anon key
     - config.secret.json with Supabase service key
+      (neither is needed with CONFERENCE_RAG_BACKEND=local)
     - Database schema created (Step 1)
     - Embeddings generated (Step 4)
 """
@@ -25,31 +32,62 @@ import os
 import sys
 import time
 
-from supabase import create_client
 from tqdm import tqdm
 
+import instrumentation as inst
+from backends import get_backend
+from corpus_store import CorpusStore, EMBEDDINGS_STORE, SENTENCES_STORE
+from partitions import current_partition, default_scope, output_path, year_spans
 
-INPUT_FILE = os.path.join('scripts', 'output', 'sentences_with_embeddings.json')
+
+INPUT_FILE = output_path('sentences_with_embeddings.json')
+TALKS_INPUT_FILE = output_path('talk_embeddings.json')
+SENTENCES_FILE = output_path('sentences.json')
 BATCH_SIZE = 100
 
 
-def load_config():
-    with open('config.public.json', 'r') as f:
-        public_config = json.load(f)
-    with open('config.secret.json', 'r') as f:
-        secrets = json.load(f)
-    return public_config, secrets
+def load_records():
+    """Prefer the corpus store (float32, no JSON parsing); fall back to the JSON file."""
+    if CorpusStore.exists(EMBEDDINGS_STORE):
+        with CorpusStore(EMBEDDINGS_STORE) as store:
+            return store.records()
+    with open(INPUT_FILE, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def current_sentences():
+    """(talk_id, sentence_num) → text for Step 3's latest sentences, or None if it left none."""
+    if CorpusStore.exists(SENTENCES_STORE):
+        with CorpusStore(SENTENCES_STORE) as store:
+            records = store.records(embeddings=False)
+    elif os.path.exists(SENTENCES_FILE):
+        with open(SENTENCES_FILE, 'r', encoding='utf-8') as f:
+            records = json.load(f)
+    else:
+        return None
+    return {(r['talk_id'], int(r['sentence_num'])): r['text'] for r in records}
 
 
 def main():
-    if not os.path.exists(INPUT_FILE):
+    if not os.path.exists(INPUT_FILE) and not CorpusStore.exists(EMBEDDINGS_STORE):
         print(f"❌ {INPUT_FILE} not found. Run scripts/04_embed_data.py first.")
         sys.exit(1)
 
     # Load embedded records
     print("Loading embeddings data...")
-    with open(INPUT_FILE, 'r', encoding='utf-8') as f:
-        records = json.load(f)
+    with inst.span('load_records'):
+        records = load_records()
+
+    # Only load what Step 3 produced last: embeddings for talks that have since
+    # been dropped, or for a sentence whose text changed, are stale
+    current = current_sentences()
+    if current is not None:
+        loaded = len(records)
+        records = [r for r in records if current.get((r['talk_id'], int(r['sentence_num']))) == r['text']]
+        if len(records) < loaded:
+            print(f"   ⚠️ Skipping {loaded - len(records):,} records that are not among Step 3's current sentences "
+                  f"(re-run scripts/04_embed_data.py)")
+            inst.count('stale_skipped', loaded - len(records))
 
     # Verify embeddings are present
     with_embeddings = sum(1 for r in records if r.get('embedding'))
@@ -60,24 +98,28 @@ def main():
     if without_embeddings:
         print(f"   Without embeddings: {without_embeddings:,} (will be imported without)")
 
-    # Connect to Supabase
-    public_config, secrets = load_config()
-    client = create_client(public_config['SUPABASE_URL'], secrets['SUPABASE_SERVICE_KEY'])
+    # Connect to the database (Supabase, or SQLite with CONFERENCE_RAG_BACKEND=local)
+    backend = get_backend()
+    partition = current_partition()
+    for lang, (first, last) in year_spans(records).items():
+        backend.ensure_partitions(lang, first, last)
+    scope = [partition] if partition else default_scope(records)
+    scope_label = ', '.join(map(str, scope)) or 'nothing'
 
     # Truncate existing data and re-import everything
     print("\n" + "=" * 60)
-    print("Replacing database contents (truncate + re-import)")
+    print(f"Replacing database contents (truncate + re-import) for {scope_label}")
     print("=" * 60)
 
     try:
-        result = client.table('sentence_embeddings').select('id', count='exact').limit(1).execute()
-        existing_count = result.count or 0
+        existing_count = sum(backend.count('sentence_embeddings', partition=p) for p in scope)
         if existing_count > 0:
             print(f"   Truncating {existing_count:,} existing rows...")
-            client.table('sentence_embeddings').delete().neq('id', '00000000-0000-0000-0000-000000000000').execute()
-            print("   ✅ Table truncated.")
+            for p in scope:
+                backend.truncate('sentence_embeddings', partition=p)
+            print("   ✅ Rows truncated.")
         else:
-            print("   Table is empty — ready for import.")
+            print("   No existing rows — ready for import.")
     except Exception as e:
         print(f"   ⚠️ Could not check existing data: {e}")
         print("   Proceeding with import anyway...")
@@ -88,30 +130,52 @@ def main():
     success = 0
     errors = 0
 
-    for i in tqdm(range(0, len(records), BATCH_SIZE), desc="Importing"):
-        batch = records[i:i + BATCH_SIZE]
-        try:
-            client.table('sentence_embeddings').insert(batch).execute()
-            success += len(batch)
-        except Exception as e:
-            print(f"\nError at batch {i // BATCH_SIZE}: {e}")
-            errors += len(batch)
-        time.sleep(0.1)
+    with inst.profile('insert_loop'):
+        for i in tqdm(range(0, len(records), BATCH_SIZE), desc="Importing"):
+            batch = records[i:i + BATCH_SIZE]
+            try:
+                with inst.span('insert_batch'):
+                    backend.insert('sentence_embeddings', batch)
+                success += len(batch)
+                inst.count('rows', len(batch))
+                inst.count('batches')
+            except Exception as e:
+                print(f"\nError at batch {i // BATCH_SIZE}: {e}")
+                errors += len(batch)
+                inst.count('rows_failed', len(batch))
+                inst.event('batch_failed', batch=i // BATCH_SIZE, rows=len(batch), error=str(e))
+            time.sleep(0.1)
 
     print(f"\n✅ Import complete!")
     print(f"   Success: {success:,}")
     if errors:
         print(f"   Errors:  {errors:,}")
 
-    # Verify
-    result = client.table('sentence_embeddings').select('id', count='exact').limit(1).execute()
-    total = result.count or 0
+    # Talk-level embeddings for two-stage search (replaced wholesale, like sentences)
+    if os.path.exists(TALKS_INPUT_FILE):
+        with open(TALKS_INPUT_FILE, 'r', encoding='utf-8') as f:
+            talks = json.load(f)
+        if current is not None:
+            talk_ids = {talk_id for talk_id, _ in current}
+            talks = [t for t in talks if t['talk_id'] in talk_ids]
+        print(f"\n   Importing {len(talks):,} talk-level embeddings...")
+        try:
+            for p in scope:
+                backend.truncate('talk_embeddings', partition=p)
+            for i in range(0, len(talks), BATCH_SIZE):
+                backend.insert('talk_embeddings', talks[i:i + BATCH_SIZE])
+            inst.count('talk_rows', len(talks))
+            print("   ✅ Talk embeddings imported (two-stage search enabled).")
+        except Exception as e:
+            inst.event('talk_import_failed', error=str(e))
+            print(f"   ⚠️ Could not import talk embeddings: {e}")
+            print("   Re-run scripts/01_create_schema.py to create the talk_embeddings table.")
+    else:
+        print(f"\n   ⚠️ {TALKS_INPUT_FILE} not found — skipping talk embeddings (re-run Step 4).")
 
-    embedded_result = client.table('sentence_embeddings') \
-        .select('id', count='exact') \
-        .not_('embedding', 'is', 'null') \
-        .limit(1).execute()
-    with_emb = embedded_result.count or 0
+    # Verify
+    total = backend.count('sentence_embeddings')
+    with_emb = backend.count('sentence_embeddings', not_null='embedding')
 
     print(f"\n   Total rows:          {total:,}")
     print(f"   Rows with embeddings: {with_emb:,}")
@@ -122,4 +186,5 @@ def main():
 
 
 if __name__ == '__main__':
-    main()
+    with inst.stage('load_embeddings'):
+        main()
@@ -2,7 +2,10 @@
 Step 6: Create Analytics Tables
 ================================
 Creates citation_analytics and question_analytics tables with RLS policies
-in your Supabase database.
+in your Supabase database, plus the analytics_events queue table that the
+app and Edge Functions write to. Queued events are rolled into the analytics
+tables in batches by scripts/compact_analytics.py; events it can't parse
+are moved to analytics_events_dead instead of blocking the queue.
 
 Usage:
     python scripts/06_create_analytics.py
@@ -11,33 +14,16 @@ Prerequisites:
     - config.public.json with Supabase URL and anon key
     - config.secret.json with Supabase service key, access token, and project ref
     - Supabase project created
+    (or CONFERENCE_RAG_BACKEND=local to create the offline SQLite tables instead)
 """
 
-import json
 import sys
 import time
 
-# Load configuration from both config files
-with open('config.public.json', 'r') as f:
-    public_config = json.load(f)
-with open('config.secret.json', 'r') as f:
-    secrets = json.load(f)
+from backends import get_backend
 
-SUPABASE_URL = public_config['SUPABASE_URL']
-SUPABASE_SERVICE_KEY = secrets['SUPABASE_SERVICE_KEY']
-SUPABASE_ACCESS_TOKEN = secrets['SUPABASE_ACCESS_TOKEN']
-SUPABASE_PROJECT_REF = secrets['SUPABASE_PROJECT_REF']
 
-
-def create_analytics():
-    import requests
-    from supabase import create_client
-
-    print("=" * 60)
-    print("Creating Analytics Tables")
-    print("=" * 60)
-
-    analytics_sql = """
+ANALYTICS_SQL = """
 CREATE TABLE IF NOT EXISTS citation_analytics (
     id UUID DEFAULT gen_random_uuid() PRIMARY KEY,
     search_type TEXT NOT NULL CHECK (search_type IN ('keyword', 'semantic', 'rag')),
@@ -64,29 +50,126 @@ ON citation_analytics FOR SELECT TO authenticated USING (true);
 DROP POLICY IF EXISTS "Authenticated users can read question_analytics" ON question_analytics;
 CREATE POLICY "Authenticated users can read question_analytics"
 ON question_analytics FOR SELECT TO authenticated USING (true);
+
+-- ============================================
+-- Analytics ingestion queue
+-- ============================================
+-- Requests append ONE row here (question + cited talks together) instead of
+-- writing to both analytics tables. compact_analytics_events() drains the
+-- queue in batches and fans rows out into question/citation_analytics.
+
+CREATE TABLE IF NOT EXISTS analytics_events (
+    id BIGINT GENERATED ALWAYS AS IDENTITY PRIMARY KEY,
+    search_type TEXT NOT NULL CHECK (search_type IN ('keyword', 'semantic', 'rag')),
+    question TEXT,
+    citations JSONB NOT NULL DEFAULT '[]'::jsonb,
+    created_at TIMESTAMPTZ DEFAULT now()
+);
+
+ALTER TABLE analytics_events ENABLE ROW LEVEL SECURITY;
+
+-- Signed-in users can enqueue exactly what app.js sends: a keyword search
+-- question with no citations. Semantic/RAG events and citations only come
+-- from the Edge Functions (service role, which bypasses RLS), so nobody can
+-- forge citation counts from the browser. Only the service role can read
+-- the raw queue.
+DROP POLICY IF EXISTS "Authenticated users can enqueue analytics_events" ON analytics_events;
+CREATE POLICY "Authenticated users can enqueue analytics_events"
+ON analytics_events FOR INSERT TO authenticated
+WITH CHECK (search_type = 'keyword' AND citations = '[]'::jsonb);
+
+-- Events compaction can't parse (citations that aren't an array of
+-- {talk_id, title, speaker} objects) are parked here instead of failing the
+-- whole batch — otherwise one bad row would block the queue for good.
+CREATE TABLE IF NOT EXISTS analytics_events_dead (
+    id BIGINT PRIMARY KEY,
+    search_type TEXT NOT NULL,
+    question TEXT,
+    citations JSONB,
+    created_at TIMESTAMPTZ,
+    failed_at TIMESTAMPTZ DEFAULT now()
+);
+
+ALTER TABLE analytics_events_dead ENABLE ROW LEVEL SECURITY;
+
+-- The return type gained a column; CREATE OR REPLACE can't change that
+DROP FUNCTION IF EXISTS compact_analytics_events(int);
+
+CREATE FUNCTION compact_analytics_events(batch_size int DEFAULT 5000)
+RETURNS TABLE (events bigint, questions bigint, citations bigint, dead_lettered bigint)
+LANGUAGE sql
+AS $$
+  WITH batch AS (
+    DELETE FROM analytics_events
+    WHERE id IN (
+      SELECT id FROM analytics_events
+      ORDER BY id
+      LIMIT batch_size
+      FOR UPDATE SKIP LOCKED
+    )
+    RETURNING id, search_type, question, citations, created_at,
+      -- Never hand a non-array to jsonb_array_elements; such rows are dead-lettered below
+      CASE WHEN jsonb_typeof(citations) = 'array' THEN citations ELSE '[]'::jsonb END AS cites
+  ), checked AS (
+    SELECT batch.*,
+      jsonb_typeof(citations) = 'array' AND NOT EXISTS (
+        SELECT 1 FROM jsonb_array_elements(cites) AS cite
+        WHERE jsonb_typeof(cite) <> 'object'
+           OR cite->>'talk_id' IS NULL OR cite->>'title' IS NULL OR cite->>'speaker' IS NULL
+      ) AS ok
+    FROM batch
+  ), dead AS (
+    INSERT INTO analytics_events_dead (id, search_type, question, citations, created_at)
+    SELECT id, search_type, question, citations, created_at
+    FROM checked
+    WHERE NOT ok
+    ON CONFLICT (id) DO NOTHING
+    RETURNING 1
+  ), q AS (
+    INSERT INTO question_analytics (search_type, question, created_at)
+    SELECT search_type, question, created_at
+    FROM checked
+    WHERE ok AND question IS NOT NULL
+    RETURNING 1
+  ), c AS (
+    INSERT INTO citation_analytics (search_type, talk_id, title, speaker, created_at)
+    SELECT checked.search_type, cite->>'talk_id', cite->>'title', cite->>'speaker', checked.created_at
+    FROM checked, jsonb_array_elements(checked.cites) AS cite
+    WHERE checked.ok
+    RETURNING 1
+  )
+  SELECT
+    (SELECT count(*) FROM batch),
+    (SELECT count(*) FROM q),
+    (SELECT count(*) FROM c),
+    (SELECT count(*) FROM dead);
+$$;
+
+-- Only the compactor (service role) may drain the queue
+REVOKE EXECUTE ON FUNCTION compact_analytics_events(int) FROM PUBLIC, anon, authenticated;
+GRANT EXECUTE ON FUNCTION compact_analytics_events(int) TO service_role;
 """
 
-    url = f"https://api.supabase.com/v1/projects/{SUPABASE_PROJECT_REF}/database/query"
-    headers = {
-        "Authorization": f"Bearer {SUPABASE_ACCESS_TOKEN}",
-        "Content-Type": "application/json"
-    }
 
-    resp = requests.post(url, headers=headers, json={"query": analytics_sql})
-    if resp.status_code in (200, 201):
+def create_analytics():
+    print("=" * 60)
+    print("Creating Analytics Tables")
+    print("=" * 60)
+
+    backend = get_backend()
+    try:
+        backend.apply_schema(ANALYTICS_SQL)
         print("✅ Analytics tables created successfully!")
-    else:
-        print(f"❌ Analytics table creation failed: {resp.status_code}")
-        print(resp.text[:500])
+    except Exception as e:
+        print(f"❌ Analytics table creation failed: {e}")
         return False
 
-    # Verify tables exist via PostgREST
-    client = create_client(SUPABASE_URL, SUPABASE_SERVICE_KEY)
-    for table in ('citation_analytics', 'question_analytics'):
+    # Verify tables exist (PostgREST may need a moment to see new tables)
+    for table in ('citation_analytics', 'question_analytics', 'analytics_events', 'analytics_events_dead'):
         for attempt in range(5):
             try:
-                result = client.table(table).select('id', count='exact').limit(1).execute()
-                print(f"✅ Table '{table}' verified. Current rows: {result.count or 0}")
+                rows = backend.count(table)
+                print(f"✅ Table '{table}' verified. Current rows: {rows}")
                 break
             except Exception:
                 if attempt < 4:
@@ -103,6 +186,8 @@ if __name__ == '__main__':
     if not create_analytics():
         sys.exit(1)
     print("\n✅ Analytics tables ready!")
+    print("Start the analytics compactor with:")
+    print("  python scripts/compact_analytics.py")
     print("Next: deploy edge functions with:")
     print("  supabase functions deploy embed-question --no-verify-jwt")
     print("  supabase functions deploy generate-answer --no-verify-jwt")
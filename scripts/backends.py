@@ -0,0 +1,620 @@
+"""
+Pipeline Backends
+=================
+One place that decides where the pipeline scripts store data and which
+models they call, so every step can run against live services or fully
+offline.
+
+    CONFERENCE_RAG_BACKEND=supabase  (default)
+        Supabase (PostgREST + the management API for schema SQL),
+        OpenAI text-embedding-3-small and gpt-4o.
+        Needs config.public.json and config.secret.json.
+
+    CONFERENCE_RAG_BACKEND=local
+        SQLite database at scripts/output/local.db, a deterministic
+        hashing embedder and a canned chat model. No keys, no network.
+
+The local database mirrors the Supabase tables and implements the SQL
+functions the app calls (match_sentences, match_sentences_two_stage,
+compact_analytics_events) in Python, so import, embed, load and query
+paths behave the same and can be timed repeatably. SQLite has no table
+partitions, so the local search keeps one in-memory index per language
+and year instead and probes only the ones a query asks for.
+
+These are mirrors, not the SQL: the Postgres schema and functions from
+Steps 1 and 6 never run offline, so a mistake in them will not show up
+here. SQL_FUNCTIONS declares each function's parameters, defaults and
+result columns; the local rpc() enforces them, tests/test_sql_mirrors.py
+checks them against the SQL source, and tests/test_search_sql.py runs the
+search functions on a real Postgres when one is available.
+
+Usage:
+    from backends import get_backend, get_embedder, get_chat_model
+
+    db = get_backend()
+    db.insert('sentence_embeddings', rows)
+    db.rpc('match_sentences', {'query_embedding': vector, 'match_count': 20})
+"""
+
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import uuid
+from collections import namedtuple
+from datetime import datetime, timezone
+
+import numpy as np
+
+
+BACKEND_ENV = 'CONFERENCE_RAG_BACKEND'
+LOCAL_DB_FILE = os.path.join('scripts', 'output', 'local.db')
+EMBEDDING_MODEL = 'text-embedding-3-small'
+EMBEDDING_DIM = 1536
+CHAT_MODEL = 'gpt-4o'
+ZERO_UUID = '00000000-0000-0000-0000-000000000000'
+
+# Column used to count rows and as the "delete everything" filter per table
+TABLE_KEYS = {
+    'sentence_embeddings': 'id',
+    'talk_embeddings': 'talk_id',
+    'question_analytics': 'id',
+    'citation_analytics': 'id',
+    'analytics_events': 'id',
+    'analytics_events_dead': 'id',
+    'page_views': 'id',
+}
+
+
+# The SQL functions called through rpc(): parameters in declaration order with
+# their defaults (REQUIRED if none), and the columns they return. Must match
+# scripts/01_create_schema.py and scripts/06_create_analytics.py.
+SqlFunction = namedtuple('SqlFunction', 'params returns')
+REQUIRED = object()
+SQL_FUNCTIONS = {
+    'match_sentences': SqlFunction(
+        {'query_embedding': REQUIRED, 'match_count': 20, 'langs': ['eng'], 'year_from': 0, 'year_to': 9999},
+        ('id', 'talk_id', 'title', 'speaker', 'text', 'similarity')),
+    'match_sentences_two_stage': SqlFunction(
+        {'query_embedding': REQUIRED, 'talk_count': 25, 'match_count': 20, 'langs': ['eng'],
+         'year_from': 0, 'year_to': 9999},
+        ('id', 'talk_id', 'title', 'speaker', 'url', 'text', 'similarity', 'talk_similarity')),
+    'compact_analytics_events': SqlFunction(
+        {'batch_size': 5000},
+        ('events', 'questions', 'citations', 'dead_lettered')),
+    'ensure_corpus_partitions': SqlFunction(
+        {'p_lang': REQUIRED, 'p_start_year': REQUIRED, 'p_end_year': REQUIRED},
+        ()),
+}
+
+
+class BackendError(Exception):
+    """A backend operation failed (bad response, missing table, ...)."""
+
+
+def backend_name():
+    return os.environ.get(BACKEND_ENV, 'supabase').lower()
+
+
+def load_config():
+    with open('config.public.json', 'r') as f:
+        public_config = json.load(f)
+    with open('config.secret.json', 'r') as f:
+        secrets = json.load(f)
+    return public_config, secrets
+
+
+def load_secrets():
+    with open('config.secret.json', 'r') as f:
+        return json.load(f)
+
+
+def get_backend():
+    """Database backend selected by CONFERENCE_RAG_BACKEND."""
+    name = backend_name()
+    if name == 'supabase':
+        return SupabaseBackend()
+    if name == 'local':
+        return LocalBackend()
+    raise BackendError(f"Unknown {BACKEND_ENV}={name!r} (expected 'supabase' or 'local')")
+
+
+def get_embedder():
+    return FakeEmbedder() if backend_name() == 'local' else OpenAIEmbedder()
+
+
+def get_chat_model():
+    return FakeChatModel() if backend_name() == 'local' else OpenAIChatModel()
+
+
+# ============================================
+# Supabase
+# ============================================
+
+class SupabaseBackend:
+    name = 'supabase'
+
+    def __init__(self):
+        from supabase import create_client
+
+        public_config, self.secrets = load_config()
+        self.client = create_client(public_config['SUPABASE_URL'], self.secrets['SUPABASE_SERVICE_KEY'])
+
+    def apply_schema(self, sql):
+        """Run schema SQL through the Supabase management API."""
+        import requests
+
+        url = f"https://api.supabase.com/v1/projects/{self.secrets['SUPABASE_PROJECT_REF']}/database/query"
+        headers = {
+            "Authorization": f"Bearer {self.secrets['SUPABASE_ACCESS_TOKEN']}",
+            "Content-Type": "application/json"
+        }
+        resp = requests.post(url, headers=headers, json={"query": sql})
+        if resp.status_code not in (200, 201):
+            raise BackendError(f"{resp.status_code}: {resp.text[:500]}")
+
+    def count(self, table, not_null=None, partition=None):
+        query = self.client.table(table).select(TABLE_KEYS.get(table, 'id'), count='exact', head=True)
+        if not_null:
+            query = query.not_(not_null, 'is', 'null')
+        if partition:
+            query = self._in_partition(query, partition)
+        return query.execute().count or 0
+
+    def truncate(self, table, partition=None):
+        """Delete every row, or only the rows of one partition (see scripts/partitions.py)."""
+        key = TABLE_KEYS.get(table, 'id')
+        query = self.client.table(table).delete().neq(key, ZERO_UUID)
+        if partition:
+            query = self._in_partition(query, partition)
+        query.execute()
+
+    @staticmethod
+    def _in_partition(query, partition):
+        return query.eq('lang', partition.lang).gte('year', partition.start_year).lte('year', partition.end_year)
+
+    def ensure_partitions(self, lang, start_year, end_year):
+        """Create the table partitions (and their vector indexes) for a language and years."""
+        self.rpc('ensure_corpus_partitions',
+                 {'p_lang': lang, 'p_start_year': start_year, 'p_end_year': end_year})
+
+    def insert(self, table, rows):
+        self.client.table(table).insert(rows).execute()
+
+    def upsert(self, table, rows, on_conflict='id'):
+        self.client.table(table).upsert(rows, on_conflict=on_conflict).execute()
+
+    def rpc(self, name, params):
+        return self.client.rpc(name, params).execute().data
+
+    def keyword_search(self, query, limit=20, langs=None):
+        request = self.client.table('sentence_embeddings') \
+            .select('text, talk_id, title, speaker, url') \
+            .ilike('text', f'%{query}%')
+        if langs:
+            request = request.in_('lang', list(langs))
+        return request.limit(limit).execute().data
+
+    def talk_sentences(self, talk_ids):
+        return self.client.table('sentence_embeddings') \
+            .select('talk_id, sentence_num, text') \
+            .in_('talk_id', list(talk_ids)) \
+            .order('talk_id').order('sentence_num') \
+            .execute().data
+
+
+# ============================================
+# Local (SQLite)
+# ============================================
+
+LOCAL_SCHEMA = """
+CREATE TABLE IF NOT EXISTS sentence_embeddings (
+    id TEXT PRIMARY KEY,
+    talk_id TEXT NOT NULL,
+    title TEXT NOT NULL,
+    speaker TEXT,
+    calling TEXT,
+    year INTEGER,
+    season TEXT,
+    lang TEXT NOT NULL DEFAULT 'eng',
+    url TEXT,
+    sentence_num INTEGER,
+    text TEXT NOT NULL,
+    embedding BLOB,
+    created_at TEXT
+);
+CREATE INDEX IF NOT EXISTS sentence_embeddings_talk_id_idx ON sentence_embeddings(talk_id);
+CREATE INDEX IF NOT EXISTS sentence_embeddings_partition_idx ON sentence_embeddings(lang, year);
+-- Same conflict target as the partitioned Postgres primary key
+CREATE UNIQUE INDEX IF NOT EXISTS sentence_embeddings_partition_key ON sentence_embeddings(id, lang, year);
+
+CREATE TABLE IF NOT EXISTS talk_embeddings (
+    talk_id TEXT PRIMARY KEY,
+    title TEXT NOT NULL,
+    speaker TEXT,
+    year INTEGER,
+    season TEXT,
+    lang TEXT NOT NULL DEFAULT 'eng',
+    url TEXT,
+    sentence_count INTEGER,
+    embedding BLOB,
+    created_at TEXT
+);
+
+CREATE TABLE IF NOT EXISTS page_views (
+    id TEXT PRIMARY KEY,
+    visited_at TEXT,
+    page_url TEXT,
+    user_agent TEXT
+);
+
+CREATE TABLE IF NOT EXISTS citation_analytics (
+    id TEXT PRIMARY KEY,
+    search_type TEXT NOT NULL CHECK (search_type IN ('keyword', 'semantic', 'rag')),
+    talk_id TEXT NOT NULL,
+    title TEXT NOT NULL,
+    speaker TEXT NOT NULL,
+    created_at TEXT
+);
+
+CREATE TABLE IF NOT EXISTS question_analytics (
+    id TEXT PRIMARY KEY,
+    search_type TEXT NOT NULL CHECK (search_type IN ('keyword', 'semantic', 'rag')),
+    question TEXT NOT NULL,
+    created_at TEXT
+);
+
+CREATE TABLE IF NOT EXISTS analytics_events (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    search_type TEXT NOT NULL CHECK (search_type IN ('keyword', 'semantic', 'rag')),
+    question TEXT,
+    citations TEXT NOT NULL DEFAULT '[]',
+    created_at TEXT
+);
+
+CREATE TABLE IF NOT EXISTS analytics_events_dead (
+    id INTEGER PRIMARY KEY,
+    search_type TEXT NOT NULL,
+    question TEXT,
+    citations TEXT,
+    created_at TEXT,
+    failed_at TEXT
+);
+"""
+
+_VECTOR_COLUMNS = {'embedding'}
+_PARTITIONED_TABLES = ('sentence_embeddings', 'talk_embeddings')
+
+
+def _now():
+    return datetime.now(timezone.utc).isoformat()
+
+
+def _parse_citations(raw):
+    """A queued event's citations, or None if they aren't a list of complete citation objects."""
+    try:
+        cites = json.loads(raw) if raw else []
+    except (TypeError, ValueError):
+        return None
+    if not isinstance(cites, list):
+        return None
+    for c in cites:
+        if not isinstance(c, dict) or any(c.get(k) is None for k in ('talk_id', 'title', 'speaker')):
+            return None
+    return cites
+
+
+class LocalBackend:
+    """SQLite stand-in for Supabase. Vectors are stored as float32 blobs."""
+
+    name = 'local'
+
+    def __init__(self, path=LOCAL_DB_FILE):
+        self.path = path
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        self.conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self.conn.row_factory = sqlite3.Row
+        # WAL lets one connection per import worker write without blocking readers
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.lock = threading.Lock()
+        self._engines = {}       # (lang, year) → LocalSearchEngine, loaded on first use
+        self._partitions = None  # (lang, year) pairs that have embeddings
+
+    def _tables(self):
+        rows = self.conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'").fetchall()
+        return {r['name'] for r in rows}
+
+    def _check_table(self, table):
+        if table not in self._tables():
+            raise BackendError(f"relation \"{table}\" does not exist — run scripts/01_create_schema.py")
+
+    def apply_schema(self, sql):
+        """
+        Postgres SQL can't run on SQLite, so `sql` is ignored — not even
+        parsed; errors in it only surface against Supabase. Creates the
+        mirrored local tables (LOCAL_SCHEMA) instead.
+        """
+        with self.lock:
+            # Databases from before partitioning lack the lang column
+            existing = self._tables()
+            for table in _PARTITIONED_TABLES:
+                columns = {r['name'] for r in self.conn.execute(f"PRAGMA table_info({table})")}
+                if table in existing and 'lang' not in columns:
+                    self.conn.execute(f"ALTER TABLE {table} ADD COLUMN lang TEXT NOT NULL DEFAULT 'eng'")
+            self.conn.executescript(LOCAL_SCHEMA)
+            self.conn.commit()
+
+    @staticmethod
+    def _where(not_null=None, partition=None):
+        clauses, params = [], []
+        if not_null:
+            clauses.append(f"{not_null} IS NOT NULL")
+        if partition:
+            clauses.append("lang = ? AND year BETWEEN ? AND ?")
+            params += [partition.lang, partition.start_year, partition.end_year]
+        return (" WHERE " + " AND ".join(clauses) if clauses else ""), params
+
+    def count(self, table, not_null=None, partition=None):
+        self._check_table(table)
+        where, params = self._where(not_null, partition)
+        return self.conn.execute(f"SELECT count(*) FROM {table}{where}", params).fetchone()[0]
+
+    def truncate(self, table, partition=None):
+        """Delete every row, or only the rows of one partition (see scripts/partitions.py)."""
+        self._check_table(table)
+        where, params = self._where(partition=partition)
+        with self.lock:
+            self.conn.execute(f"DELETE FROM {table}{where}", params)
+            self.conn.commit()
+            self._reset_search()
+
+    def ensure_partitions(self, lang, start_year, end_year):
+        """Nothing to create: SQLite tables aren't partitioned (search is, in memory)."""
+
+    def _reset_search(self):
+        self._engines = {}
+        self._partitions = None
+
+    def insert(self, table, rows):
+        self._write(table, rows)
+
+    def upsert(self, table, rows, on_conflict='id'):
+        """Insert, or overwrite the row with the same on_conflict key."""
+        self._write(table, rows, on_conflict)
+
+    def _write(self, table, rows, on_conflict=None):
+        if isinstance(rows, dict):
+            rows = [rows]
+        if not rows:
+            return
+        self._check_table(table)
+        # Rows missing a column get the column default, so group by column set
+        groups = {}
+        for row in rows:
+            groups.setdefault(tuple(row), []).append(row)
+
+        with self.lock:
+            try:
+                for keys, group in groups.items():
+                    columns, values = self._prepare(table, list(keys), group)
+                    placeholders = ', '.join('?' for _ in columns)
+                    sql = f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({placeholders})"
+                    if on_conflict:
+                        keys = {k.strip() for k in on_conflict.split(',')}
+                        updates = ', '.join(f"{c} = excluded.{c}" for c in columns
+                                            if c not in keys and c != 'created_at')
+                        sql += f" ON CONFLICT({on_conflict}) DO UPDATE SET {updates}"
+                    self.conn.executemany(sql, values)
+                self.conn.commit()
+            except sqlite3.Error as e:
+                self.conn.rollback()
+                raise BackendError(str(e)) from e
+            if table == 'sentence_embeddings':
+                self._reset_search()
+
+    def _prepare(self, table, columns, rows):
+        """Fill generated ids/timestamps and encode vectors + JSON for SQLite."""
+        if TABLE_KEYS.get(table) == 'id' and table != 'analytics_events' and 'id' not in columns:
+            columns.insert(0, 'id')
+        if table != 'page_views' and 'created_at' not in columns:
+            columns.append('created_at')
+
+        values = []
+        for row in rows:
+            record = []
+            for column in columns:
+                value = row.get(column)
+                if column == 'id' and value is None:
+                    value = str(uuid.uuid4())
+                elif column == 'created_at' and value is None:
+                    value = _now()
+                elif column in _VECTOR_COLUMNS and value is not None:
+                    value = np.asarray(value, dtype='<f4').tobytes()
+                elif isinstance(value, (list, dict)):
+                    value = json.dumps(value, ensure_ascii=False)
+                record.append(value)
+            values.append(record)
+        return columns, values
+
+    # ---------- SQL functions ----------
+
+    def _search_engines(self, langs, year_from, year_to):
+        """Engines for the (lang, year) partitions in range; others are never loaded or scored."""
+        from retrieval import LocalSearchEngine
+
+        if self._partitions is None:
+            self._partitions = [tuple(r) for r in self.conn.execute(
+                "SELECT DISTINCT lang, COALESCE(year, 0) FROM sentence_embeddings WHERE embedding IS NOT NULL")]
+        engines = []
+        for lang, year in sorted(self._partitions):
+            if lang not in langs or not year_from <= year <= year_to:
+                continue
+            if (lang, year) not in self._engines:
+                rows = self.conn.execute(
+                    "SELECT id, talk_id, title, speaker, url, text, embedding FROM sentence_embeddings "
+                    "WHERE embedding IS NOT NULL AND lang = ? AND COALESCE(year, 0) = ? "
+                    "ORDER BY talk_id, sentence_num", (lang, year)
+                ).fetchall()
+                records = [{k: r[k] for k in ('id', 'talk_id', 'title', 'speaker', 'url', 'text')} for r in rows]
+                matrix = np.array([np.frombuffer(r['embedding'], dtype='<f4') for r in rows], dtype=np.float32)
+                self._engines[(lang, year)] = LocalSearchEngine(records, matrix.reshape(len(rows), -1))
+            engines.append(self._engines[(lang, year)])
+        return engines
+
+    def rpc(self, name, params):
+        """Python mirrors of the SQL functions, called as PostgREST would (see SQL_FUNCTIONS)."""
+        args = self._rpc_args(name, params)
+        if name in ('match_sentences', 'match_sentences_two_stage'):
+            from retrieval import search_partitions
+
+            engines = self._search_engines(args['langs'], args['year_from'], args['year_to'])
+            rows = search_partitions(engines, args['query_embedding'], args['match_count'], args.get('talk_count'))
+            columns = SQL_FUNCTIONS[name].returns
+            return [{c: row.get(c) for c in columns} for row in rows]
+        if name == 'compact_analytics_events':
+            return [self._compact_analytics_events(args['batch_size'])]
+        if name == 'ensure_corpus_partitions':
+            return self.ensure_partitions(args['p_lang'], args['p_start_year'], args['p_end_year'])
+        raise BackendError(f"function {name} does not exist")
+
+    @staticmethod
+    def _rpc_args(name, params):
+        """The call's arguments with defaults filled in; unknown or missing ones fail like PostgREST."""
+        function = SQL_FUNCTIONS.get(name)
+        given = set(params)
+        if function is None or not given <= set(function.params) or any(
+                default is REQUIRED and p not in given for p, default in function.params.items()):
+            raise BackendError(f"function {name}({', '.join(sorted(given))}) does not exist")
+        return {p: params.get(p, default) for p, default in function.params.items()}
+
+    def _compact_analytics_events(self, batch_size):
+        """Same effect as the SQL function: move a batch of queued events, atomically."""
+        with self.lock:
+            events = self.conn.execute(
+                "SELECT id, search_type, question, citations, created_at FROM analytics_events "
+                "ORDER BY id LIMIT ?", (batch_size,)
+            ).fetchall()
+            parsed = [(e, _parse_citations(e['citations'])) for e in events]
+            dead = [(e['id'], e['search_type'], e['question'], e['citations'], e['created_at'], _now())
+                    for e, cites in parsed if cites is None]
+            good = [(e, cites) for e, cites in parsed if cites is not None]
+            questions = [(str(uuid.uuid4()), e['search_type'], e['question'], e['created_at'])
+                         for e, _ in good if e['question'] is not None]
+            citations = [(str(uuid.uuid4()), e['search_type'], c['talk_id'], c['title'],
+                          c['speaker'], e['created_at'])
+                         for e, cites in good for c in cites]
+            self.conn.executemany(
+                "INSERT OR IGNORE INTO analytics_events_dead "
+                "(id, search_type, question, citations, created_at, failed_at) VALUES (?, ?, ?, ?, ?, ?)",
+                dead)
+            self.conn.executemany(
+                "INSERT INTO question_analytics (id, search_type, question, created_at) VALUES (?, ?, ?, ?)",
+                questions)
+            self.conn.executemany(
+                "INSERT INTO citation_analytics (id, search_type, talk_id, title, speaker, created_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)", citations)
+            self.conn.executemany("DELETE FROM analytics_events WHERE id = ?", [(e['id'],) for e in events])
+            self.conn.commit()
+        return {'events': len(events), 'questions': len(questions), 'citations': len(citations),
+                'dead_lettered': len(dead)}
+
+    # ---------- app query paths ----------
+
+    def keyword_search(self, query, limit=20, langs=None):
+        escaped = re.sub(r'([%_\\])', r'\\\1', query)
+        langs = list(langs or [])
+        lang_filter = f" AND lang IN ({', '.join('?' for _ in langs)})" if langs else ""
+        rows = self.conn.execute(
+            "SELECT text, talk_id, title, speaker, url FROM sentence_embeddings "
+            f"WHERE text LIKE ? ESCAPE '\\'{lang_filter} LIMIT ?", (f'%{escaped}%', *langs, limit)
+        ).fetchall()
+        return [dict(r) for r in rows]
+
+    def talk_sentences(self, talk_ids):
+        talk_ids = list(talk_ids)
+        if not talk_ids:
+            return []
+        placeholders = ', '.join('?' for _ in talk_ids)
+        rows = self.conn.execute(
+            f"SELECT talk_id, sentence_num, text FROM sentence_embeddings "
+            f"WHERE talk_id IN ({placeholders}) ORDER BY talk_id, sentence_num", talk_ids
+        ).fetchall()
+        return [dict(r) for r in rows]
+
+
+# ============================================
+# Models
+# ============================================
+
+class OpenAIEmbedder:
+    model = EMBEDDING_MODEL
+    request_delay = 0.1  # seconds between batches, to stay under the rate limit
+
+    def __init__(self):
+        from openai import OpenAI
+
+        self.client = OpenAI(api_key=load_secrets()['OPENAI_API_KEY'])
+
+    def embed(self, texts):
+        response = self.client.embeddings.create(model=self.model, input=list(texts))
+        return [item.embedding for item in response.data]
+
+
+class FakeEmbedder:
+    """
+    Deterministic offline embedder: hashed bag of words, L2-normalized.
+
+    Texts that share words get similar vectors, so semantic search over
+    the local backend returns plausible neighbours — good enough to
+    exercise the pipeline, not a stand-in for retrieval quality.
+    """
+
+    model = 'fake-hashing-embedder'
+    request_delay = 0
+
+    def __init__(self, dim=EMBEDDING_DIM):
+        self.dim = dim
+
+    def _vector(self, text):
+        vector = np.zeros(self.dim, dtype=np.float32)
+        for word in re.findall(r"\w+", text.lower()):
+            digest = hashlib.blake2b(word.encode('utf-8'), digest_size=8).digest()
+            slot = int.from_bytes(digest[:4], 'little') % self.dim
+            vector[slot] += 1.0 if digest[4] & 1 else -1.0
+        norm = np.linalg.norm(vector)
+        return (vector / norm if norm else vector).tolist()
+
+    def embed(self, texts):
+        return [self._vector(t) for t in texts]
+
+
+class OpenAIChatModel:
+    model = CHAT_MODEL
+
+    def __init__(self):
+        from openai import OpenAI
+
+        self.client = OpenAI(api_key=load_secrets()['OPENAI_API_KEY'])
+
+    def complete(self, prompt, max_tokens=1000):
+        response = self.client.chat.completions.create(
+            model=self.model,
+            messages=[{'role': 'user', 'content': prompt}],
+            max_tokens=max_tokens,
+        )
+        return response.choices[0].message.content
+
+
+class FakeChatModel:
+    """Canned offline answer that cites the talks found in the prompt."""
+
+    model = 'fake-chat-model'
+
+    def complete(self, prompt, max_tokens=1000):
+        question = re.search(r'^Question: (.*)$', prompt, re.MULTILINE)
+        talks = re.findall(r'^Talk \d+: "(.*)" by (.*)$', prompt, re.MULTILINE)
+        cited = '; '.join(f'"{title}" by {speaker}' for title, speaker in talks) or 'no talks'
+        return (f"[offline answer] {question.group(1) if question else ''}\n"
+                f"Sources: {cited}")
@@ -0,0 +1,279 @@
+"""
+Analytics Ingestion Benchmark
+=============================
+Compares the old per-request analytics writes with the buffered queue
+under concurrent load, running the shipped write path against the local
+backend (SQLite): real inserts through LocalBackend, a Python port of the
+Edge Function buffer (supabase/functions/_shared/analytics.ts) and the
+real compactor (compact_analytics.compact_once → compact_analytics_events)
+running alongside the requests.
+
+  before — every request inserts its own question_analytics row and its
+           citation_analytics rows before returning (embed-question:
+           1 write, generate-answer: 2 writes)
+  after  — every request enqueues its event; the buffer writes
+           analytics_events in one insert per FLUSH_SIZE events (or every
+           FLUSH_INTERVAL_MS) in the background, and the compactor fans
+           the queue out into the analytics tables
+
+--clients threads issue the requests at once, like concurrent invocations
+of one Edge Function isolate. SQLite is a local file, so every database
+call first waits --rtt-ms, the round trip to a hosted Postgres, outside
+the database lock (concurrent calls overlap, as they would over the
+network). Counted on both paths:
+
+  round trips    — calls that reach the database (inserts and RPCs)
+  transactions   — COMMITs SQLite executed
+  row statements — INSERT/DELETE statements SQLite executed, one per row
+                   (the queue costs an extra insert and delete per event)
+
+Request-path latency is the analytics work a request waits for. Total
+time runs until every event has reached the analytics tables. Both runs
+must leave identical analytics tables, which the benchmark checks.
+
+Usage:
+    python scripts/bench_analytics.py
+    python scripts/bench_analytics.py --requests 5000 --clients 32 --rtt-ms 40
+"""
+
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from backends import LocalBackend
+from compact_analytics import BATCH_SIZE, compact_once
+
+
+FLUSH_SIZE = 50              # ANALYTICS_FLUSH_SIZE default in analytics.ts
+FLUSH_INTERVAL_MS = 2000     # ANALYTICS_FLUSH_INTERVAL_MS default in analytics.ts
+RAG_FRACTION = 0.5           # share of requests that are generate-answer calls
+COMPACT_POLL = 0.05          # seconds between compactor passes while requests run
+
+
+class RemoteBackend:
+    """LocalBackend behind a simulated network: each call waits one round trip and is counted."""
+
+    def __init__(self, backend, rtt):
+        self.backend = backend
+        self.rtt = rtt
+        self.lock = threading.Lock()
+        self.round_trips = 0
+
+    def _round_trip(self):
+        with self.lock:
+            self.round_trips += 1
+        time.sleep(self.rtt)
+
+    def insert(self, table, rows):
+        self._round_trip()
+        self.backend.insert(table, rows)
+
+    def rpc(self, name, params):
+        self._round_trip()
+        return self.backend.rpc(name, params)
+
+
+class StatementCounter:
+    """Counts what SQLite actually executes on a connection (via its trace callback)."""
+
+    def __init__(self, conn):
+        self.transactions = 0
+        self.row_statements = 0
+        conn.set_trace_callback(self._trace)
+
+    def _trace(self, statement):
+        verb = statement.lstrip().split(None, 1)[0].upper() if statement.strip() else ''
+        if verb == 'COMMIT':
+            self.transactions += 1
+        elif verb in ('INSERT', 'DELETE', 'UPDATE'):
+            self.row_statements += 1
+
+
+class AnalyticsBuffer:
+    """
+    Port of analytics.ts: events are queued in memory and written in one
+    batched insert once FLUSH_SIZE are waiting or the oldest has waited
+    FLUSH_INTERVAL_MS. Flushes run in the background (EdgeRuntime.waitUntil
+    there, a thread pool here) and never raise into the request.
+    """
+
+    def __init__(self, backend, flush_size=FLUSH_SIZE, flush_interval=FLUSH_INTERVAL_MS / 1000):
+        self.backend = backend
+        self.flush_size = flush_size
+        self.flush_interval = flush_interval
+        self.lock = threading.Lock()
+        self.buffer = []
+        self.timer = None
+        self.background = ThreadPoolExecutor(max_workers=8)
+        self.failures = 0
+
+    def enqueue(self, event):
+        with self.lock:
+            self.buffer.append({'search_type': event['search_type'], 'question': event['question'],
+                                'citations': event['citations']})
+            if len(self.buffer) >= self.flush_size:
+                rows = self._take()
+            else:
+                rows = None
+                if self.timer is None:
+                    self.timer = threading.Timer(self.flush_interval, self._timer_flush)
+                    self.timer.daemon = True
+                    self.timer.start()
+        if rows:
+            self.background.submit(self._write, rows)
+
+    def _take(self):
+        # A size-triggered flush supersedes the pending timer
+        if self.timer is not None:
+            self.timer.cancel()
+            self.timer = None
+        rows, self.buffer = self.buffer, []
+        return rows
+
+    def _timer_flush(self):
+        with self.lock:
+            self.timer = None
+            rows, self.buffer = self.buffer, []
+        if rows:
+            self._write(rows)
+
+    def _write(self, rows):
+        try:
+            self.backend.insert('analytics_events', rows)
+        except Exception:
+            self.failures += 1
+
+    def close(self):
+        """Drain what's left (the isolate's beforeunload) and wait for background flushes."""
+        with self.lock:
+            rows = self._take()
+        if rows:
+            self.background.submit(self._write, rows)
+        self.background.shutdown(wait=True)
+
+
+def make_event(rng, i):
+    if rng.random() < RAG_FRACTION:
+        citations = [{'talk_id': str(rng.randrange(500)), 'title': f'Talk {i}', 'speaker': 'Speaker'}
+                     for _ in range(3)]
+        return {'search_type': 'rag', 'question': f'question {i}', 'citations': citations}
+    return {'search_type': 'semantic', 'question': f'question {i}', 'citations': []}
+
+
+def open_backend(workdir, name):
+    backend = LocalBackend(os.path.join(workdir, f'{name}.db'))
+    backend.apply_schema('')
+    return backend
+
+
+def timed(work, events, clients):
+    """Run work(event) for every event from `clients` threads; returns per-request seconds."""
+    def one(event):
+        start = time.perf_counter()
+        work(event)
+        return time.perf_counter() - start
+    with ThreadPoolExecutor(max_workers=clients) as pool:
+        return list(pool.map(one, events))
+
+
+def run_before(remote, events, clients):
+    """Per-request writes on the request path."""
+    def request(event):
+        remote.insert('question_analytics', [{'search_type': event['search_type'], 'question': event['question']}])
+        if event['citations']:
+            remote.insert('citation_analytics', [dict(c, search_type=event['search_type'])
+                                                 for c in event['citations']])
+    return timed(request, events, clients)
+
+
+def run_after(remote, events, clients, flush_interval):
+    """Enqueue on the request path; buffer flushes and the compactor run concurrently."""
+    buffer = AnalyticsBuffer(remote, flush_interval=flush_interval)
+    done = threading.Event()
+    totals = {'events': 0, 'passes': 0}
+
+    def compactor():
+        while True:
+            finished = done.is_set()
+            moved = compact_once(remote, BATCH_SIZE)['events']
+            totals['events'] += moved
+            totals['passes'] += 1
+            if finished and not moved:
+                return
+            if not moved:
+                time.sleep(COMPACT_POLL)
+
+    worker = threading.Thread(target=compactor)
+    worker.start()
+    latencies = timed(buffer.enqueue, events, clients)
+    buffer.close()
+    done.set()
+    worker.join()
+    return latencies, totals, buffer.failures
+
+
+def table_counts(backend):
+    return {t: backend.count(t) for t in ('question_analytics', 'citation_analytics', 'analytics_events')}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark analytics ingestion on the local backend.')
+    parser.add_argument('--requests', type=int, default=2000)
+    parser.add_argument('--clients', type=int, default=16, help='concurrent requests')
+    parser.add_argument('--rtt-ms', type=float, default=10, help='simulated database round trip')
+    parser.add_argument('--flush-interval-ms', type=float, default=FLUSH_INTERVAL_MS)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    events = [make_event(rng, i) for i in range(args.requests)]
+    workdir = tempfile.mkdtemp(prefix='bench-analytics-')
+
+    print("=" * 60)
+    print(f"Analytics Ingestion Benchmark ({args.requests:,} requests, {args.clients} concurrent)")
+    print("=" * 60)
+    print(f"   Local backend + {args.rtt_ms:g} ms simulated round trip; queue flush every {FLUSH_SIZE} events "
+          f"or {args.flush_interval_ms:g} ms\n")
+
+    before_db, after_db = open_backend(workdir, 'before'), open_backend(workdir, 'after')
+    results = {}
+
+    remote = RemoteBackend(before_db, args.rtt_ms / 1000)
+    statements = StatementCounter(before_db.conn)
+    start = time.perf_counter()
+    latencies = run_before(remote, events, args.clients)
+    results['before'] = (latencies, remote.round_trips, statements, time.perf_counter() - start)
+
+    remote = RemoteBackend(after_db, args.rtt_ms / 1000)
+    statements = StatementCounter(after_db.conn)
+    start = time.perf_counter()
+    latencies, compacted, failures = run_after(remote, events, args.clients, args.flush_interval_ms / 1000)
+    results['after'] = (latencies, remote.round_trips, statements, time.perf_counter() - start)
+
+    print(f"   {'':8}{'p50 ms':>9}{'p95 ms':>9}{'round trips':>13}{'transactions':>14}"
+          f"{'row stmts':>11}{'total s':>9}")
+    for name, (latencies, round_trips, statements, total) in results.items():
+        ms = sorted(l * 1000 for l in latencies)
+        print(f"   {name:8}{statistics.median(ms):>9.3f}{ms[int(len(ms) * 0.95) - 1]:>9.3f}{round_trips:>13,}"
+              f"{statements.transactions:>14,}{statements.row_statements:>11,}{total:>9.2f}")
+    print(f"\n   (latency = analytics work on the request path; 'after' compacted {compacted['events']:,} "
+          f"events in {compacted['passes']:,} passes alongside the requests)")
+    if failures:
+        print(f"   ⚠️ {failures} buffer flush(es) failed")
+
+    before_counts, after_counts = table_counts(before_db), table_counts(after_db)
+    ok = before_counts == after_counts and not failures
+    print(f"\n   {'✅' if ok else '❌'} Analytics tables match: "
+          f"{after_counts['question_analytics']:,} questions, {after_counts['citation_analytics']:,} citations, "
+          f"{after_counts['analytics_events']:,} left in the queue")
+    return 0 if ok else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,147 @@
+"""
+Corpus Store Benchmark
+======================
+Compares the corpus store (scripts/corpus_store.py) with the JSON files the
+pipeline used to pass between steps: load time and peak RSS for opening the
+corpus, fetching one talk's sentences in order, and scanning every record.
+
+Each measurement runs in a fresh Python process so peak RSS is not polluted
+by earlier runs. Synthetic sentence records are generated with the same
+shape as sentences_with_embeddings.json; pass --json/--store to benchmark
+your real Step 4 output instead.
+
+Usage:
+    python scripts/bench_corpus_store.py
+    python scripts/bench_corpus_store.py --talks 400 --sentences-per-talk 60 --dim 1536
+    python scripts/bench_corpus_store.py --json scripts/output/sentences_with_embeddings.json \\
+        --store scripts/output/corpus/sentences_with_embeddings
+"""
+
+import argparse
+import json
+import os
+import random
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+
+from corpus_store import CorpusStore
+
+
+CASES = [
+    ('open', 'load / open the corpus'),
+    ('talk', 'one talk, ordered'),
+    ('scan', 'iterate every record'),
+]
+
+
+def peak_rss_mb():
+    # ru_maxrss survives fork+exec on Linux (it would include the parent's
+    # generated data), so prefer the per-process high-water mark when present
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KiB, macOS reports bytes
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+
+def generate(json_path, store_path, talks, per_talk, dim, seed=0):
+    rng = random.Random(seed)
+    records = []
+    for t in range(talks):
+        talk_id = str(uuid.uuid4())
+        for n in range(1, per_talk + 1):
+            records.append({
+                'talk_id': talk_id, 'title': f'Talk {t}', 'speaker': 'Speaker', 'calling': '',
+                'year': 2020 + t % 5, 'season': 'April', 'url': f'https://example.org/{t}',
+                'sentence_num': n, 'text': f'Sentence {n} of talk {t} about faith and hope.',
+                'embedding': [rng.uniform(-0.1, 0.1) for _ in range(dim)],
+            })
+    with open(json_path, 'w', encoding='utf-8') as f:
+        json.dump(records, f, ensure_ascii=False)
+    with CorpusStore(store_path) as store:
+        store.clear()
+        store.extend(records)
+    return records[len(records) // 2]['talk_id']
+
+
+def child(kind, case, path, talk_id):
+    """Runs inside the subprocess; prints one JSON line of results."""
+    start = time.perf_counter()
+    if kind == 'json':
+        with open(path, 'r', encoding='utf-8') as f:
+            records = json.load(f)
+        if case == 'talk':
+            found = sorted((r for r in records if r['talk_id'] == talk_id), key=lambda r: r['sentence_num'])
+        elif case == 'scan':
+            found = sum(len(r['text']) for r in records)
+    else:
+        store = CorpusStore(path)
+        if case == 'talk':
+            found = store.talk(talk_id)
+        elif case == 'scan':
+            found = sum(len(r['text']) for r in store)
+    elapsed = time.perf_counter() - start
+    print(json.dumps({'seconds': elapsed, 'rss_mb': peak_rss_mb()}))
+
+
+def measure(kind, case, path, talk_id):
+    out = subprocess.run(
+        [sys.executable, __file__, '--child', kind, case, path, talk_id],
+        check=True, capture_output=True, text=True,
+    )
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the corpus store against JSON files.')
+    parser.add_argument('--talks', type=int, default=200)
+    parser.add_argument('--sentences-per-talk', type=int, default=60)
+    parser.add_argument('--dim', type=int, default=1536)
+    parser.add_argument('--json', help='existing sentences_with_embeddings.json to benchmark')
+    parser.add_argument('--store', help='existing corpus store directory to benchmark')
+    parser.add_argument('--child', nargs=4, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        child(*args.child)
+        return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        if args.json and args.store:
+            json_path, store_path = args.json, args.store
+            with CorpusStore(store_path) as store:
+                ids = store.talk_ids()
+            talk_id = ids[len(ids) // 2]
+        else:
+            json_path = os.path.join(tmp, 'sentences_with_embeddings.json')
+            store_path = os.path.join(tmp, 'corpus')
+            print(f"Generating {args.talks * args.sentences_per_talk:,} synthetic records "
+                  f"({args.dim} dims)...")
+            talk_id = generate(json_path, store_path, args.talks, args.sentences_per_talk, args.dim)
+
+        store_mb = sum(os.path.getsize(os.path.join(store_path, f)) for f in os.listdir(store_path)) / (1024 * 1024)
+        print("=" * 60)
+        print("Corpus Store vs JSON")
+        print("=" * 60)
+        print(f"   JSON file:   {os.path.getsize(json_path) / (1024 * 1024):,.1f} MB")
+        print(f"   Store files: {store_mb:,.1f} MB\n")
+        print(f"   {'case':24}{'JSON s':>10}{'store s':>10}{'JSON MB':>10}{'store MB':>10}")
+        for case, label in CASES:
+            j = measure('json', case, json_path, talk_id)
+            s = measure('store', case, store_path, talk_id)
+            print(f"   {label:24}{j['seconds']:>10.3f}{s['seconds']:>10.3f}"
+                  f"{j['rss_mb']:>10.0f}{s['rss_mb']:>10.0f}")
+        print("\n   MB = peak resident set size of the process (includes the interpreter).")
+
+
+if __name__ == '__main__':
+    main()
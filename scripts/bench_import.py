@@ -0,0 +1,158 @@
+"""
+Import Throughput Benchmark
+===========================
+Compares the old sequential import loop of 03_import_data.py with the
+parallel, checkpointed, auto-tuned loader (scripts/parallel_import.py),
+then kills a parallel run part-way and resumes it to check that no row
+is lost or duplicated. No database is needed: the stand-in sleeps
+BASE_LATENCY_MS + ROW_LATENCY_MS per row per request and, like a hosted
+API, rejects requests above MAX_ROWS rows or MAX_IN_FLIGHT concurrent
+requests.
+
+  before — 100-row batches, one at a time, time.sleep(0.1) between them
+  after  — parallel_upsert() with --workers connections, batch size and
+           concurrency tuned from latency and errors
+
+Usage:
+    python scripts/bench_import.py
+    python scripts/bench_import.py --rows 50000 --workers 8
+"""
+
+import argparse
+import os
+import tempfile
+import threading
+import time
+
+import parallel_import
+from parallel_import import ImportManifest, fingerprint, parallel_upsert
+
+
+BASE_LATENCY_MS = 40
+ROW_LATENCY_MS = 0.3
+MAX_ROWS = 800           # larger requests fail ("payload too large")
+MAX_IN_FLIGHT = 6        # more concurrent requests fail ("rate limited")
+
+
+class SimulatedCrash(BaseException):
+    """Stands in for the process dying (Ctrl-C, OOM kill, lost VM)."""
+
+
+class SimulatedDatabase:
+    """Keyed table plus write counters, shared by every 'connection'."""
+
+    def __init__(self, crash_after=None):
+        self.rows = {}
+        self.written = 0
+        self.requests = 0
+        self.rejected = 0
+        self.in_flight = 0
+        self.crash_after = crash_after
+        self.lock = threading.Lock()
+
+    def connect(self):
+        return SimulatedConnection(self)
+
+
+class SimulatedConnection:
+    def __init__(self, db):
+        self.db = db
+
+    def upsert(self, table, rows, on_conflict='id'):
+        db = self.db
+        with db.lock:
+            db.requests += 1
+            db.in_flight += 1
+            busy = db.in_flight > MAX_IN_FLIGHT
+        try:
+            if busy or len(rows) > MAX_ROWS:
+                with db.lock:
+                    db.rejected += 1
+                time.sleep(BASE_LATENCY_MS / 1000)
+                raise RuntimeError('429 rate limited' if busy else '413 payload too large')
+            time.sleep((BASE_LATENCY_MS + ROW_LATENCY_MS * len(rows)) / 1000)
+            with db.lock:
+                for row in rows:
+                    db.rows[row[on_conflict]] = row
+                db.written += len(rows)
+                # Die after the write lands but before the caller can checkpoint it
+                if db.crash_after is not None and db.written >= db.crash_after:
+                    db.crash_after = None
+                    raise SimulatedCrash()
+        finally:
+            with db.lock:
+                db.in_flight -= 1
+
+    insert = upsert
+
+
+def make_rows(count):
+    return [{'id': f'row-{i}', 'text': f'Sentence number {i} of the benchmark corpus.'} for i in range(count)]
+
+
+def run_before(rows):
+    db = SimulatedDatabase()
+    connection = db.connect()
+    start = time.perf_counter()
+    for i in range(0, len(rows), 100):
+        connection.insert('sentence_embeddings', rows[i:i + 100])
+        time.sleep(0.1)
+    return time.perf_counter() - start, db
+
+
+def run_after(rows, workers, manifest_path, db=None):
+    db = db or SimulatedDatabase()
+    manifest = ImportManifest(manifest_path, fingerprint(rows), len(rows))
+    start = time.perf_counter()
+    result = parallel_upsert(db.connect, 'sentence_embeddings', rows, manifest, workers=workers)
+    return time.perf_counter() - start, db, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the sentence import loop.')
+    parser.add_argument('--rows', type=int, default=20000)
+    parser.add_argument('--workers', type=int, default=8)
+    args = parser.parse_args()
+
+    # Keep retries quick in the benchmark; the real loader backs off longer
+    parallel_import.MAX_BACKOFF = 0.5
+    rows = make_rows(args.rows)
+    workdir = tempfile.mkdtemp(prefix='bench-import-')
+
+    print("=" * 60)
+    print(f"Import Benchmark ({args.rows:,} rows)")
+    print("=" * 60)
+    print(f"   Simulated request: {BASE_LATENCY_MS} ms + {ROW_LATENCY_MS} ms/row, "
+          f"max {MAX_ROWS} rows, max {MAX_IN_FLIGHT} in flight\n")
+
+    before_seconds, _ = run_before(rows)
+    after_seconds, db, result = run_after(rows, args.workers, os.path.join(workdir, 'full.json'))
+
+    print(f"\n   {'':8}{'seconds':>10}{'rows/s':>10}{'requests':>10}{'rejected':>10}")
+    print(f"   {'before':8}{before_seconds:>10.2f}{args.rows / before_seconds:>10,.0f}"
+          f"{-(-args.rows // 100):>10,}{0:>10}")
+    print(f"   {'after':8}{after_seconds:>10.2f}{args.rows / after_seconds:>10,.0f}"
+          f"{db.requests:>10,}{db.rejected:>10,}")
+    print(f"\n   Batches averaged {result['mean_batch']} rows; ended on {result['concurrency']} of "
+          f"{args.workers} connections ({before_seconds / after_seconds:.1f}x faster)")
+
+    # Crash part-way, then resume from the manifest
+    manifest_path = os.path.join(workdir, 'crash.json')
+    db = SimulatedDatabase(crash_after=args.rows // 2)
+    try:
+        run_after(rows, args.workers, manifest_path, db)
+    except SimulatedCrash:
+        pass
+    checkpointed = ImportManifest(manifest_path, fingerprint(rows), len(rows)).completed()
+    written_before_crash = db.written
+    _, db, result = run_after(rows, args.workers, manifest_path, db)
+
+    print(f"\n   Crash after {written_before_crash:,} rows written ({checkpointed:,} checkpointed)")
+    print(f"   Resume wrote {result['rows']:,} rows; rewritten: {db.written - args.rows:,}")
+    ok = len(db.rows) == args.rows and set(db.rows) == {r['id'] for r in rows}
+    print(f"   {'✅' if ok else '❌'} {len(db.rows):,} distinct rows in the table "
+          f"(expected {args.rows:,}, no duplicates by construction of upsert)")
+
+
+if __name__ == '__main__':
+    main()
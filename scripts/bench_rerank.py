@@ -0,0 +1,173 @@
+"""
+Re-ranking Benchmark
+====================
+Quality and latency of the re-ranking stage (scripts/rerank.py) against
+plain cosine top-k, using the local engine — no keys or network needed.
+
+The synthetic corpus is built so that the lexical scorer gets no help it
+wouldn't get from real queries. Every concept in the Zipf-distributed
+vocabulary has VARIANTS surface forms (synonyms), and sentences use them
+at random. The embedder maps a sentence to the sum of its *concept*
+vectors, so like a real semantic model it treats synonyms as the same
+thing; re-ranking only sees the surface words. Sentence vectors get
+Gaussian noise (--noise) for the imprecision of real embeddings.
+
+Each query picks 3-5 consecutive words from one target sentence, swaps
+each for a different synonym with probability p, and shuffles them. p = 0
+is a verbatim quote, p = 1 shares no word with the target (held out). A
+query is a hit@k if the target sentence is in the top k.
+
+  vector   — top MATCH_COUNT by cosine (match_sentences today)
+  rerank   — top CANDIDATE_COUNT by cosine, re-scored, top MATCH_COUNT kept
+
+Re-ranking is on by default only as long as it never loses to vector on
+held-out queries (p = 1): a query that quotes nothing must keep its
+cosine ranking. tests/test_rerank.py checks this on a smaller corpus.
+
+Latency is the whole Reranker.rerank() call.
+
+Usage:
+    python scripts/bench_rerank.py
+    python scripts/bench_rerank.py --sentences 50000 --paraphrase 0,0.3,0.6,1 --budget-ms 5
+"""
+
+import argparse
+import statistics
+import time
+
+import numpy as np
+
+from rerank import CANDIDATE_COUNT, Reranker
+from retrieval import MATCH_COUNT, LocalSearchEngine
+
+
+VARIANTS = 3       # synonyms per concept
+DIMENSIONS = 256
+
+
+class ConceptEmbedder:
+    """Bag-of-concepts embedder: synonyms share a vector, as with a semantic model."""
+
+    def __init__(self, concepts, rng):
+        vectors = rng.standard_normal((concepts, DIMENSIONS)).astype(np.float32)
+        self.vectors = vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+    def embed(self, texts):
+        rows = []
+        for text in texts:
+            concepts = [int(word[1:-1]) for word in text.rstrip('.').split()]
+            vector = self.vectors[concepts].sum(axis=0)
+            rows.append(vector / (np.linalg.norm(vector) or 1))
+        return np.array(rows, dtype=np.float32)
+
+
+def word(concept, variant):
+    return f'c{concept}{"abc"[variant]}'
+
+
+def synthetic_corpus(sentences, vocabulary, rng):
+    weights = 1 / np.arange(1, vocabulary + 1)
+    weights /= weights.sum()
+    records = []
+    for i in range(sentences):
+        length = rng.integers(10, 25)
+        concepts = rng.choice(vocabulary, size=length, p=weights)
+        text = ' '.join(word(c, rng.integers(VARIANTS)) for c in concepts) + '.'
+        records.append({'id': str(i), 'talk_id': str(i // 50), 'title': f'Talk {i // 50}',
+                        'speaker': 'Speaker', 'url': None, 'text': text})
+    return records
+
+
+def make_queries(records, count, paraphrase, rng):
+    queries = []
+    for target in rng.choice(len(records), size=count, replace=False):
+        words = records[target]['text'].rstrip('.').split()
+        size = int(rng.integers(3, 6))
+        start = int(rng.integers(0, len(words) - size + 1))
+        picked = []
+        for w in words[start:start + size]:
+            concept, variant = int(w[1:-1]), 'abc'.index(w[-1])
+            if rng.random() < paraphrase:
+                variant = (variant + int(rng.integers(1, VARIANTS))) % VARIANTS
+            picked.append(word(concept, variant))
+        rng.shuffle(picked)
+        queries.append((' '.join(picked), str(target)))
+    return queries
+
+
+def hits(results, target):
+    ids = [r['id'] for r in results]
+    return ids.index(target) + 1 if target in ids else None
+
+
+def summarize(found):
+    def at(k):
+        return sum(1 for r in found if r and r <= k) / len(found)
+    return at(1), at(5), at(MATCH_COUNT), sum(1 / r for r in found if r) / len(found)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark re-ranking quality and latency.')
+    parser.add_argument('--sentences', type=int, default=20000)
+    parser.add_argument('--vocabulary', type=int, default=3000, help='concepts (each has VARIANTS synonyms)')
+    parser.add_argument('--queries', type=int, default=300, help='per paraphrase level')
+    parser.add_argument('--paraphrase', default='0,0.5,1',
+                        help='comma-separated probabilities of swapping each query word for a synonym')
+    parser.add_argument('--noise', type=float, default=0.03, help='std of Gaussian noise per vector dimension')
+    parser.add_argument('--budget-ms', type=float, default=None, help='override the per-query budget')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    embedder = ConceptEmbedder(args.vocabulary, rng)
+    records = synthetic_corpus(args.sentences, args.vocabulary, rng)
+    matrix = embedder.embed(r['text'] for r in records)
+    matrix += rng.standard_normal(matrix.shape).astype(np.float32) * args.noise
+    engine = LocalSearchEngine(records, matrix)
+    reranker = Reranker() if args.budget_ms is None else Reranker(budget_ms=args.budget_ms)
+    levels = [float(p) for p in args.paraphrase.split(',')]
+
+    print("=" * 60)
+    print(f"Re-ranking Benchmark ({args.sentences:,} sentences, {args.queries} queries per level)")
+    print("=" * 60)
+    print(f"   Candidates: {CANDIDATE_COUNT} → top {MATCH_COUNT}, budget {reranker.budget * 1000:.0f} ms/query\n")
+    print(f"   {'synonyms':>9} {'':8}{'hit@1':>8}{'hit@5':>8}{f'hit@{MATCH_COUNT}':>8}{'MRR':>8}")
+
+    latencies = []
+    queries = []
+    for paraphrase in levels:
+        queries = make_queries(records, args.queries, paraphrase, rng)
+        ranks = {'vector': [], 'rerank': []}
+        for text, target in queries:
+            candidates = engine.search(embedder.embed([text])[0], CANDIDATE_COUNT)
+            ranks['vector'].append(hits(candidates[:MATCH_COUNT], target))
+            start = time.perf_counter()
+            reranked = reranker.rerank(text, candidates, MATCH_COUNT)
+            latencies.append((time.perf_counter() - start) * 1000)
+            ranks['rerank'].append(hits(reranked, target))
+        for name, found in ranks.items():
+            label = f'{paraphrase:>8.0%}' if name == 'vector' else ''
+            print(f"   {label:>9} {name:8}" + ''.join(f"{v:>8.2f}" for v in summarize(found)[:3])
+                  + f"{summarize(found)[3]:>8.3f}")
+
+    latencies.sort()
+    total = len(latencies)
+    over = sum(1 for ms in latencies if ms > reranker.budget * 1000)
+    print(f"\n   rerank() latency: p50 {statistics.median(latencies):.2f} ms, "
+          f"p95 {latencies[int(total * 0.95) - 1]:.2f} ms, max {latencies[-1]:.2f} ms")
+    print(f"   Over budget: {over} of {total} calls; budget cut scoring short on "
+          f"{reranker.stats['budget_exhausted']}")
+
+    # Ask the most recent questions again (they are still in the LRU cache)
+    repeats = queries[-min(len(queries), reranker.cache_size):]
+    candidates = [engine.search(embedder.embed([text])[0], CANDIDATE_COUNT) for text, _ in repeats]
+    hits_before = reranker.stats['cache_hits']
+    start = time.perf_counter()
+    for (text, _), pool in zip(repeats, candidates):
+        reranker.rerank(text, pool, MATCH_COUNT)
+    print(f"   Repeat queries: {reranker.stats['cache_hits'] - hits_before} of {len(repeats)} served from cache, "
+          f"{(time.perf_counter() - start) * 1000 / len(repeats):.3f} ms/query")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,104 @@
+"""
+Two-Stage Retrieval Benchmark
+=============================
+Latency and recall of coarse-to-fine search (talk centroids → sentences)
+against the exact single-stage scan, using the local engine in
+scripts/retrieval.py.
+
+Recall@k is the share of the exact top-k sentences that the two-stage
+search also returns. Talk recall is the share of the talks in the exact
+top-k that also appear in the two-stage top-k.
+
+By default a synthetic corpus with topical structure is generated (talks
+mix a few shared topics, queries target a topic). Pass --store to run on
+your real Step 4 output; queries are then perturbed sentence vectors.
+
+Usage:
+    python scripts/bench_retrieval.py
+    python scripts/bench_retrieval.py --talks 2000 --sentences-per-talk 80
+    python scripts/bench_retrieval.py --store scripts/output/corpus/sentences_with_embeddings
+"""
+
+import argparse
+import time
+import uuid
+
+import numpy as np
+
+from retrieval import MATCH_COUNT, LocalSearchEngine, normalize_rows
+
+
+TALK_COUNTS = [5, 10, 25, 50, 100]
+
+
+def synthetic_engine(talks, per_talk, dim, topics, rng):
+    topic_vectors = normalize_rows(rng.standard_normal((topics, dim)))
+    records = []
+    rows = []
+    for t in range(talks):
+        talk_id = str(uuid.uuid4())
+        mix = rng.choice(topics, size=3, replace=False)
+        weights = rng.dirichlet(np.ones(3))
+        center = weights @ topic_vectors[mix]
+        for n in range(per_talk):
+            rows.append(center + rng.standard_normal(dim) * 0.1)
+            records.append({'talk_id': talk_id, 'sentence_num': n + 1, 'text': f'{t}:{n}'})
+    queries = normalize_rows(topic_vectors[rng.integers(0, topics, size=200)] + rng.standard_normal((200, dim)) * 0.03)
+    return LocalSearchEngine(records, np.array(rows, dtype=np.float32)), queries
+
+
+def store_engine(path, rng):
+    engine = LocalSearchEngine.from_store(path)
+    picks = rng.integers(0, len(engine.records), size=200)
+    queries = normalize_rows(engine.matrix[picks] + rng.standard_normal(engine.matrix[picks].shape) * 0.02)
+    return engine, queries
+
+
+def timed(fn, queries):
+    start = time.perf_counter()
+    results = [fn(q) for q in queries]
+    return results, (time.perf_counter() - start) * 1000 / len(queries)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark two-stage vs single-stage retrieval.')
+    parser.add_argument('--talks', type=int, default=1000)
+    parser.add_argument('--sentences-per-talk', type=int, default=70)
+    parser.add_argument('--dim', type=int, default=256)
+    parser.add_argument('--topics', type=int, default=40)
+    parser.add_argument('--queries', type=int, default=100)
+    parser.add_argument('--store', help='corpus store with embeddings (Step 4 output)')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    if args.store:
+        engine, queries = store_engine(args.store, rng)
+    else:
+        engine, queries = synthetic_engine(args.talks, args.sentences_per_talk, args.dim, args.topics, rng)
+    queries = queries[:args.queries]
+
+    print("=" * 60)
+    print(f"Two-Stage Retrieval ({len(engine.records):,} sentences, {len(engine.talk_ids):,} talks)")
+    print("=" * 60)
+
+    exact, exact_ms = timed(lambda q: engine.search(q, MATCH_COUNT), queries)
+    exact_ids = [[(r['talk_id'], r['text']) for r in res] for res in exact]
+
+    print(f"   {'strategy':22}{'ms/query':>10}{'recall@' + str(MATCH_COUNT):>12}{'talk recall':>13}")
+    print(f"   {'single-stage scan':22}{exact_ms:>10.2f}{1:>12.3f}{1:>13.3f}")
+    for m in TALK_COUNTS:
+        found, ms = timed(lambda q: engine.search_two_stage(q, m, MATCH_COUNT), queries)
+        hits = talk_hits = talk_total = 0
+        for truth, res in zip(exact_ids, found):
+            got = {(r['talk_id'], r['text']) for r in res}
+            hits += sum(1 for item in truth if item in got)
+            truth_talks = {t for t, _ in truth}
+            talk_total += len(truth_talks)
+            talk_hits += len(truth_talks & {r['talk_id'] for r in res})
+        recall = hits / sum(len(t) for t in exact_ids)
+        print(f"   {'two-stage, M=' + str(m):22}{ms:>10.2f}{recall:>12.3f}{talk_hits / talk_total:>13.3f}")
+
+
+if __name__ == '__main__':
+    main()
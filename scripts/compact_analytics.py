@@ -0,0 +1,84 @@
+"""
+Analytics Compactor
+===================
+Drains the analytics_events queue table into question_analytics and
+citation_analytics in batches. The app and Edge Functions only ever append
+to the queue; this worker does the fan-out writes off the request path.
+
+Each pass calls compact_analytics_events(), which moves up to BATCH_SIZE
+queued events in a single transaction; events whose citations can't be
+parsed go to analytics_events_dead rather than failing the batch. The worker keeps draining while full
+batches come back and sleeps POLL_INTERVAL seconds once the queue is empty.
+
+Usage:
+    python scripts/compact_analytics.py           # run forever
+    python scripts/compact_analytics.py --once    # drain the queue and exit
+
+Prerequisites:
+    - config.public.json with Supabase URL
+    - config.secret.json with Supabase service key
+      (neither is needed with CONFERENCE_RAG_BACKEND=local)
+    - Analytics tables created (scripts/06_create_analytics.py)
+"""
+
+import argparse
+import time
+
+from backends import get_backend
+
+
+BATCH_SIZE = 5000
+POLL_INTERVAL = 30  # seconds between passes when the queue is empty
+
+
+def compact_once(backend, batch_size=BATCH_SIZE):
+    """Drain the queue until a partial batch comes back. Returns totals."""
+    totals = {'events': 0, 'questions': 0, 'citations': 0, 'dead_lettered': 0}
+    while True:
+        data = backend.rpc('compact_analytics_events', {'batch_size': batch_size})
+        row = data[0] if data else {}
+        for key in totals:
+            totals[key] += row.get(key) or 0
+        if (row.get('events') or 0) < batch_size:
+            return totals
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Roll queued analytics events into the analytics tables.')
+    parser.add_argument('--once', action='store_true', help='drain the queue once and exit')
+    parser.add_argument('--batch-size', type=int, default=BATCH_SIZE)
+    parser.add_argument('--interval', type=float, default=POLL_INTERVAL)
+    args = parser.parse_args()
+
+    backend = get_backend()
+
+    print("=" * 60)
+    print("Analytics Compactor")
+    print("=" * 60)
+    print(f"   Batch size: {args.batch_size:,}")
+    if not args.once:
+        print(f"   Poll interval: {args.interval:g}s (Ctrl+C to stop)")
+
+    try:
+        while True:
+            try:
+                totals = compact_once(backend, args.batch_size)
+                if totals['events']:
+                    print(f"   Compacted {totals['events']:,} events → "
+                          f"{totals['questions']:,} questions, {totals['citations']:,} citations")
+                if totals['dead_lettered']:
+                    print(f"   ⚠️ {totals['dead_lettered']:,} unparseable events moved to analytics_events_dead")
+            except Exception as e:
+                print(f"   ⚠️ Compaction pass failed: {e}")
+
+            if args.once:
+                break
+            time.sleep(args.interval)
+    except KeyboardInterrupt:
+        pass
+
+    print("\n✅ Compactor stopped.")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,240 @@
+"""
+Local Corpus Store
+==================
+An append-only sentence store with an offset index, read through mmap.
+Replaces "json.load the whole file" for tools that only need a few talks
+or want to stream the corpus in order.
+
+A store is a directory with two files:
+
+    records.bin  — one record after another:
+                   <meta_len:uint32><dim:uint32><meta JSON><dim x float32 embedding>
+    index.bin    — one fixed-size entry per record, in append order:
+                   <talk_id:16 bytes uuid><sentence_num:uint32><offset:uint64><length:uint32>
+
+Records are written before their index entry, so a crash can only leave an
+unindexed tail on records.bin; opening the store trims it. Lookups by
+talk_id or (talk_id, sentence_num) are dictionary hits, and a talk whose
+sentences were appended together is one contiguous region of the mapping.
+Embeddings are stored as float32 (the precision OpenAI returns them at).
+
+Usage:
+    from corpus_store import CorpusStore
+
+    with CorpusStore('scripts/output/corpus/sentences') as store:
+        store.extend(records)
+        store.get(talk_id, 3)           # one sentence
+        store.talk(talk_id)             # all sentences of a talk, in order
+        for record in store: ...        # everything, in append order
+"""
+
+import json
+import mmap
+import os
+import struct
+import uuid
+
+import numpy as np
+
+from partitions import output_path
+
+
+CORPUS_DIR = output_path('corpus')
+SENTENCES_STORE = os.path.join(CORPUS_DIR, 'sentences')
+EMBEDDINGS_STORE = os.path.join(CORPUS_DIR, 'sentences_with_embeddings')
+
+_HEADER = struct.Struct('<II')
+_ENTRY = struct.Struct('<16sIQI')
+
+
+class CorpusStore:
+    """Append-only record file + offset index keyed by talk_id and sentence_num."""
+
+    def __init__(self, path):
+        self.path = path
+        os.makedirs(path, exist_ok=True)
+        self._records_path = os.path.join(path, 'records.bin')
+        self._index_path = os.path.join(path, 'index.bin')
+        for p in (self._records_path, self._index_path):
+            if not os.path.exists(p):
+                open(p, 'wb').close()
+
+        self._entries = []     # (talk_id bytes, sentence_num, offset, length) in append order
+        self._by_key = {}      # (talk_id bytes, sentence_num) → entry position
+        self._by_talk = {}     # talk_id bytes → entry positions, sorted by sentence_num
+        self._load_index()
+
+        self._records = open(self._records_path, 'r+b')
+        self._records.seek(0, os.SEEK_END)
+        self._index = open(self._index_path, 'ab')
+        self._map = None
+        self._mapped_size = 0
+
+    @staticmethod
+    def exists(path):
+        return os.path.exists(os.path.join(path, 'index.bin'))
+
+    # ---------- opening / recovery ----------
+
+    def _load_index(self):
+        records_size = os.path.getsize(self._records_path)
+        with open(self._index_path, 'rb') as f:
+            raw = f.read()
+        usable = len(raw) - len(raw) % _ENTRY.size
+        end = 0
+        for talk_id, num, offset, length in _ENTRY.iter_unpack(raw[:usable]):
+            if offset + length > records_size:
+                break  # index entry for a record that never hit the disk
+            self._add_entry(talk_id, num, offset, length)
+            end = offset + length
+
+        # Trim anything past the last fully indexed record
+        if len(raw) != len(self._entries) * _ENTRY.size:
+            with open(self._index_path, 'r+b') as f:
+                f.truncate(len(self._entries) * _ENTRY.size)
+        if records_size != end:
+            with open(self._records_path, 'r+b') as f:
+                f.truncate(end)
+
+    def _add_entry(self, talk_id, num, offset, length):
+        pos = len(self._entries)
+        self._entries.append((talk_id, num, offset, length))
+        self._by_key[(talk_id, num)] = pos
+        positions = self._by_talk.setdefault(talk_id, [])
+        positions.append(pos)
+        if len(positions) > 1 and self._entries[positions[-2]][1] > num:
+            positions.sort(key=lambda p: self._entries[p][1])
+
+    # ---------- writing ----------
+
+    def append(self, record):
+        """Append one sentence record (must have talk_id and sentence_num)."""
+        self.extend([record])
+
+    def extend(self, records):
+        """Append records, then their index entries, then flush both."""
+        data = bytearray()
+        entries = []
+        offset = self._records.tell()
+        for record in records:
+            meta = dict(record)
+            embedding = meta.pop('embedding', None)
+            meta_bytes = json.dumps(meta, ensure_ascii=False).encode('utf-8')
+            vector = np.asarray(embedding, dtype='<f4').tobytes() if embedding is not None else b''
+            blob = _HEADER.pack(len(meta_bytes), len(vector) // 4) + meta_bytes + vector
+            entries.append((uuid.UUID(record['talk_id']).bytes, int(record['sentence_num']), offset, len(blob)))
+            data += blob
+            offset += len(blob)
+
+        self._records.write(data)
+        self._records.flush()
+        self._index.write(b''.join(_ENTRY.pack(*e) for e in entries))
+        self._index.flush()
+        for entry in entries:
+            self._add_entry(*entry)
+
+    # ---------- reading ----------
+
+    def _view(self):
+        size = self._records.tell()
+        if self._map is None or self._mapped_size != size:
+            if self._map is not None:
+                self._map.close()
+            self._map = mmap.mmap(self._records.fileno(), size, access=mmap.ACCESS_READ) if size else None
+            self._mapped_size = size
+        return self._map
+
+    def _decode(self, buf, offset, embeddings=True):
+        meta_len, dim = _HEADER.unpack_from(buf, offset)
+        start = offset + _HEADER.size
+        record = json.loads(bytes(buf[start:start + meta_len]))
+        if dim and embeddings:
+            record['embedding'] = np.frombuffer(buf, dtype='<f4', count=dim, offset=start + meta_len).tolist()
+        return record
+
+    def _read(self, positions, embeddings=True):
+        view = self._view()
+        return [self._decode(view, self._entries[p][2], embeddings) for p in positions]
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, talk_id):
+        return uuid.UUID(talk_id).bytes in self._by_talk
+
+    def has(self, talk_id, sentence_num):
+        return (uuid.UUID(talk_id).bytes, int(sentence_num)) in self._by_key
+
+    def talk_ids(self):
+        """Talk ids in first-appended order."""
+        return [str(uuid.UUID(bytes=t)) for t in self._by_talk]
+
+    def get(self, talk_id, sentence_num):
+        """One sentence record, or None."""
+        pos = self._by_key.get((uuid.UUID(talk_id).bytes, sentence_num))
+        return None if pos is None else self._read([pos])[0]
+
+    def talk(self, talk_id, start=None, stop=None):
+        """Sentences of a talk ordered by sentence_num, optionally limited to [start, stop)."""
+        positions = self._by_talk.get(uuid.UUID(talk_id).bytes, [])
+        if start is not None or stop is not None:
+            lo = start if start is not None else 0
+            hi = stop if stop is not None else float('inf')
+            positions = [p for p in positions if lo <= self._entries[p][1] < hi]
+        return self._read(positions)
+
+    def records(self, start=0, stop=None, embeddings=True):
+        """Records start..stop in append order (for batched streaming)."""
+        stop = len(self._entries) if stop is None else min(stop, len(self._entries))
+        return self._read(range(start, stop), embeddings)
+
+    def __iter__(self):
+        for i in range(0, len(self._entries), 1000):
+            yield from self.records(i, i + 1000)
+
+    def embedding_matrix(self):
+        """All embeddings as an (n, dim) float32 array, zero rows for records without one."""
+        view = self._view()
+        dims = set()
+        rows = []
+        for _, _, offset, _ in self._entries:
+            meta_len, dim = _HEADER.unpack_from(view, offset)
+            rows.append((offset + _HEADER.size + meta_len, dim))
+            if dim:
+                dims.add(dim)
+        if len(dims) > 1:
+            raise ValueError(f"Mixed embedding dimensions in {self.path}: {sorted(dims)}")
+        width = dims.pop() if dims else 0
+        matrix = np.zeros((len(rows), width), dtype=np.float32)
+        for i, (offset, dim) in enumerate(rows):
+            if dim:
+                matrix[i] = np.frombuffer(view, dtype='<f4', count=dim, offset=offset)
+        return matrix
+
+    # ---------- housekeeping ----------
+
+    def clear(self):
+        """Drop every record (used when a step regenerates its output)."""
+        if self._map is not None:
+            self._map.close()
+            self._map = None
+            self._mapped_size = 0
+        self._records.truncate(0)
+        self._records.seek(0)
+        self._index.truncate(0)
+        self._entries.clear()
+        self._by_key.clear()
+        self._by_talk.clear()
+
+    def close(self):
+        if self._map is not None:
+            self._map.close()
+            self._map = None
+        self._records.close()
+        self._index.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,147 @@
+"""
+Near-duplicate detection with MinHash + LSH
+============================================
+Shared helpers for the dedup stage (scripts/02b_dedup_talks.py).
+
+Each text is reduced to a set of shingles (word or character n-grams) and
+summarised by a MinHash signature: for NUM_PERM random hash functions, the
+minimum hash over the shingle set. The fraction of matching signature slots
+estimates the Jaccard similarity of two sets.
+
+Signatures are cut into bands and hashed into buckets (locality-sensitive
+hashing). Only texts that share a bucket are compared, so finding duplicates
+is roughly linear in corpus size instead of comparing every pair.
+"""
+
+import re
+import zlib
+
+import numpy as np
+
+
+NUM_PERM = 128
+BANDS = 16  # 16 bands x 8 rows → candidates above ~0.7 Jaccard
+MERSENNE_PRIME = np.uint64(4294967311)  # smallest prime above 2**32
+
+_WORD_RE = re.compile(r"\w+")
+
+
+def normalize(text):
+    """Collapse whitespace so trivially different copies compare equal."""
+    return ' '.join(text.split())
+
+
+def word_shingles(text, k=5):
+    """Lower-cased word k-grams (used for whole talks)."""
+    words = _WORD_RE.findall(text.lower())
+    if len(words) < k:
+        return {' '.join(words)} if words else set()
+    return {' '.join(words[i:i + k]) for i in range(len(words) - k + 1)}
+
+
+def char_shingles(text, k=5):
+    """Lower-cased character k-grams (used for short sentences)."""
+    text = ' '.join(_WORD_RE.findall(text.lower()))
+    if len(text) < k:
+        return {text} if text else set()
+    return {text[i:i + k] for i in range(len(text) - k + 1)}
+
+
+class MinHasher:
+    """Universal hash family h(x) = (a*x + b) mod p over 32-bit shingle hashes."""
+
+    def __init__(self, num_perm=NUM_PERM, seed=1):
+        rng = np.random.default_rng(seed)
+        # a, b < 2**32 and x < 2**32 keep a*x + b inside uint64 without overflow
+        self.a = rng.integers(1, 2 ** 32, size=num_perm, dtype=np.uint64)
+        self.b = rng.integers(0, 2 ** 32, size=num_perm, dtype=np.uint64)
+        self.num_perm = num_perm
+
+    def signature(self, shingles):
+        if not shingles:
+            return np.full(self.num_perm, np.iinfo(np.uint64).max, dtype=np.uint64)
+        hashes = np.fromiter((zlib.crc32(s.encode('utf-8')) for s in shingles),
+                             dtype=np.uint64, count=len(shingles))
+        values = (np.outer(hashes, self.a) + self.b) % MERSENNE_PRIME
+        return values.min(axis=0)
+
+
+def estimate_similarity(sig_a, sig_b):
+    """Estimated Jaccard similarity from two MinHash signatures."""
+    return float(np.count_nonzero(sig_a == sig_b)) / len(sig_a)
+
+
+class LSHIndex:
+    """Banded LSH over MinHash signatures."""
+
+    def __init__(self, num_perm=NUM_PERM, bands=BANDS):
+        if num_perm % bands:
+            raise ValueError(f"num_perm ({num_perm}) must be divisible by bands ({bands})")
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.buckets = [{} for _ in range(bands)]
+
+    def insert(self, key, signature):
+        """Add a signature; returns keys already sharing any bucket with it."""
+        candidates = []
+        for band, buckets in enumerate(self.buckets):
+            chunk = signature[band * self.rows:(band + 1) * self.rows].tobytes()
+            members = buckets.setdefault(chunk, [])
+            if members:
+                # The first member represents the bucket; comparing against it
+                # alone keeps huge buckets (boilerplate) from going quadratic.
+                candidates.append(members[0])
+            members.append(key)
+        return candidates
+
+
+class _UnionFind:
+    def __init__(self, n):
+        self.parent = list(range(n))
+
+    def find(self, i):
+        while self.parent[i] != i:
+            self.parent[i] = self.parent[self.parent[i]]
+            i = self.parent[i]
+        return i
+
+    def union(self, i, j):
+        ri, rj = self.find(i), self.find(j)
+        if ri != rj:
+            self.parent[max(ri, rj)] = min(ri, rj)
+
+
+def find_near_duplicates(texts, shingle_fn=word_shingles, threshold=0.8,
+                         num_perm=NUM_PERM, bands=BANDS):
+    """
+    Group near-duplicate texts.
+
+    Returns a list of clusters (lists of indices into texts, ascending) that
+    contain more than one member. Exact duplicates (after normalize()) are
+    always grouped; other pairs are grouped when their estimated Jaccard
+    similarity is at least threshold.
+    """
+    hasher = MinHasher(num_perm)
+    index = LSHIndex(num_perm, bands)
+    groups = _UnionFind(len(texts))
+    signatures = []
+    first_seen = {}
+
+    for i, text in enumerate(texts):
+        key = normalize(text)
+        if key in first_seen:
+            groups.union(first_seen[key], i)
+            signatures.append(signatures[first_seen[key]])
+            continue
+        first_seen[key] = i
+
+        sig = hasher.signature(shingle_fn(text))
+        signatures.append(sig)
+        for j in set(index.insert(i, sig)):
+            if estimate_similarity(sig, signatures[j]) >= threshold:
+                groups.union(i, j)
+
+    clusters = {}
+    for i in range(len(texts)):
+        clusters.setdefault(groups.find(i), []).append(i)
+    return [members for members in clusters.values() if len(members) > 1]
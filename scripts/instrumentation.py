@@ -0,0 +1,297 @@
+"""
+Pipeline Instrumentation
+========================
+Structured timing, counters and memory for the pipeline scripts, plus an
+opt-in profiler for hot code. Everything is a no-op (apart from cheap
+bookkeeping) unless one of the environment variables below is set.
+
+    PIPELINE_METRICS=path.jsonl
+        Append one JSON object per stage, span summary and event
+        (e.g. a failed batch) to a JSON lines file.
+
+    PIPELINE_METRICS=path.prom
+        Write a Prometheus textfile (node_exporter textfile collector) when
+        the stage ends. Use {stage} in the path for one file per stage,
+        e.g. metrics/{stage}.prom, since each script overwrites its file.
+        In partitioned runs (scripts/partitions.py) add {partition} too;
+        every record and series is also tagged with the partition.
+
+    PIPELINE_PROFILE=1
+        Run profiled() functions/blocks under cProfile and trace memory with
+        tracemalloc. Writes scripts/output/profiles/<stage>.prof (open with
+        `python -m pstats` or snakeviz) and <stage>.alloc.txt with the top
+        allocation sites.
+
+Usage:
+    import instrumentation as inst
+
+    with inst.stage('import'):
+        with inst.span('insert_batch'):
+            ...
+        inst.count('rows', len(batch))
+        inst.event('batch_failed', batch=3, error=str(e))
+
+    @inst.profiled
+    def split_into_sentences(text): ...
+"""
+
+import cProfile
+import functools
+import json
+import os
+import pstats
+import resource
+import socket
+import sys
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+from partitions import current_partition
+
+
+METRICS_ENV = 'PIPELINE_METRICS'
+PROFILE_ENV = 'PIPELINE_PROFILE'
+PROFILE_DIR = os.path.join('scripts', 'output', 'profiles')
+TOP_ALLOCATIONS = 25
+
+_lock = threading.Lock()
+_local = threading.local()
+_current = None
+
+
+class _Stage:
+    def __init__(self, name):
+        self.name = name
+        self.started = time.time()
+        self.start = time.perf_counter()
+        self.counters = {}
+        self.spans = {}          # name → [count, total seconds, max seconds]
+        self.profiles = []       # one cProfile.Profile per thread that ran profiled code
+        self.profiling = os.environ.get(PROFILE_ENV, '') not in ('', '0')
+        partition = current_partition()
+        self.partition = partition.key if partition else ''
+
+
+def _peak_rss_mb():
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+
+def _metrics_path(stage_):
+    path = os.environ.get(METRICS_ENV, '')
+    return path.replace('{stage}', stage_.name).replace('{partition}', stage_.partition or 'all') if path else ''
+
+
+def _emit(record):
+    """Append one JSON line (JSONL sinks only; Prometheus is written at stage end)."""
+    if _current is None:
+        return
+    path = _metrics_path(_current)
+    if not path or path.endswith('.prom'):
+        return
+    record = {'ts': datetime.now(timezone.utc).isoformat(), 'stage': _current.name, **record}
+    if _current.partition:
+        record['partition'] = _current.partition
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    with _lock, open(path, 'a', encoding='utf-8') as f:
+        f.write(json.dumps(record, ensure_ascii=False) + '\n')
+
+
+# ---------- public API ----------
+
+@contextmanager
+def stage(name):
+    """Wrap a whole pipeline step; emits its duration, counters, spans and peak memory."""
+    global _current
+    _current = _Stage(name)
+    if _current.profiling:
+        tracemalloc.start()
+    status = 'ok'
+    try:
+        yield _current
+    except BaseException:
+        status = 'error'
+        raise
+    finally:
+        _finish(_current, status)
+        _current = None
+
+
+@contextmanager
+def span(name):
+    """Time a block; repeated spans with the same name are aggregated."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        if _current is not None:
+            with _lock:
+                stats = _current.spans.setdefault(name, [0, 0.0, 0.0])
+                stats[0] += 1
+                stats[1] += elapsed
+                stats[2] = max(stats[2], elapsed)
+
+
+def count(name, value=1):
+    """Add to a stage counter (rows, batches, retries, bytes, tokens, ...)."""
+    if _current is not None:
+        with _lock:
+            _current.counters[name] = _current.counters.get(name, 0) + value
+
+
+def event(name, **fields):
+    """Record a discrete event, e.g. a failed batch with its error."""
+    count(f'events.{name}')
+    _emit({'type': 'event', 'event': name, **fields})
+
+
+@contextmanager
+def profile(name):
+    """A span that also runs under cProfile when PIPELINE_PROFILE is set."""
+    stage_ = _current
+    if stage_ is None or not stage_.profiling:
+        with span(name):
+            yield
+        return
+
+    profiler = getattr(_local, 'profiler', None)
+    if profiler is None or getattr(_local, 'stage', None) is not stage_:
+        profiler = _local.profiler = cProfile.Profile()
+        _local.stage = stage_
+        with _lock:
+            stage_.profiles.append(profiler)
+    # Nested profiled blocks in the same thread share the outer profiler
+    depth = getattr(_local, 'depth', 0)
+    _local.depth = depth + 1
+    enabled = False
+    if depth == 0:
+        try:
+            profiler.enable()
+            enabled = True
+        except ValueError:
+            # Python 3.12+ allows one active cProfile at a time; other threads just get spans
+            count('profile.skipped')
+    try:
+        with span(name):
+            yield
+    finally:
+        _local.depth = depth
+        if enabled:
+            profiler.disable()
+
+
+def profiled(fn=None, *, name=None):
+    """Decorator form of profile(); usable as @profiled or @profiled(name='...')."""
+    if fn is None:
+        return functools.partial(profiled, name=name)
+
+    label = name or fn.__name__
+
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        with profile(label):
+            return fn(*args, **kwargs)
+    return wrapper
+
+
+# ---------- output ----------
+
+def _finish(stage_, status):
+    seconds = time.perf_counter() - stage_.start
+    record = {
+        'type': 'stage',
+        'status': status,
+        'seconds': round(seconds, 4),
+        'peak_rss_mb': round(_peak_rss_mb(), 1),
+        'counters': stage_.counters,
+        'host': socket.gethostname(),
+        'pid': os.getpid(),
+    }
+    if stage_.profiling:
+        _, traced_peak = tracemalloc.get_traced_memory()
+        record['traced_peak_mb'] = round(traced_peak / (1024 * 1024), 1)
+        _write_profiles(stage_)
+        tracemalloc.stop()
+
+    for span_name, (n, total, longest) in stage_.spans.items():
+        _emit({'type': 'span', 'span': span_name, 'count': n,
+               'total_seconds': round(total, 4), 'max_seconds': round(longest, 4)})
+    _emit(record)
+
+    path = _metrics_path(stage_)
+    if path.endswith('.prom'):
+        _write_prometheus(path, stage_, record)
+
+
+def _write_profiles(stage_):
+    os.makedirs(PROFILE_DIR, exist_ok=True)
+    # Partitions of the same stage run in parallel; keep their profiles apart
+    name = f'{stage_.name}.{stage_.partition}' if stage_.partition else stage_.name
+    if stage_.profiles:
+        stats = pstats.Stats(stage_.profiles[0])
+        for extra in stage_.profiles[1:]:
+            stats.add(extra)
+        stats.dump_stats(os.path.join(PROFILE_DIR, f'{name}.prof'))
+
+    snapshot = tracemalloc.take_snapshot()
+    top = snapshot.statistics('lineno')[:TOP_ALLOCATIONS]
+    with open(os.path.join(PROFILE_DIR, f'{name}.alloc.txt'), 'w', encoding='utf-8') as f:
+        f.write(f"Top {TOP_ALLOCATIONS} allocation sites still alive at the end of '{stage_.name}'\n\n")
+        for stat in top:
+            f.write(f"{stat}\n")
+
+
+def _prom_name(name):
+    return ''.join(c if c.isalnum() else '_' for c in name).lower()
+
+
+def _write_prometheus(path, stage_, record):
+    label = f'stage="{stage_.name}"'
+    if stage_.partition:
+        label += f',partition="{stage_.partition}"'
+    lines = [
+        '# HELP conference_rag_stage_seconds Wall time of the pipeline stage.',
+        '# TYPE conference_rag_stage_seconds gauge',
+        f'conference_rag_stage_seconds{{{label}}} {record["seconds"]}',
+        '# HELP conference_rag_stage_success 1 if the stage finished without an exception.',
+        '# TYPE conference_rag_stage_success gauge',
+        f'conference_rag_stage_success{{{label}}} {1 if record["status"] == "ok" else 0}',
+        '# HELP conference_rag_stage_peak_rss_bytes Peak resident set size of the stage process.',
+        '# TYPE conference_rag_stage_peak_rss_bytes gauge',
+        f'conference_rag_stage_peak_rss_bytes{{{label}}} {int(record["peak_rss_mb"] * 1024 * 1024)}',
+        '# HELP conference_rag_stage_last_run_timestamp_seconds When the stage started.',
+        '# TYPE conference_rag_stage_last_run_timestamp_seconds gauge',
+        f'conference_rag_stage_last_run_timestamp_seconds{{{label}}} {stage_.started:.0f}',
+    ]
+    if stage_.counters:
+        lines += ['# HELP conference_rag_stage_count Stage counters (rows, batches, retries, bytes, tokens).',
+                  '# TYPE conference_rag_stage_count gauge']
+        lines += [f'conference_rag_stage_count{{{label},counter="{_prom_name(k)}"}} {v}'
+                  for k, v in sorted(stage_.counters.items())]
+    if stage_.spans:
+        lines += ['# HELP conference_rag_span_seconds Time spent in a span during the last run of the stage.',
+                  '# TYPE conference_rag_span_seconds gauge']
+        lines += [f'conference_rag_span_seconds{{{label},span="{_prom_name(k)}"}} {v[1]:.4f}'
+                  for k, v in sorted(stage_.spans.items())]
+        lines += ['# HELP conference_rag_span_calls Number of times a span ran during the last run of the stage.',
+                  '# TYPE conference_rag_span_calls gauge']
+        lines += [f'conference_rag_span_calls{{{label},span="{_prom_name(k)}"}} {v[0]}'
+                  for k, v in sorted(stage_.spans.items())]
+
+    # Write then rename so the collector never reads a half-written file
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    tmp = f'{path}.{os.getpid()}.tmp'
+    with open(tmp, 'w', encoding='utf-8') as f:
+        f.write('\n'.join(lines) + '\n')
+    os.replace(tmp, path)
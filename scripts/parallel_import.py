@@ -0,0 +1,304 @@
+"""
+Parallel Import
+===============
+Loads rows into a table with a pool of worker connections and
+checkpoints every completed batch, so an interrupted import resumes
+where it stopped instead of truncating and starting over.
+
+- The pending rows are split into one contiguous shard per worker. A
+  worker that finishes its shard takes batches from the largest one left.
+- Each completed batch (a [start, stop) range of row indexes) is recorded
+  in a JSON manifest, rewritten atomically after every batch.
+- Rows carry deterministic ids and are written with upsert, so a batch
+  that reached the database but not the manifest before a crash is
+  simply written again — no duplicates.
+- After a clean run the caller discard()s the manifest, so the next
+  import of the same input starts fresh instead of finding nothing to do.
+- Batch size and the number of active workers adapt AIMD-style
+  (additive increase, multiplicative decrease): they grow while batches
+  succeed under the latency target and halve on errors or slow batches.
+  A batch that keeps failing is left out of the manifest for the next run.
+
+Usage:
+    from parallel_import import ImportManifest, fingerprint, parallel_upsert
+
+    manifest = ImportManifest(MANIFEST_FILE, fingerprint(rows), len(rows))
+    result = parallel_upsert(get_backend, 'sentence_embeddings', rows, manifest)
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from tqdm import tqdm
+
+import instrumentation as inst
+
+
+WORKERS = 4
+BATCH_SIZE = 100
+MIN_BATCH_SIZE = 10
+MAX_BATCH_SIZE = 1000
+BATCH_STEP = 50              # rows added to the batch size after each fast batch
+TARGET_LATENCY = 2.0         # seconds per batch request
+MAX_ATTEMPTS = 4             # per range, before it is left for the next run
+MAX_BACKOFF = 8.0            # seconds
+
+
+def fingerprint(rows, key='id'):
+    """Identifies the input, so a manifest is only reused for the same rows in the same order."""
+    digest = hashlib.sha256()
+    for row in rows:
+        digest.update(f"{row[key]}\t{row.get('text', '')}\n".encode('utf-8'))
+    return digest.hexdigest()
+
+
+class ImportManifest:
+    """Completed row ranges for one input, persisted to JSON."""
+
+    def __init__(self, path, fingerprint, total):
+        self.path = path
+        self.fingerprint = fingerprint
+        self.total = total
+        self.done = []      # sorted, non-overlapping [start, stop) ranges
+        self.lock = threading.Lock()
+        if os.path.exists(path):
+            with open(path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if data.get('fingerprint') == fingerprint and data.get('total') == total:
+                self.done = [list(r) for r in data.get('done', [])]
+
+    @property
+    def resumed(self):
+        """True for a partly imported input: some batches done, some not."""
+        return bool(self.done) and self.completed() < self.total
+
+    def completed(self):
+        return sum(stop - start for start, stop in self.done)
+
+    def pending(self):
+        """Ranges not yet written, in order."""
+        gaps, position = [], 0
+        for start, stop in self.done:
+            if start > position:
+                gaps.append((position, start))
+            position = stop
+        if position < self.total:
+            gaps.append((position, self.total))
+        return gaps
+
+    def mark(self, start, stop):
+        with self.lock:
+            ranges = sorted(self.done + [[start, stop]])
+            merged = [ranges[0]]
+            for r in ranges[1:]:
+                if r[0] <= merged[-1][1]:
+                    merged[-1][1] = max(merged[-1][1], r[1])
+                else:
+                    merged.append(r)
+            self.done = merged
+            self._save()
+
+    def reset(self):
+        with self.lock:
+            self.done = []
+            self._save()
+
+    def discard(self):
+        """Forget every checkpoint and delete the file (after a clean run, or when the table was wiped)."""
+        with self.lock:
+            self.done = []
+            if os.path.exists(self.path):
+                os.remove(self.path)
+
+    def _save(self):
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        tmp = f'{self.path}.tmp'
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump({'fingerprint': self.fingerprint, 'total': self.total, 'done': self.done}, f)
+        os.replace(tmp, self.path)
+
+
+class AdaptiveTuner:
+    """AIMD control of batch size and active workers from batch latency and errors."""
+
+    def __init__(self, batch_size=BATCH_SIZE, concurrency=WORKERS, max_concurrency=WORKERS,
+                 target_latency=TARGET_LATENCY):
+        self.batch_size = batch_size
+        self.concurrency = min(concurrency, max_concurrency)
+        self.max_concurrency = max_concurrency
+        self.target_latency = target_latency
+        self.streak = 0
+        self.lock = threading.Lock()
+
+    def record(self, seconds, ok):
+        with self.lock:
+            before = (self.batch_size, self.concurrency)
+            if not ok:
+                self.batch_size = max(MIN_BATCH_SIZE, self.batch_size // 2)
+                self.concurrency = max(1, self.concurrency // 2)
+                self.streak = 0
+            elif seconds > self.target_latency:
+                self.batch_size = max(MIN_BATCH_SIZE, self.batch_size // 2)
+                self.streak = 0
+            else:
+                self.batch_size = min(MAX_BATCH_SIZE, self.batch_size + BATCH_STEP)
+                self.streak += 1
+                # One more worker after a full round of fast batches
+                if self.streak >= self.concurrency and self.concurrency < self.max_concurrency:
+                    self.concurrency += 1
+                    self.streak = 0
+            if (self.batch_size, self.concurrency) != before:
+                inst.count('tuner.adjustments')
+
+
+class _Shards:
+    """Hands out [start, stop) batches: each worker drains its own shard, then steals."""
+
+    def __init__(self, pending, workers):
+        total = sum(stop - start for start, stop in pending)
+        size = -(-total // workers) if total else 0
+        self.shards = [[] for _ in range(workers)]
+        shard, room = 0, size
+        for start, stop in pending:
+            while start < stop:
+                take = min(stop - start, room)
+                self.shards[shard].append([start, start + take])
+                start += take
+                room -= take
+                if room == 0 and shard < workers - 1:
+                    shard, room = shard + 1, size
+        self.attempts = {}
+        self.lock = threading.Lock()
+
+    def take(self, worker, batch_size):
+        with self.lock:
+            shard = self.shards[worker]
+            if not shard:
+                shard = max(self.shards, key=lambda s: sum(stop - start for start, stop in s))
+                if not shard:
+                    return None
+            start, stop = shard[0]
+            end = min(stop, start + batch_size)
+            if end == stop:
+                shard.pop(0)
+            else:
+                shard[0][0] = end
+            return start, end
+
+    def give_back(self, worker, start, stop):
+        """Requeue a failed range; returns False once it has used up its attempts."""
+        with self.lock:
+            self.attempts[start] = self.attempts.get(start, 0) + 1
+            if self.attempts[start] >= MAX_ATTEMPTS:
+                return False
+            self.shards[worker].insert(0, [start, stop])
+            return True
+
+
+def parallel_upsert(backend_factory, table, rows, manifest, workers=WORKERS, batch_size=BATCH_SIZE,
+                    on_conflict='id', desc='Importing'):
+    """
+    Upsert every row the manifest doesn't list as done, using `workers`
+    connections from backend_factory(). Returns a summary dict.
+    """
+    pending = manifest.pending()
+    tuner = AdaptiveTuner(batch_size=batch_size, concurrency=workers, max_concurrency=workers)
+    shards = _Shards(pending, workers)
+    gate = threading.Condition()
+    active = [0]
+    stop = threading.Event()
+    result = {'rows': 0, 'failed': 0, 'batches': 0, 'retries': 0}
+    progress = tqdm(total=manifest.total, initial=manifest.completed(), desc=desc)
+    start_time = time.perf_counter()
+
+    def acquire():
+        with gate:
+            gate.wait_for(lambda: active[0] < tuner.concurrency or stop.is_set())
+            active[0] += 1
+
+    def release():
+        with gate:
+            active[0] -= 1
+            gate.notify_all()
+
+    def halt():
+        stop.set()
+        with gate:
+            gate.notify_all()
+
+    def work(worker):
+        try:
+            run(worker)
+        except BaseException:
+            # One worker dying (or Ctrl-C) stops the rest after their current batch
+            halt()
+            raise
+
+    def run(worker):
+        backend = backend_factory()
+        failures = 0
+        while not stop.is_set():
+            acquire()
+            try:
+                batch = shards.take(worker, tuner.batch_size)
+                if batch is None:
+                    return
+                begin, end = batch
+                started = time.perf_counter()
+                try:
+                    with inst.profile('upsert_batch'):
+                        backend.upsert(table, rows[begin:end], on_conflict=on_conflict)
+                except Exception as e:
+                    tuner.record(time.perf_counter() - started, ok=False)
+                    failures += 1
+                    retry = shards.give_back(worker, begin, end)
+                    inst.event('batch_failed', start=begin, stop=end, worker=worker,
+                               retry=retry, error=str(e))
+                    with gate:
+                        if retry:
+                            result['retries'] += 1
+                        else:
+                            result['failed'] += end - begin
+                            tqdm.write(f"Error at rows {begin}-{end} (left for the next run): {e}")
+                    if retry:
+                        inst.count('retries')
+                    else:
+                        inst.count('rows_failed', end - begin)
+                    backoff = min(MAX_BACKOFF, 0.5 * 2 ** (failures - 1))
+                else:
+                    tuner.record(time.perf_counter() - started, ok=True)
+                    failures = 0
+                    backoff = 0
+                    manifest.mark(begin, end)
+                    with gate:
+                        result['rows'] += end - begin
+                        result['batches'] += 1
+                        progress.update(end - begin)
+                    inst.count('rows', end - begin)
+                    inst.count('batches')
+            finally:
+                release()
+            if backoff:
+                time.sleep(backoff)
+
+    try:
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            futures = [pool.submit(work, i) for i in range(workers)]
+            try:
+                for future in futures:
+                    future.result()
+            except BaseException:
+                # Let running batches finish and checkpoint, then stop
+                halt()
+                raise
+    finally:
+        progress.close()
+
+    result.update(seconds=time.perf_counter() - start_time,
+                  mean_batch=result['rows'] // result['batches'] if result['batches'] else 0,
+                  concurrency=tuner.concurrency)
+    return result
@@ -0,0 +1,128 @@
+"""
+Corpus Partitions
+=================
+The corpus is split by language and year so it can grow to many languages
+and decades without every job, and every query, touching all of it.
+
+A pipeline run is limited to one partition with
+
+    CONFERENCE_RAG_PARTITION=spa:2015         one language, one year
+    CONFERENCE_RAG_PARTITION=eng:1990-1999    one language, a range of years
+    CONFERENCE_RAG_PARTITION=eng:0            talks with an unknown year (Steps 3-5)
+
+Steps 2-5 then scrape only that language and those years, keep their
+files under scripts/output/partitions/<key>/, and replace only that
+partition's rows in the database. Step 3 drops talks whose year is
+outside the partition, so a reload always covers every row the partition
+wrote. Unknown years are stored as year 0, in each language's DEFAULT
+partition, and are addressed as lang:0. Without it the scripts behave as
+they always have — English, DEFAULT_START_YEAR-DEFAULT_END_YEAR, files
+directly in scripts/output/ — except that Steps 3 and 5 replace only the
+default years (plus any other years in their input) of the input's
+languages (default_scope()), never the rows of other languages.
+scripts/run_partitions.py runs many partitions in parallel.
+
+In the database, sentence_embeddings is LIST-partitioned by lang and
+RANGE-subpartitioned by decade, and every leaf has its own HNSW index
+(see scripts/01_create_schema.py). The search functions take languages
+and a year range, so Postgres only probes the matching partitions.
+
+Usage:
+    from partitions import current_partition, output_path
+
+    OUTPUT_FILE = output_path('talks.json')
+    partition = current_partition()   # None outside a partitioned run
+"""
+
+import os
+from collections import namedtuple
+
+
+PARTITION_ENV = 'CONFERENCE_RAG_PARTITION'
+OUTPUT_DIR = os.path.join('scripts', 'output')
+DEFAULT_LANG = 'eng'
+DEFAULT_START_YEAR = 2020
+DEFAULT_END_YEAR = 2025
+DECADE = 10   # years per storage partition in the database
+
+
+class Partition(namedtuple('Partition', 'lang start_year end_year')):
+    """One language and an inclusive range of conference years."""
+
+    @property
+    def key(self):
+        years = str(self.start_year) if self.start_year == self.end_year else f'{self.start_year}-{self.end_year}'
+        return f'{self.lang}-{years}'
+
+    def __str__(self):
+        return self.key.replace('-', ':', 1)
+
+    def years(self):
+        return range(self.start_year, self.end_year + 1)
+
+
+def parse_partition(text):
+    """'spa:2015', 'eng:1990-1999' or just 'spa' (default years)."""
+    lang, _, years = text.strip().partition(':')
+    if not lang:
+        raise ValueError(f"Bad partition {text!r} (expected lang:year or lang:start-end)")
+    if not years:
+        return Partition(lang, DEFAULT_START_YEAR, DEFAULT_END_YEAR)
+    start, _, end = years.partition('-')
+    return Partition(lang, int(start), int(end or start))
+
+
+def current_partition():
+    text = os.environ.get(PARTITION_ENV, '')
+    return parse_partition(text) if text else None
+
+
+def output_path(*parts):
+    """Where a step keeps its files: per partition during a partitioned run."""
+    partition = current_partition()
+    if partition is None:
+        return os.path.join(OUTPUT_DIR, *parts)
+    return os.path.join(OUTPUT_DIR, 'partitions', partition.key, *parts)
+
+
+def plan(langs, start_year, end_year, years_per_job=1):
+    """Split languages × years into job-sized partitions."""
+    return [Partition(lang, start, min(end_year, start + years_per_job - 1))
+            for lang in langs
+            for start in range(start_year, end_year + 1, years_per_job)]
+
+
+def decade(year):
+    return year - year % DECADE
+
+
+def year_spans(records):
+    """
+    {lang: (first year, last year)} over the known years, for ensure_partitions().
+    A language with only unknown years (0) gets (0, 0): its tables, no decades.
+    """
+    spans = {}
+    for record in records:
+        lang = record.get('lang', DEFAULT_LANG)
+        year = record.get('year')
+        span = spans.get(lang)
+        if year:
+            spans[lang] = (min(span[0], year), max(span[1], year)) if span else (year, year)
+        else:
+            spans.setdefault(lang, None)
+    return {lang: span or (0, 0) for lang, span in spans.items()}
+
+
+def default_scope(records):
+    """
+    The partitions an unpartitioned run replaces, for each language of its
+    input: DEFAULT_START_YEAR-DEFAULT_END_YEAR widened to the input's years,
+    and lang:0. A re-run with fewer talks still clears what the last one
+    wrote, and other languages' partitions are never touched.
+    """
+    scope = []
+    for lang, (first, last) in year_spans(records).items():
+        scope.append(Partition(lang, min(first or DEFAULT_START_YEAR, DEFAULT_START_YEAR),
+                               max(last, DEFAULT_END_YEAR)))
+        scope.append(Partition(lang, 0, 0))
+    return scope
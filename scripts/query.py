@@ -0,0 +1,186 @@
+"""
+Query the Corpus from Python
+============================
+The app's three search modes (app.js + the Edge Functions) as a command-line
+tool on top of the pipeline backends. With CONFERENCE_RAG_BACKEND=local it
+runs entirely offline against scripts/output/local.db.
+
+Usage:
+    python scripts/query.py keyword "faith"
+    python scripts/query.py semantic "How can I find peace?"
+    python scripts/query.py rag "What have leaders taught about prayer?"
+    python scripts/query.py semantic "fe" --lang spa --years 2015-2019
+
+Searches only the given languages (default: eng) and years, so the
+database probes just those corpus partitions (see scripts/partitions.py).
+
+Prerequisites:
+    - Data imported (Steps 3-5) into the selected backend
+"""
+
+import argparse
+import sys
+import time
+
+import instrumentation as inst
+from backends import get_backend, get_chat_model, get_embedder
+from partitions import DEFAULT_LANG
+from rerank import CANDIDATE_COUNT, Reranker
+
+
+MATCH_COUNT = 20
+TOP_TALKS = 3
+
+reranker = Reranker()
+
+
+def search_scope(langs=None, years=None):
+    """RPC parameters that limit a search to some languages and an inclusive (first, last) year range."""
+    scope = {'langs': list(langs or [DEFAULT_LANG])}
+    if years:
+        scope['year_from'], scope['year_to'] = years
+    return scope
+
+
+def search_sentences(db, embedding, query=None, scope=None):
+    """
+    Two-stage search with a fallback to the single-stage scan, like app.js.
+    With the query text, over-fetches CANDIDATE_COUNT rows and re-ranks them.
+    """
+    fetch = CANDIDATE_COUNT if query else MATCH_COUNT
+    scope = scope or search_scope()
+    results = None
+    try:
+        results = db.rpc('match_sentences_two_stage',
+                         {'query_embedding': embedding, 'talk_count': 25, 'match_count': fetch, **scope})
+    except Exception:
+        pass
+    if not results:
+        results = db.rpc('match_sentences', {'query_embedding': embedding, 'match_count': fetch, **scope})
+    if not query:
+        return results
+    with inst.span('rerank'):
+        return reranker.rerank(query, results, MATCH_COUNT)
+
+
+def group_by_talk(sentences, top=TOP_TALKS):
+    """Port of groupByTalk(): rank talks by average sentence score (re-ranked if available)."""
+    talks = {}
+    for sent in sentences:
+        talk = talks.setdefault(sent['talk_id'], {
+            'talk_id': sent['talk_id'],
+            'title': sent['title'],
+            'speaker': sent['speaker'],
+            'url': sent.get('url'),
+            'sentences': [],
+            'total': 0.0,
+            'score': 0.0,
+        })
+        talk['sentences'].append(sent['text'])
+        talk['total'] += sent['similarity']
+        talk['score'] += sent.get('rerank_score', sent['similarity'])
+
+    ranked = sorted(talks.values(), key=lambda t: t['score'] / len(t['sentences']), reverse=True)[:top]
+    return [{
+        'talk_id': t['talk_id'],
+        'title': t['title'],
+        'speaker': t['speaker'],
+        'url': t['url'],
+        'text': ' '.join(t['sentences']),
+        'avg_similarity': t['total'] / len(t['sentences']),
+    } for t in ranked]
+
+
+def fetch_full_talk_text(db, talks):
+    """Port of fetchFullTalkText(): swap snippets for every sentence of each talk."""
+    full_text = {}
+    for row in db.talk_sentences(t['talk_id'] for t in talks):
+        full_text.setdefault(row['talk_id'], []).append(row['text'])
+    return [dict(t, text=' '.join(full_text[t['talk_id']])) if t['talk_id'] in full_text else t
+            for t in talks]
+
+
+def build_prompt(question, context_talks):
+    """Same prompt as supabase/functions/generate-answer."""
+    talks_context = '\n\n---\n\n'.join(
+        f'Talk {i + 1}: "{talk["title"]}" by {talk["speaker"]}\n{talk["text"]}'
+        for i, talk in enumerate(context_talks)
+    )
+    return f"""You are a helpful assistant answering questions about General Conference talks.
+
+Using ONLY the conference talks provided below, answer the following question. Cite which talks you draw from by mentioning the title and speaker.
+
+Question: {question}
+
+Conference Talks:
+{talks_context}"""
+
+
+def keyword(db, query, scope=None):
+    return db.keyword_search(query, MATCH_COUNT, langs=(scope or search_scope())['langs'])
+
+
+def semantic(db, query, embedder=None, scope=None):
+    embedder = embedder or get_embedder()
+    return search_sentences(db, embedder.embed([query])[0], query, scope)
+
+
+def rag(db, question, embedder=None, chat_model=None, scope=None):
+    """Returns (answer, source talks)."""
+    embedder = embedder or get_embedder()
+    chat_model = chat_model or get_chat_model()
+    with inst.span('embed_question'):
+        embedding = embedder.embed([question])[0]
+    with inst.span('search'):
+        results = search_sentences(db, embedding, question, scope)
+    top_talks = group_by_talk(results)
+    with inst.span('fetch_full_text'):
+        enriched = fetch_full_talk_text(db, top_talks)
+    with inst.span('generate_answer'):
+        answer = chat_model.complete(build_prompt(question, enriched)) if enriched else 'No relevant talks found.'
+    return answer, top_talks
+
+
+def parse_years(text):
+    first, _, last = text.partition('-')
+    return int(first), int(last or first)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Search the conference corpus.')
+    parser.add_argument('mode', choices=['keyword', 'semantic', 'rag'])
+    parser.add_argument('query')
+    parser.add_argument('--lang', action='append', dest='langs',
+                        help=f'language to search (repeatable, default: {DEFAULT_LANG})')
+    parser.add_argument('--years', type=parse_years, help='year range to search, e.g. 2015-2019')
+    args = parser.parse_args()
+
+    db = get_backend()
+    scope = search_scope(args.langs, args.years)
+    start = time.perf_counter()
+
+    if args.mode == 'keyword':
+        rows = keyword(db, args.query, scope)
+        for row in rows:
+            print(f"- {row['title']} ({row['speaker']}): {row['text']}")
+    elif args.mode == 'semantic':
+        rows = semantic(db, args.query, scope=scope)
+        for row in rows:
+            print(f"- [{row['similarity']:.2f}] {row['title']} ({row['speaker']}): {row['text']}")
+    else:
+        answer, talks = rag(db, args.query, scope=scope)
+        print(answer)
+        print("\nSources:")
+        for talk in talks:
+            print(f"- [{talk['avg_similarity']:.2f}] {talk['title']} by {talk['speaker']}")
+        rows = talks
+
+    if not rows:
+        print("No results found.")
+    print(f"\n({(time.perf_counter() - start) * 1000:.0f} ms, backend: {db.name})")
+
+
+if __name__ == '__main__':
+    with inst.stage('query'):
+        status = main()
+    sys.exit(status)
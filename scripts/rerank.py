@@ -0,0 +1,187 @@
+"""
+Re-ranking
+==========
+Second-pass scoring for vector search results. The database over-fetches
+candidates (CANDIDATE_COUNT, by cosine similarity); this module re-scores
+them on the CPU and keeps the best match_count for display and RAG context.
+
+The score blends the vector similarity with cheap lexical signals computed
+over the candidate pool itself, so no corpus statistics are needed:
+
+    boost = W_LEXICAL   * BM25 of the query terms (IDF from the pool), scaled to 0-1
+          + W_COVERAGE  * share of the query terms the sentence contains
+          + W_PROXIMITY * how tightly those terms cluster (1 = adjacent)
+    score = similarity + min(boost, cosine spread of the top match_count)
+                          for a sentence that quotes the query (every term,
+                          adjacent, in any order); similarity otherwise
+
+Word overlap alone is a poor signal for a paraphrased question — its words
+turn up all over the pool, mostly not in the sentence it means — so an
+ungated boost made held-out queries rank far worse than plain cosine. The
+gate and the cap lift a quoted sentence into the results without pushing
+its semantic neighbours out (see scripts/bench_rerank.py).
+
+Candidates are tokenized and scored in batches, best-cosine first, against
+a latency budget that covers the whole rerank() call. If the budget runs
+out, the unscored tail keeps its cosine order after the re-scored head, so
+a slow query degrades to plain vector search instead of blocking. Results
+are cached per (query, candidate set).
+
+app.js has the same scorer (rerankSentences) for the browser.
+
+Usage:
+    from rerank import Reranker
+
+    reranker = Reranker()
+    top = reranker.rerank("How can I find peace?", candidates, match_count=20)
+"""
+
+import math
+import re
+import time
+from collections import OrderedDict
+
+
+CANDIDATE_COUNT = 200    # rows fetched from match_sentences before re-ranking
+BATCH_SIZE = 50          # candidates scored between budget checks
+BUDGET_MS = 30           # per query
+CACHE_SIZE = 256         # queries
+
+W_LEXICAL = 0.15
+W_COVERAGE = 0.10
+W_PROXIMITY = 0.10
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+STOPWORDS = frozenset('''
+a an and are as at be but by can did do does for from had has have how i if in into is it its
+me my of on or our so than that the their them then there these they this to us was we were
+what when where which who why will with would you your
+'''.split())
+
+_TOKEN = re.compile(r"[a-z0-9]+(?:'[a-z]+)?")
+_SUFFIXES = ('ing', 'ed', 'es', 's', 'ly')
+
+
+def stem(word):
+    """Crude suffix stripping: enough to match pray/prayed/prays, cheap enough for every query."""
+    if word.endswith("'s"):
+        word = word[:-2]
+    for suffix in _SUFFIXES:
+        if len(word) > len(suffix) + 3 and word.endswith(suffix):
+            return word[:-len(suffix)]
+    return word
+
+
+def tokenize(text):
+    """Stemmed content words with their positions in the sentence."""
+    return [(i, stem(w)) for i, w in enumerate(_TOKEN.findall(text.lower())) if w not in STOPWORDS]
+
+
+def query_terms(query):
+    return list(dict.fromkeys(term for _, term in tokenize(query)))
+
+
+def min_window(positions):
+    """Shortest span of token positions that includes every term in `positions` (term → sorted list)."""
+    events = sorted((p, term) for term, plist in positions.items() for p in plist)
+    need = len(positions)
+    seen = {}
+    best = math.inf
+    left = 0
+    for pos, term in events:
+        seen[term] = seen.get(term, 0) + 1
+        while len(seen) == need:
+            best = min(best, pos - events[left][0] + 1)
+            left_term = events[left][1]
+            seen[left_term] -= 1
+            if not seen[left_term]:
+                del seen[left_term]
+            left += 1
+    return best
+
+
+class Reranker:
+    """Lexical + proximity re-scorer with a per-query latency budget and an LRU cache."""
+
+    def __init__(self, budget_ms=BUDGET_MS, batch_size=BATCH_SIZE, cache_size=CACHE_SIZE):
+        self.budget = budget_ms / 1000
+        self.batch_size = batch_size
+        self.cache_size = cache_size
+        self.cache = OrderedDict()
+        self.stats = {'queries': 0, 'cache_hits': 0, 'budget_exhausted': 0}
+
+    def rerank(self, query, candidates, match_count=20):
+        """Best match_count candidates by blended score; each gets a 'rerank_score'."""
+        deadline = time.perf_counter() + self.budget
+        self.stats['queries'] += 1
+        key = (' '.join(query.lower().split()), tuple(c.get('id') or c['text'] for c in candidates), match_count)
+        if key in self.cache:
+            self.stats['cache_hits'] += 1
+            self.cache.move_to_end(key)
+            return self.cache[key][:match_count]
+
+        ranked = self._score(query, candidates, match_count, deadline)
+        self.cache[key] = ranked
+        if len(self.cache) > self.cache_size:
+            self.cache.popitem(last=False)
+        return ranked[:match_count]
+
+    def _score(self, query, candidates, match_count, deadline):
+        terms = query_terms(query)
+        term_set = set(terms)
+        ordered = sorted(candidates, key=lambda c: c['similarity'], reverse=True)
+        if not terms or not ordered:
+            return [dict(c, rerank_score=c['similarity']) for c in ordered]
+
+        # Tokenize in batches until the budget runs out; the pool defines IDF and length norms
+        docs = []
+        exhausted = False
+        for start in range(0, len(ordered), self.batch_size):
+            if start and time.perf_counter() > deadline:
+                exhausted = True
+                break
+            for candidate in ordered[start:start + self.batch_size]:
+                tokens = tokenize(candidate['text'])
+                positions = {}
+                for pos, term in tokens:
+                    if term in term_set:
+                        positions.setdefault(term, []).append(pos)
+                docs.append((candidate, len(tokens), positions))
+
+        n = len(docs)
+        avg_len = sum(length for _, length, _ in docs) / n or 1
+        df = {t: sum(1 for _, _, positions in docs if t in positions) for t in terms}
+        idf = {t: math.log(1 + (n - df[t] + 0.5) / (df[t] + 0.5)) for t in terms}
+
+        # Score in batches too, so the budget bounds the whole call
+        parts = []
+        for start in range(0, n, self.batch_size):
+            if start and time.perf_counter() > deadline:
+                exhausted = True
+                break
+            for candidate, length, positions in docs[start:start + self.batch_size]:
+                norm = BM25_K1 * (1 - BM25_B + BM25_B * length / avg_len)
+                lexical = sum(idf[t] * len(p) * (BM25_K1 + 1) / (len(p) + norm) for t, p in positions.items())
+                matched = len(positions)
+                proximity = matched / min_window(positions) if matched > 1 else 0.0
+                parts.append((candidate, lexical, matched, proximity))
+        if exhausted:
+            self.stats['budget_exhausted'] += 1
+        top_bm25 = max(lexical for _, lexical, _, _ in parts) or 1
+        head = ordered[:max(match_count, 1)]
+        spread = head[0]['similarity'] - head[-1]['similarity']
+
+        scored = []
+        for candidate, lexical, matched, proximity in parts:
+            boost = 0.0
+            if matched == len(terms) and (matched == 1 or proximity == 1):
+                boost = min(W_LEXICAL * lexical / top_bm25
+                            + W_COVERAGE * matched / len(terms)
+                            + W_PROXIMITY * proximity, spread)
+            scored.append(dict(candidate, rerank_score=candidate['similarity'] + boost))
+        scored.sort(key=lambda c: c['rerank_score'], reverse=True)
+
+        # Anything the budget didn't reach keeps its vector order after the re-scored head
+        tail = [dict(c, rerank_score=c['similarity']) for c in ordered[len(parts):]]
+        return scored + tail
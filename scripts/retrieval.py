@@ -0,0 +1,158 @@
+"""
+Local Retrieval Engine
+======================
+In-process vector search over the corpus store, mirroring the SQL functions
+in scripts/01_create_schema.py so retrieval changes can be measured without
+a database.
+
+Two strategies:
+
+    search()            — single stage: score every sentence (match_sentences)
+    search_two_stage()  — coarse-to-fine: rank talk centroids first, then
+                          re-rank only the sentences of the top talk_count
+                          talks (match_sentences_two_stage)
+
+A talk centroid is the normalized mean of its sentence vectors. Talks with
+many moderately similar sentences score well at the talk level even when
+no single sentence makes the global top 20.
+
+search_partitions() runs either strategy over several engines — one per
+corpus partition (language, year) — and merges the results, like a
+partitioned table's Merge Append: only the partitions passed in are probed.
+
+Usage:
+    from retrieval import LocalSearchEngine
+
+    engine = LocalSearchEngine.from_store()
+    engine.search_two_stage(query_vector, talk_count=25, match_count=20)
+"""
+
+import numpy as np
+
+from corpus_store import CorpusStore, EMBEDDINGS_STORE
+
+
+TALK_COUNT = 25   # talks kept by the coarse stage
+MATCH_COUNT = 20  # sentences returned, same as match_sentences
+
+
+def normalize_rows(matrix):
+    """L2-normalize each row so a dot product is cosine similarity."""
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1
+    return matrix / norms
+
+
+def talk_centroids(talk_ids, matrix):
+    """
+    Mean sentence vector per talk, normalized.
+
+    talk_ids[i] is the talk of matrix row i. Returns (ordered unique talk ids,
+    centroid matrix with one row per talk, in that order).
+    """
+    order = list(dict.fromkeys(talk_ids))
+    position = {talk_id: i for i, talk_id in enumerate(order)}
+    groups = np.fromiter((position[t] for t in talk_ids), dtype=np.int64, count=len(talk_ids))
+    sums = np.zeros((len(order), matrix.shape[1]), dtype=np.float64)
+    np.add.at(sums, groups, matrix)
+    return order, normalize_rows(sums).astype(np.float32)
+
+
+def _top(scores, k):
+    """Indices of the k highest scores, best first."""
+    k = min(k, len(scores))
+    if k <= 0:
+        return np.array([], dtype=np.int64)
+    idx = np.argpartition(-scores, k - 1)[:k]
+    return idx[np.argsort(-scores[idx])]
+
+
+class LocalSearchEngine:
+    """Sentence + talk-centroid vectors held in memory as normalized float32."""
+
+    def __init__(self, records, matrix):
+        self.records = records
+        self.matrix = normalize_rows(np.asarray(matrix, dtype=np.float32))
+        talk_ids = [r['talk_id'] for r in records]
+        self.talk_ids, self.centroids = talk_centroids(talk_ids, self.matrix)
+        rows = {}
+        for i, talk_id in enumerate(talk_ids):
+            rows.setdefault(talk_id, []).append(i)
+        self.talk_rows = [np.array(rows[t], dtype=np.int64) for t in self.talk_ids]
+
+    @classmethod
+    def from_store(cls, path=EMBEDDINGS_STORE):
+        with CorpusStore(path) as store:
+            return cls(store.records(embeddings=False), store.embedding_matrix())
+
+    def _results(self, rows, scores, talk_scores=None):
+        results = []
+        for row, score in zip(rows, scores):
+            record = self.records[row]
+            result = {
+                'id': record.get('id'),
+                'talk_id': record['talk_id'],
+                'title': record.get('title'),
+                'speaker': record.get('speaker'),
+                'url': record.get('url'),
+                'text': record['text'],
+                'similarity': float(score),
+            }
+            if talk_scores is not None:
+                result['talk_similarity'] = talk_scores[record['talk_id']]
+            results.append(result)
+        return results
+
+    def _query(self, query):
+        q = np.asarray(query, dtype=np.float32)
+        norm = np.linalg.norm(q)
+        return q / norm if norm else q
+
+    def search(self, query, match_count=MATCH_COUNT):
+        """Exact scan over every sentence vector."""
+        scores = self.matrix @ self._query(query)
+        rows = _top(scores, match_count)
+        return self._results(rows, scores[rows])
+
+    def top_talks(self, query, talk_count=TALK_COUNT):
+        """(talk indexes, their centroid scores), best first."""
+        talk_scores = self.centroids @ self._query(query)
+        top = _top(talk_scores, talk_count)
+        return top, talk_scores[top]
+
+    def search_talks(self, query, talks, talk_scores, match_count=MATCH_COUNT):
+        """Top match_count sentences from the given talk indexes."""
+        q = self._query(query)
+        rows = np.concatenate([self.talk_rows[t] for t in talks]) if len(talks) else np.array([], dtype=np.int64)
+        scores = self.matrix[rows] @ q
+        best = _top(scores, match_count)
+        similarities = {self.talk_ids[t]: float(score) for t, score in zip(talks, talk_scores)}
+        return self._results(rows[best], scores[best], similarities)
+
+    def search_two_stage(self, query, talk_count=TALK_COUNT, match_count=MATCH_COUNT):
+        """Top talk_count talks by centroid, then top match_count sentences within them."""
+        talks, talk_scores = self.top_talks(query, talk_count)
+        return self.search_talks(query, talks, talk_scores, match_count)
+
+
+def search_partitions(engines, query, match_count=MATCH_COUNT, talk_count=None):
+    """
+    Search several partition engines as one corpus. With talk_count, the
+    coarse stage picks the best talk_count talks across all partitions,
+    then each partition scores the sentences of its chosen talks.
+    """
+    if talk_count is None:
+        results = [r for engine in engines for r in engine.search(query, match_count)]
+    else:
+        candidates = []
+        for e, engine in enumerate(engines):
+            talks, scores = engine.top_talks(query, talk_count)
+            candidates += [(float(score), e, int(t)) for t, score in zip(talks, scores)]
+        chosen = {}
+        for score, e, t in sorted(candidates, reverse=True)[:talk_count]:
+            chosen.setdefault(e, ([], []))
+            chosen[e][0].append(t)
+            chosen[e][1].append(score)
+        results = [r for e, (talks, scores) in chosen.items()
+                   for r in engines[e].search_talks(query, talks, scores, match_count)]
+    return sorted(results, key=lambda r: r['similarity'], reverse=True)[:match_count]
@@ -0,0 +1,128 @@
+"""
+Offline End-to-End Run
+======================
+Runs the whole pipeline against the local backend (SQLite + fake embedder
++ fake chat model) in a scratch workspace, then exercises the keyword,
+semantic and RAG query paths. Prints wall time per stage, so it doubles as
+a repeatable throughput benchmark.
+
+Scraping needs the network, so Step 2 is replaced by a synthetic corpus
+(or pass --talks-file to reuse a real scripts/output/talks.json). Your own
+scripts/output/ is never touched.
+
+Usage:
+    python scripts/run_offline.py
+    python scripts/run_offline.py --talks 300 --keep
+    python scripts/run_offline.py --talks-file scripts/output/talks.json
+"""
+
+import argparse
+import json
+import os
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+
+SCRIPTS_DIR = os.path.dirname(os.path.abspath(__file__))
+
+STAGES = [
+    ('schema', ['01_create_schema.py']),
+    ('analytics schema', ['06_create_analytics.py']),
+    ('dedup', ['02b_dedup_talks.py']),
+    ('import', ['03_import_data.py']),
+    ('embed', ['04_embed_data.py']),
+    ('load embeddings', ['05_update_embeddings.py']),
+    ('keyword query', ['query.py', 'keyword', 'faith']),
+    ('semantic query', ['query.py', 'semantic', 'How can I find peace in hard times?']),
+    ('rag query', ['query.py', 'rag', 'What have leaders taught about prayer?']),
+]
+
+WORDS = ('faith hope charity prayer temple covenant family Savior love service repentance '
+         'grace peace light truth scripture revelation prophet mercy joy forgiveness').split()
+
+
+def synthetic_talks(count, seed=0):
+    """Talks shaped like 02_scrape_data.py output, with sentences the splitter understands."""
+    rng = random.Random(seed)
+    talks = []
+    for i in range(count):
+        focus = rng.sample(WORDS, 3)
+        sentences = []
+        for _ in range(rng.randint(40, 90)):
+            words = [rng.choice(focus if rng.random() < 0.4 else WORDS) for _ in range(rng.randint(8, 20))]
+            sentences.append(' '.join(words).capitalize() + '.')
+        year = 2020 + i % 6
+        month = '04' if i % 2 else '10'
+        talks.append({
+            'title': f'On {focus[0].capitalize()} and {focus[1].capitalize()}',
+            'speaker': f'Speaker {i % 40}',
+            'calling': 'Of the Quorum',
+            'year': year,
+            'season': 'April' if month == '04' else 'October',
+            'url': f'https://www.churchofjesuschrist.org/study/general-conference/{year}/{month}/talk-{i}?lang=eng',
+            'text': ' '.join(sentences),
+        })
+    return talks
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Run the pipeline end to end without network or keys.')
+    parser.add_argument('--talks', type=int, default=100, help='synthetic talks to generate')
+    parser.add_argument('--talks-file', help='use an existing talks.json instead of synthetic talks')
+    parser.add_argument('--workdir', help='workspace directory (default: a temp dir)')
+    parser.add_argument('--keep', action='store_true', help='keep the workspace afterwards')
+    args = parser.parse_args()
+
+    workdir = args.workdir or tempfile.mkdtemp(prefix='conference-rag-')
+    output_dir = os.path.join(workdir, 'scripts', 'output')
+    os.makedirs(output_dir, exist_ok=True)
+
+    if args.talks_file:
+        shutil.copy(args.talks_file, os.path.join(output_dir, 'talks.json'))
+    else:
+        with open(os.path.join(output_dir, 'talks.json'), 'w', encoding='utf-8') as f:
+            json.dump(synthetic_talks(args.talks), f, ensure_ascii=False)
+
+    env = dict(os.environ, CONFERENCE_RAG_BACKEND='local', PYTHONUNBUFFERED='1')
+
+    print("=" * 60)
+    print("Offline Pipeline Run")
+    print("=" * 60)
+    print(f"   Workspace: {workdir}\n")
+
+    timings = []
+    failed = None
+    for name, command in STAGES:
+        start = time.perf_counter()
+        result = subprocess.run(
+            [sys.executable, os.path.join(SCRIPTS_DIR, command[0]), *command[1:]],
+            cwd=workdir, env=env, capture_output=True, text=True,
+        )
+        elapsed = time.perf_counter() - start
+        timings.append((name, elapsed, result.returncode))
+        print(f"   {'✅' if result.returncode == 0 else '❌'} {name:18} {elapsed:7.2f}s")
+        if result.returncode != 0:
+            failed = (name, result)
+            break
+
+    if failed:
+        name, result = failed
+        print(f"\n❌ Stage '{name}' failed:\n")
+        print((result.stdout + result.stderr)[-3000:])
+    else:
+        print(f"\n   Total: {sum(t for _, t, _ in timings):.2f}s")
+        print("\n✅ Offline pipeline completed end to end.")
+
+    if args.keep or args.workdir:
+        print(f"   Workspace kept at {workdir}")
+    else:
+        shutil.rmtree(workdir, ignore_errors=True)
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
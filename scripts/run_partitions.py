@@ -0,0 +1,127 @@
+"""
+Partitioned Pipeline Run
+========================
+Runs Steps 2-5 once per language/year partition (see scripts/partitions.py),
+several partitions at a time. Each job only scrapes, embeds and replaces
+its own slice of the corpus, so adding a language or a decade doesn't
+mean re-running everything, and a failed job can be re-run on its own.
+
+Stages run in order within a partition; partitions run in parallel
+(--jobs). The database partitions for every language and year are created
+once up front, so parallel jobs never race to create the same one. Each
+stage's output is logged to scripts/output/partitions/<key>/logs/<stage>.log.
+
+Usage:
+    python scripts/run_partitions.py --langs eng,spa --start-year 2015 --end-year 2024
+    python scripts/run_partitions.py --langs por --start-year 1990 --end-year 1999 --years-per-job 10
+    python scripts/run_partitions.py --langs eng --stages embed,load --jobs 2
+
+Prerequisites:
+    - Step 1 (01_create_schema.py) run against the target database
+    - The same keys/backend the individual steps need
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from backends import get_backend
+from partitions import DEFAULT_END_YEAR, DEFAULT_LANG, DEFAULT_START_YEAR, OUTPUT_DIR, PARTITION_ENV, plan
+
+
+SCRIPTS_DIR = os.path.dirname(os.path.abspath(__file__))
+
+STAGES = {
+    'scrape': ['02_scrape_data.py'],
+    'dedup': ['02b_dedup_talks.py'],
+    'import': ['03_import_data.py'],
+    'embed': ['04_embed_data.py'],
+    'load': ['05_update_embeddings.py'],
+}
+
+
+def run_partition(partition, stages, import_workers):
+    """Run the stages for one partition; stops at the first failure. Returns [(stage, seconds, returncode)]."""
+    env = dict(os.environ, PYTHONUNBUFFERED='1')
+    env[PARTITION_ENV] = str(partition)
+    log_dir = os.path.join(OUTPUT_DIR, 'partitions', partition.key, 'logs')
+    os.makedirs(log_dir, exist_ok=True)
+
+    results = []
+    for stage in stages:
+        command = [sys.executable, os.path.join(SCRIPTS_DIR, STAGES[stage][0]), *STAGES[stage][1:]]
+        if stage == 'import' and import_workers:
+            command += ['--workers', str(import_workers)]
+        start = time.perf_counter()
+        with open(os.path.join(log_dir, f'{stage}.log'), 'w', encoding='utf-8') as log:
+            returncode = subprocess.run(command, env=env, stdout=log, stderr=subprocess.STDOUT).returncode
+        results.append((stage, time.perf_counter() - start, returncode))
+        if returncode != 0:
+            break
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Run the pipeline per language/year partition.')
+    parser.add_argument('--langs', default=DEFAULT_LANG, help='comma-separated language codes (e.g. eng,spa,por)')
+    parser.add_argument('--start-year', type=int, default=DEFAULT_START_YEAR)
+    parser.add_argument('--end-year', type=int, default=DEFAULT_END_YEAR)
+    parser.add_argument('--years-per-job', type=int, default=1)
+    parser.add_argument('--stages', default=','.join(STAGES),
+                        help=f"comma-separated subset of: {', '.join(STAGES)}")
+    parser.add_argument('--jobs', type=int, default=4, help='partitions to run at once')
+    parser.add_argument('--import-workers', type=int, help='--workers for each import job')
+    args = parser.parse_args()
+
+    stages = [s.strip() for s in args.stages.split(',') if s.strip()]
+    unknown = [s for s in stages if s not in STAGES]
+    if not stages:
+        parser.error("no stages given")
+    if unknown:
+        parser.error(f"unknown stage(s): {', '.join(unknown)}")
+    langs = [lang.strip() for lang in args.langs.split(',') if lang.strip()]
+    partitions = plan(langs, args.start_year, args.end_year, args.years_per_job)
+
+    print("=" * 60)
+    print(f"Partitioned Pipeline Run ({len(partitions)} partitions, {args.jobs} at a time)")
+    print("=" * 60)
+    print(f"   Stages: {', '.join(stages)}\n")
+
+    if {'import', 'load'} & set(stages):
+        try:
+            backend = get_backend()
+            for lang in langs:
+                backend.ensure_partitions(lang, args.start_year, args.end_year)
+        except Exception as e:
+            print(f"❌ Could not create the database partitions: {e}")
+            return 1
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.jobs) as pool:
+        futures = {p: pool.submit(run_partition, p, stages, args.import_workers) for p in partitions}
+        outcomes = {}
+        for partition, future in futures.items():
+            outcomes[partition] = future.result()
+            results = outcomes[partition]
+            ok = results and results[-1][2] == 0 and len(results) == len(stages)
+            detail = ', '.join(f"{stage} {seconds:.1f}s" for stage, seconds, _ in results)
+            print(f"   {'✅' if ok else '❌'} {str(partition):16} {detail}")
+
+    failed = [p for p, results in outcomes.items() if not results or results[-1][2] != 0]
+    print(f"\n   Total: {time.perf_counter() - start:.2f}s")
+    if failed:
+        print(f"\n❌ {len(failed)} partition(s) failed:")
+        for partition in failed:
+            stage = outcomes[partition][-1][0]
+            print(f"   {partition}: {stage} — see "
+                  f"{os.path.join(OUTPUT_DIR, 'partitions', partition.key, 'logs', f'{stage}.log')}")
+        return 1
+    print("\n✅ All partitions completed.")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,91 @@
+import { createClient } from 'https://esm.sh/@supabase/supabase-js@2'
+
+// Buffered analytics ingestion.
+//
+// Each request used to insert straight into question_analytics and
+// citation_analytics before returning. Instead, events are queued in memory
+// for the lifetime of the isolate and written to the analytics_events queue
+// table in ONE batched insert once the buffer is full or old enough.
+// scripts/compact_analytics.py later rolls the queue into the analytics tables.
+
+export interface Citation {
+  talk_id: string
+  title: string
+  speaker: string
+}
+
+export interface AnalyticsEvent {
+  search_type: 'keyword' | 'semantic' | 'rag'
+  question?: string
+  citations?: Citation[]
+}
+
+const FLUSH_SIZE = Number(Deno.env.get('ANALYTICS_FLUSH_SIZE') ?? 50)
+const FLUSH_INTERVAL_MS = Number(Deno.env.get('ANALYTICS_FLUSH_INTERVAL_MS') ?? 2000)
+
+type QueuedEvent = Required<AnalyticsEvent> & { created_at: string }
+
+let buffer: QueuedEvent[] = []
+let flushTimer: ReturnType<typeof setTimeout> | null = null
+let timerDone: (() => void) | null = null
+
+const adminClient = createClient(
+  Deno.env.get('SUPABASE_URL') ?? '',
+  Deno.env.get('SUPABASE_SERVICE_ROLE_KEY') ?? ''
+)
+
+// Keep the isolate alive until background work settles (no-op outside Supabase)
+function runInBackground(promise: Promise<unknown>) {
+  // deno-lint-ignore no-explicit-any
+  const runtime = (globalThis as any).EdgeRuntime
+  if (runtime?.waitUntil) runtime.waitUntil(promise)
+}
+
+async function flush() {
+  // A size-triggered flush supersedes the pending timer
+  if (flushTimer !== null) {
+    clearTimeout(flushTimer)
+    flushTimer = null
+    timerDone?.()
+    timerDone = null
+  }
+  if (!buffer.length) return
+
+  const rows = buffer
+  buffer = []
+  // Errors must never reach the request path — analytics are best-effort
+  try {
+    const { error } = await adminClient.from('analytics_events').insert(rows)
+    if (error) console.error('Analytics flush failed:', error.message)
+  } catch (err) {
+    console.error('Analytics flush failed:', err)
+  }
+}
+
+// Queue an event; returns immediately without touching the database
+export function enqueueAnalytics(event: AnalyticsEvent) {
+  buffer.push({
+    search_type: event.search_type,
+    question: event.question ?? null,
+    citations: event.citations ?? [],
+    created_at: new Date().toISOString(),
+  } as QueuedEvent)
+
+  if (buffer.length >= FLUSH_SIZE) {
+    runInBackground(flush())
+  } else if (flushTimer === null) {
+    runInBackground(new Promise<void>((resolve) => {
+      timerDone = resolve
+      flushTimer = setTimeout(() => {
+        flushTimer = null
+        timerDone = null
+        flush().then(resolve)
+      }, FLUSH_INTERVAL_MS)
+    }))
+  }
+}
+
+// Drain whatever is left when the runtime shuts the isolate down
+addEventListener('beforeunload', () => {
+  runInBackground(flush())
+})
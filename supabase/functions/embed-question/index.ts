@@ -1,4 +1,5 @@
 import { corsHeaders } from '../_shared/cors.ts'
+import { enqueueAnalytics } from '../_shared/analytics.ts'
 import { createClient } from 'https://esm.sh/@supabase/supabase-js@2'
 
 Deno.serve(async (req) => {
@@ -61,16 +62,8 @@ Deno.serve(async (req) => {
       headers: { ...corsHeaders, 'Content-Type': 'application/json' },
     })
 
-    // Fire-and-forget: log question to analytics (errors must not affect the response)
-    try {
-      const adminClient = createClient(
-        Deno.env.get('SUPABASE_URL') ?? '',
-        Deno.env.get('SUPABASE_SERVICE_ROLE_KEY') ?? ''
-      )
-      await adminClient.from('question_analytics').insert({ search_type: searchType, question })
-    } catch (analyticsErr) {
-      console.error('Analytics write failed:', analyticsErr)
-    }
+    // Buffered: queued in memory and flushed in batches off the request path
+    enqueueAnalytics({ search_type: searchType, question })
 
     return response
   } catch (err) {
@@ -1,4 +1,5 @@
 import { corsHeaders } from '../_shared/cors.ts'
+import { enqueueAnalytics } from '../_shared/analytics.ts'
 import { createClient } from 'https://esm.sh/@supabase/supabase-js@2'
 
 Deno.serve(async (req) => {
@@ -75,25 +76,16 @@ ${talksContext}`
       headers: { ...corsHeaders, 'Content-Type': 'application/json' },
     })
 
-    // Fire-and-forget: log citations and question to analytics
-    try {
-      const adminClient = createClient(
-        Deno.env.get('SUPABASE_URL') ?? '',
-        Deno.env.get('SUPABASE_SERVICE_ROLE_KEY') ?? ''
-      )
-      const citationRows = context_talks.map((talk: { title: string; speaker: string; talk_id?: string }) => ({
-        search_type: 'rag',
+    // Buffered: question + citations travel as ONE queued event
+    enqueueAnalytics({
+      search_type: 'rag',
+      question,
+      citations: context_talks.map((talk: { title: string; speaker: string; talk_id?: string }) => ({
         talk_id: talk.talk_id ?? talk.title,
         title: talk.title,
         speaker: talk.speaker,
-      }))
-      await Promise.all([
-        adminClient.from('citation_analytics').insert(citationRows),
-        adminClient.from('question_analytics').insert({ search_type: 'rag', question }),
-      ])
-    } catch (analyticsErr) {
-      console.error('Analytics write failed:', analyticsErr)
-    }
+      })),
+    })
 
     return response
   } catch (err) {
@@ -0,0 +1,7 @@
+"""The pipeline steps import their helpers as top-level modules from scripts/."""
+
+import os
+import sys
+
+SCRIPTS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'scripts')
+sys.path.insert(0, SCRIPTS_DIR)
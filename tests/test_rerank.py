@@ -0,0 +1,39 @@
+"""
+Re-ranking must help quoted queries and never hurt held-out ones, on the
+synthetic corpus of scripts/bench_rerank.py (smaller, so it runs quickly).
+"""
+
+import numpy as np
+import pytest
+
+from bench_rerank import ConceptEmbedder, hits, make_queries, summarize, synthetic_corpus
+from rerank import CANDIDATE_COUNT, Reranker
+from retrieval import MATCH_COUNT, LocalSearchEngine
+
+
+def ranks(seed, paraphrase, sentences=5000, vocabulary=1000, queries=150):
+    rng = np.random.default_rng(seed)
+    embedder = ConceptEmbedder(vocabulary, rng)
+    records = synthetic_corpus(sentences, vocabulary, rng)
+    matrix = embedder.embed(r['text'] for r in records)
+    matrix += rng.standard_normal(matrix.shape).astype(np.float32) * 0.03
+    engine = LocalSearchEngine(records, matrix)
+    reranker = Reranker(budget_ms=10_000)
+    found = {'vector': [], 'rerank': []}
+    for text, target in make_queries(records, queries, paraphrase, rng):
+        candidates = engine.search(embedder.embed([text])[0], CANDIDATE_COUNT)
+        found['vector'].append(hits(candidates[:MATCH_COUNT], target))
+        found['rerank'].append(hits(reranker.rerank(text, candidates, MATCH_COUNT), target))
+    return summarize(found['vector']), summarize(found['rerank'])
+
+
+@pytest.mark.parametrize('seed', [0, 1, 2])
+def test_held_out_queries_keep_vector_quality(seed):
+    vector, rerank = ranks(seed, paraphrase=1)
+    assert rerank[2] >= vector[2]          # hit@MATCH_COUNT
+    assert rerank[3] >= vector[3] - 1e-9   # MRR
+
+
+def test_quoted_queries_improve():
+    vector, rerank = ranks(0, paraphrase=0)
+    assert rerank[3] > vector[3] + 0.1
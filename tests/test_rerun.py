@@ -0,0 +1,118 @@
+"""
+Re-running Steps 3-5 on a different talks.json must leave exactly the new
+corpus in the embeddings store, the JSON outputs and the database — nothing
+carried over from the previous run, and no stale vector for changed text —
+while rows another partition loaded stay put.
+"""
+
+import json
+import os
+import sqlite3
+import subprocess
+import sys
+
+from conftest import SCRIPTS_DIR
+from partitions import parse_partition
+from run_offline import synthetic_talks
+
+STEPS = ['01_create_schema.py', '02b_dedup_talks.py', '03_import_data.py',
+         '04_embed_data.py', '05_update_embeddings.py']
+
+
+def run_pipeline(workdir, talks, partition=None):
+    output = os.path.join(workdir, 'scripts', 'output')
+    if partition:
+        output = os.path.join(output, 'partitions', parse_partition(partition).key)
+    os.makedirs(output, exist_ok=True)
+    with open(os.path.join(output, 'talks.json'), 'w', encoding='utf-8') as f:
+        json.dump(talks, f)
+    env = dict(os.environ, CONFERENCE_RAG_BACKEND='local', PYTHONUNBUFFERED='1')
+    env.pop('CONFERENCE_RAG_PARTITION', None)
+    if partition:
+        env['CONFERENCE_RAG_PARTITION'] = partition
+    for step in STEPS:
+        result = subprocess.run([sys.executable, os.path.join(SCRIPTS_DIR, step)],
+                                cwd=workdir, env=env, capture_output=True, text=True)
+        assert result.returncode == 0, f"{step} failed:\n{result.stdout[-2000:]}{result.stderr[-2000:]}"
+
+
+def outputs(workdir):
+    output = os.path.join(workdir, 'scripts', 'output')
+    with open(os.path.join(output, 'sentences.json'), encoding='utf-8') as f:
+        sentences = {(r['talk_id'], r['sentence_num']): r['text'] for r in json.load(f)}
+    with open(os.path.join(output, 'sentences_with_embeddings.json'), encoding='utf-8') as f:
+        embedded = json.load(f)
+    with open(os.path.join(output, 'talk_embeddings.json'), encoding='utf-8') as f:
+        talks = json.load(f)
+    conn = sqlite3.connect(os.path.join(output, 'local.db'))
+    rows = conn.execute("SELECT talk_id, sentence_num, text, embedding FROM sentence_embeddings").fetchall()
+    talk_rows = conn.execute("SELECT talk_id FROM talk_embeddings").fetchall()
+    conn.close()
+    return sentences, embedded, talks, rows, talk_rows
+
+
+def test_rerun_on_fewer_talks_keeps_only_current_sentences(tmp_path):
+    workdir = str(tmp_path)
+    run_pipeline(workdir, synthetic_talks(12))
+    first, *_ = outputs(workdir)
+
+    run_pipeline(workdir, synthetic_talks(6))
+    sentences, embedded, talks, rows, talk_rows = outputs(workdir)
+
+    assert 0 < len(sentences) < len(first)
+    assert {(r['talk_id'], r['sentence_num']): r['text'] for r in embedded} == sentences
+    assert len(embedded) == len(sentences)
+    assert {(t, n): text for t, n, text, _ in rows} == sentences
+    assert len(rows) == len(sentences)
+    talk_ids = {t for t, _ in sentences}
+    assert {t['talk_id'] for t in talks} == talk_ids
+    assert {t for (t,) in talk_rows} == talk_ids
+
+
+def test_rerun_with_changed_text_re_embeds_it(tmp_path):
+    from backends import FakeEmbedder
+
+    workdir = str(tmp_path)
+    talks = synthetic_talks(4)
+    run_pipeline(workdir, talks)
+    before, *_ = outputs(workdir)
+
+    first_sentence = talks[0]['text'].split('. ')[0]
+    talks[0]['text'] = talks[0]['text'].replace(first_sentence, 'Entirely new words about gratitude', 1)
+    run_pipeline(workdir, talks)
+    sentences, embedded, _, rows, _ = outputs(workdir)
+
+    changed = [key for key, text in sentences.items() if before.get(key) != text]
+    assert changed
+    assert {(t, n): text for t, n, text, _ in rows} == sentences
+    by_key = {(r['talk_id'], r['sentence_num']): r for r in embedded}
+    expected = FakeEmbedder().embed([sentences[key] for key in changed])
+    for key, vector in zip(changed, expected):
+        assert by_key[key]['text'] == sentences[key]
+        assert max(abs(a - b) for a, b in zip(by_key[key]['embedding'], vector)) < 1e-5
+
+
+def test_default_run_keeps_other_partitions(tmp_path):
+    workdir = str(tmp_path)
+    spanish = synthetic_talks(4)
+    for talk in spanish:
+        talk['lang'] = 'spa'
+        talk['url'] = talk['url'].replace('lang=eng', 'lang=spa')
+    run_pipeline(workdir, spanish, partition='spa:2020-2025')
+    older = synthetic_talks(6)[4:]
+    for talk in older:
+        talk['year'] = 1995
+    run_pipeline(workdir, older, partition='eng:1990-1999')
+    run_pipeline(workdir, synthetic_talks(4))
+    run_pipeline(workdir, synthetic_talks(2))
+
+    conn = sqlite3.connect(os.path.join(workdir, 'scripts', 'output', 'local.db'))
+    rows = dict(conn.execute("SELECT lang || ':' || (year < 2000), count(*) FROM sentence_embeddings "
+                             "GROUP BY 1").fetchall())
+    talks = dict(conn.execute("SELECT lang || ':' || (year < 2000), count(*) FROM talk_embeddings "
+                              "GROUP BY 1").fetchall())
+    conn.close()
+    sentences, *_ = outputs(workdir)
+    assert rows['eng:0'] == len(sentences)
+    assert rows['eng:1'] > 0 and rows['spa:0'] > 0
+    assert talks == {'eng:0': 2, 'eng:1': 2, 'spa:0': 4}
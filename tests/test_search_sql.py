@@ -0,0 +1,112 @@
+"""
+The Postgres search functions from Step 1, run against a real Postgres with
+pgvector (via the pgserver package). Skipped when pgserver or psycopg2
+isn't installed — the offline backend never executes this SQL.
+
+Searches run with sequential scans, bitmap scans and explicit sorts
+disabled, so the small test tables are planned the way a full corpus is:
+ordered by the per-partition HNSW indexes wherever the planner can.
+"""
+
+import importlib
+import uuid
+
+import numpy as np
+import pytest
+
+pgserver = pytest.importorskip('pgserver')
+psycopg2 = pytest.importorskip('psycopg2')
+
+SCHEMA_SQL = importlib.import_module('01_create_schema').SCHEMA_SQL
+
+TALKS = 60
+SENTENCES_PER_TALK = 50
+DIM = 1536
+
+
+def literal(vector):
+    return '[' + ','.join(f'{v:.6f}' for v in vector) + ']'
+
+
+@pytest.fixture(scope='module')
+def db(tmp_path_factory):
+    server = pgserver.get_server(str(tmp_path_factory.mktemp('pgdata')), cleanup_mode='stop')
+    conn = psycopg2.connect(server.get_uri())
+    conn.autocommit = True
+    cur = conn.cursor()
+    for role in ('anon', 'authenticated', 'service_role'):
+        cur.execute(f"DO $$ BEGIN CREATE ROLE {role}; EXCEPTION WHEN duplicate_object THEN NULL; END $$")
+    cur.execute(SCHEMA_SQL)
+    cur.execute("SELECT ensure_corpus_partitions('eng', 2015, 2024)")
+
+    # Clustered vectors: each talk's sentences sit around its own direction
+    rng = np.random.default_rng(0)
+    centers = rng.standard_normal((TALKS, DIM))
+    sentences = []
+    talks = []
+    for t in range(TALKS):
+        talk_id = str(uuid.UUID(int=t + 1))
+        year = 2015 + t % 10     # both decade partitions
+        vectors = centers[t] + rng.standard_normal((SENTENCES_PER_TALK, DIM)) * 1.5
+        vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+        for n, vector in enumerate(vectors):
+            sentences.append((talk_id, f'Talk {t}', year, n, f'sentence {t}-{n}', literal(vector)))
+        centroid = vectors.mean(axis=0)
+        talks.append((talk_id, f'Talk {t}', year, literal(centroid / np.linalg.norm(centroid))))
+    cur.executemany(
+        "INSERT INTO sentence_embeddings (talk_id, title, year, sentence_num, text, embedding) "
+        "VALUES (%s, %s, %s, %s, %s, %s)", sentences)
+    cur.executemany(
+        "INSERT INTO talk_embeddings (talk_id, title, year, embedding) VALUES (%s, %s, %s, %s)", talks)
+    cur.execute("ANALYZE")
+    yield conn, rng
+    conn.close()
+    server.cleanup()
+
+
+def query(conn, sql, params):
+    with conn.cursor() as cur:
+        cur.execute("BEGIN")
+        for setting in ('enable_seqscan', 'enable_bitmapscan', 'enable_sort'):
+            cur.execute(f"SET LOCAL {setting} = off")
+        cur.execute(sql, params)
+        rows = cur.fetchall()
+        cur.execute("COMMIT")
+    return rows
+
+
+def exact(conn, sql, params):
+    """Exact cosine ranking (no index) to compare against."""
+    with conn.cursor() as cur:
+        cur.execute("BEGIN")
+        cur.execute("SET LOCAL enable_indexscan = off")
+        cur.execute(sql, params)
+        rows = cur.fetchall()
+        cur.execute("COMMIT")
+    return rows
+
+
+def test_match_sentences_returns_match_count_across_partitions(db):
+    conn, rng = db
+    q = literal(rng.standard_normal(DIM))
+    rows = query(conn, "SELECT id, similarity FROM match_sentences(%s::vector, 200)", (q,))
+    truth = exact(conn, "SELECT id FROM sentence_embeddings ORDER BY embedding <=> %s::vector LIMIT 200", (q,))
+
+    assert len(rows) == 200
+    assert [r[1] for r in rows] == sorted((r[1] for r in rows), reverse=True)
+    recall = len({r[0] for r in rows} & {r[0] for r in truth}) / 200
+    assert recall >= 0.9
+
+
+def test_match_sentences_two_stage_scores_only_top_talks(db):
+    conn, rng = db
+    q = literal(rng.standard_normal(DIM))
+    rows = query(conn, "SELECT id, talk_id, similarity FROM match_sentences_two_stage(%s::vector, 5, 200)", (q,))
+    top_talks = {r[0] for r in exact(
+        conn, "SELECT talk_id FROM talk_embeddings ORDER BY embedding <=> %s::vector LIMIT 5", (q,))}
+    truth = exact(conn, "SELECT id FROM sentence_embeddings WHERE talk_id = ANY(%s::uuid[]) "
+                        "ORDER BY embedding <=> %s::vector LIMIT 200", ([str(t) for t in top_talks], q))
+
+    assert len(rows) == 200
+    assert {r[1] for r in rows} == top_talks
+    assert [r[0] for r in rows] == [r[0] for r in truth]
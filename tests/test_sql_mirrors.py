@@ -0,0 +1,104 @@
+"""
+LocalBackend.rpc() reimplements the Postgres functions in Python, and the
+SQL itself never runs offline. These tests hold the two together: every
+function in backends.SQL_FUNCTIONS must have the same parameters, defaults
+and result columns as its definition in Steps 1 and 6, and the local
+mirror must accept exactly those parameters and return exactly those
+columns.
+"""
+
+import importlib
+import os
+import re
+
+import pytest
+
+from backends import REQUIRED, SQL_FUNCTIONS, BackendError, LocalBackend
+from run_offline import synthetic_talks
+
+SQL = (importlib.import_module('01_create_schema').SCHEMA_SQL
+       + importlib.import_module('06_create_analytics').ANALYTICS_SQL)
+
+_FUNCTION = re.compile(
+    r"CREATE (?:OR REPLACE )?FUNCTION (\w+)\((.*?)\)\s*RETURNS (TABLE \((.*?)\)|\w+)", re.S)
+
+
+def literal(text):
+    """The Python value of a SQL default: ints and ARRAY['...'] literals."""
+    text = text.strip()
+    if text.startswith('ARRAY['):
+        return re.findall(r"'([^']*)'", text)
+    return int(text)
+
+
+def sql_functions():
+    functions = {}
+    for name, params, _, columns in _FUNCTION.findall(SQL):
+        signature = {}
+        for param in filter(None, (p.strip() for p in params.split(','))):
+            declaration, _, default = param.partition(' DEFAULT ')
+            signature[declaration.split()[0]] = literal(default) if default else REQUIRED
+        returns = tuple(c.split()[0] for c in columns.split(',')) if columns else ()
+        functions[name] = (signature, returns)
+    return functions
+
+
+def test_every_mirror_has_a_sql_definition():
+    assert set(SQL_FUNCTIONS) <= set(sql_functions())
+
+
+@pytest.mark.parametrize('name', sorted(SQL_FUNCTIONS))
+def test_mirror_matches_sql_signature(name):
+    params, returns = sql_functions()[name]
+    assert list(SQL_FUNCTIONS[name].params.items()) == list(params.items())
+    assert SQL_FUNCTIONS[name].returns == returns
+
+
+@pytest.fixture
+def backend(tmp_path, monkeypatch):
+    """A local database with a few embedded sentences in one partition."""
+    from backends import FakeEmbedder
+
+    monkeypatch.chdir(tmp_path)
+    db = LocalBackend(os.path.join(tmp_path, 'local.db'))
+    db.apply_schema('')
+    talk = synthetic_talks(1)[0]
+    texts = talk['text'].split('. ')[:30]
+    vectors = FakeEmbedder().embed(texts)
+    talk_id = '00000000-0000-0000-0000-000000000001'
+    db.insert('sentence_embeddings', [
+        {'id': f'00000000-0000-0000-0001-{n:012d}', 'talk_id': talk_id, 'title': talk['title'],
+         'speaker': talk['speaker'], 'year': talk['year'], 'lang': 'eng', 'url': talk['url'],
+         'sentence_num': n, 'text': text, 'embedding': vector}
+        for n, (text, vector) in enumerate(zip(texts, vectors), 1)])
+    db.insert('talk_embeddings', [{'talk_id': talk_id, 'title': talk['title'], 'speaker': talk['speaker'],
+                                   'year': talk['year'], 'lang': 'eng', 'url': talk['url'],
+                                   'sentence_count': len(texts), 'embedding': vectors[0]}])
+    return db, vectors[0]
+
+
+@pytest.mark.parametrize('name', ['match_sentences', 'match_sentences_two_stage'])
+def test_local_search_returns_the_sql_columns(backend, name):
+    db, query = backend
+    rows = db.rpc(name, {'query_embedding': query, 'match_count': 5})
+    assert len(rows) == 5
+    assert all(tuple(row) == SQL_FUNCTIONS[name].returns for row in rows)
+
+
+def test_local_compaction_returns_the_sql_columns(backend):
+    db, _ = backend
+    rows = db.rpc('compact_analytics_events', {})
+    assert [tuple(row) for row in rows] == [SQL_FUNCTIONS['compact_analytics_events'].returns]
+
+
+@pytest.mark.parametrize('name, params', [
+    ('match_sentences', {'query_embedding': [0.0], 'match_count': 5, 'lang': 'eng'}),   # unknown
+    ('match_sentences_two_stage', {'match_count': 5}),                                 # missing
+    ('compact_analytics_events', {'batch': 10}),
+    ('ensure_corpus_partitions', {'p_lang': 'eng'}),
+    ('no_such_function', {}),
+])
+def test_local_rpc_rejects_calls_postgres_would(backend, name, params):
+    db, _ = backend
+    with pytest.raises(BackendError, match='does not exist'):
+        db.rpc(name, params)